@@ -1,6 +1,11 @@
+import asyncio
 import asyncpg
 import os
+import time
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
+from fastapi import HTTPException
+from utils.metrics import record_query, DB_POOL_WAIT, DB_POOL_TIMEOUTS, Gauge
 
 # Load environment variables from a .env file
 load_dotenv()
@@ -13,12 +18,93 @@ DB_NAME = os.getenv("DB_NAME")
 
 DATABASE_URL = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 
+# --- POOL CONFIG ---
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "2"))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+DB_POOL_MAX_QUERIES = int(os.getenv("DB_POOL_MAX_QUERIES", "50000"))
+DB_POOL_MAX_INACTIVE_LIFETIME = float(os.getenv("DB_POOL_MAX_INACTIVE_LIFETIME", "300"))  # seconds idle before recycling
+DB_POOL_ACQUIRE_TIMEOUT = float(os.getenv("DB_POOL_ACQUIRE_TIMEOUT", "10"))  # seconds
+
+_pool: asyncpg.Pool | None = None
+
+async def _init_connection(conn):
+    # Per-query count/duration for /metrics
+    conn.add_query_logger(record_query)
+
+async def init_db_pool() -> asyncpg.Pool:
+    """Creates the process-wide pool. Called once from the startup hook."""
+    global _pool
+    if _pool is None:
+        _pool = await asyncpg.create_pool(
+            DATABASE_URL,
+            min_size=DB_POOL_MIN_SIZE,
+            max_size=DB_POOL_MAX_SIZE,
+            max_queries=DB_POOL_MAX_QUERIES,
+            max_inactive_connection_lifetime=DB_POOL_MAX_INACTIVE_LIFETIME,
+            init=_init_connection,
+        )
+    return _pool
+
+async def close_db_pool():
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
+
+def get_pool() -> asyncpg.Pool:
+    if _pool is None:
+        raise RuntimeError("DB pool is not initialised; call init_db_pool() on startup")
+    return _pool
+
+async def _acquire():
+    started = time.perf_counter()
+    try:
+        return await get_pool().acquire(timeout=DB_POOL_ACQUIRE_TIMEOUT)
+    except asyncio.TimeoutError:
+        DB_POOL_TIMEOUTS.inc()
+        raise
+    finally:
+        DB_POOL_WAIT.observe(time.perf_counter() - started)
+
+def _pool_connections() -> dict:
+    if _pool is None:
+        return {}
+    return {("open",): _pool.get_size(), ("idle",): _pool.get_idle_size(), ("max",): _pool.get_max_size()}
+
+Gauge("db_pool_connections", "Pooled DB connections", ("state",), callback=_pool_connections)
+
+@asynccontextmanager
+async def acquire_connection():
+    """Acquires a pooled connection for code that does not run inside a route (tasks, fan-outs)."""
+    conn = await _acquire()
+    try:
+        yield conn
+    finally:
+        await get_pool().release(conn)
+
+@asynccontextmanager
+async def request_connection():
+    """acquire_connection for route bodies: pool exhaustion becomes a 503, like get_db."""
+    try:
+        conn = await _acquire()
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=503, detail="Database is busy, please retry")
+    try:
+        yield conn
+    finally:
+        await get_pool().release(conn)
+
 async def get_db():
-    conn = await asyncpg.connect(DATABASE_URL)
+    """FastAPI dependency: yields a pooled connection and releases it after the request."""
+    try:
+        conn = await _acquire()
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=503, detail="Database is busy, please retry")
     try:
         yield conn
     finally:
-        await conn.close()
+        await get_pool().release(conn)
 
 async def get_single_connection():
+    """Opens a dedicated (non-pooled) connection, e.g. for LISTEN. Caller must close it."""
     return await asyncpg.connect(DATABASE_URL)
@@ -1,29 +1,51 @@
-from utils.telegram_notifier import notify_internal
+import time
+from utils.error_aggregator import report_error
+from utils.query_profiler import profile_query
+
+def _affected_rows(status: str) -> int:
+    # asyncpg returns the command tag, e.g. "UPDATE 3" / "INSERT 0 1"
+    tail = status.rsplit(" ", 1)[-1] if status else ""
+    return int(tail) if tail.isdigit() else 0
 
 async def fetch_one(query: str, values: tuple, conn):
+    started = time.perf_counter()
     try:
-        return await conn.fetchrow(query, *values)
+        row = await conn.fetchrow(query, *values)
     except Exception as e:
-        await notify_internal(f"DB fetch_one error: {e}")
+        profile_query("fetch_one", query, values, started, error=True)
+        report_error("DB fetch_one", e)
         raise
+    profile_query("fetch_one", query, values, started, rows=0 if row is None else 1)
+    return row
 
 async def fetch_all(query: str, values: tuple, conn):
+    started = time.perf_counter()
     try:
-        return await conn.fetch(query, *values)
+        rows = await conn.fetch(query, *values)
     except Exception as e:
-        await notify_internal(f"DB fetch_all error: {e}")
+        profile_query("fetch_all", query, values, started, error=True)
+        report_error("DB fetch_all", e)
         raise
+    profile_query("fetch_all", query, values, started, rows=len(rows))
+    return rows
 
 async def execute_write(query: str, values: tuple, conn):
+    started = time.perf_counter()
     try:
-        return await conn.execute(query, *values)
+        status = await conn.execute(query, *values)
     except Exception as e:
-        await notify_internal(f"DB execute_write error: {e}")
+        profile_query("execute_write", query, values, started, error=True)
+        report_error("DB execute_write", e)
         raise
+    profile_query("execute_write", query, values, started, rows=_affected_rows(status))
+    return status
 
 async def bulk_insert(query: str, list_of_tuples: list, conn):
+    started = time.perf_counter()
     try:
         await conn.executemany(query, list_of_tuples)
     except Exception as e:
-        await notify_internal(f"DB bulk_insert error: {e}")
-        raise
\ No newline at end of file
+        profile_query("bulk_insert", query, (), started, error=True)
+        report_error("DB bulk_insert", e)
+        raise
+    profile_query("bulk_insert", query, (), started, rows=len(list_of_tuples))
@@ -0,0 +1,54 @@
+import asyncio
+import os
+from db.connection import get_single_connection
+
+# One dedicated connection per worker carries every LISTEN channel.
+LISTENER_KEEPALIVE_SECONDS = float(os.getenv("LISTENER_KEEPALIVE_SECONDS", "60"))
+LISTENER_RECONNECT_SECONDS = float(os.getenv("LISTENER_RECONNECT_SECONDS", "5"))
+
+_callbacks: dict[str, list] = {}
+
+def register_listener(channel: str, callback):
+    """
+    Registers callback(payload) for NOTIFYs on channel. Must be called before listen_forever() starts.
+    After every (re)connect the callback also receives None, meaning "notifications may have been missed, resync".
+    """
+    _callbacks.setdefault(channel, []).append(callback)
+
+def _dispatch(channel: str, payload: str | None):
+    for callback in _callbacks.get(channel, []):
+        try:
+            callback(payload)
+        except Exception as e:
+            print(f"[Listener Error] {channel}: {e}")
+
+def _on_notify(conn, pid, channel, payload):
+    _dispatch(channel, payload)
+
+async def listen_forever():
+    while True:
+        conn = None
+        try:
+            conn = await get_single_connection()
+            closed = asyncio.Event()
+            conn.add_termination_listener(lambda c: closed.set())
+
+            for channel in _callbacks:
+                await conn.add_listener(channel, _on_notify)
+                _dispatch(channel, None)
+
+            while not closed.is_set():
+                try:
+                    await asyncio.wait_for(closed.wait(), timeout=LISTENER_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    # Detects half-open TCP connections that never report termination
+                    await conn.execute("SELECT 1")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"[Listener Connection Error] {e}")
+        finally:
+            if conn is not None and not conn.is_closed():
+                await conn.close()
+
+        await asyncio.sleep(LISTENER_RECONNECT_SECONDS)
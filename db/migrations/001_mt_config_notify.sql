@@ -0,0 +1,14 @@
+-- Notifies API workers whenever mt_config changes so they refresh their in-memory copy.
+
+CREATE OR REPLACE FUNCTION mt_config_notify() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('mt_config_changed', '');
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS mt_config_notify_trigger ON mt_config;
+
+CREATE TRIGGER mt_config_notify_trigger
+AFTER INSERT OR UPDATE OR DELETE ON mt_config
+FOR EACH STATEMENT EXECUTE FUNCTION mt_config_notify();
@@ -0,0 +1,11 @@
+-- The recently-viewed write-behind flush upserts on (user_id, script_id).
+-- Keep only the newest row per pair, then enforce uniqueness.
+
+DELETE FROM mt_recently_viewed_scripts rv
+USING mt_recently_viewed_scripts newer
+WHERE rv.user_id = newer.user_id
+  AND rv.script_id = newer.script_id
+  AND (rv.viewed_at, rv.id) < (newer.viewed_at, newer.id);
+
+CREATE UNIQUE INDEX IF NOT EXISTS mt_recently_viewed_scripts_user_script_idx
+ON mt_recently_viewed_scripts (user_id, script_id);
@@ -0,0 +1,22 @@
+-- Some analysis rows were stored as a JSON string holding the document ("{\"a\": 1}")
+-- instead of the document itself. The API now splices these columns into responses as
+-- raw JSON, so unwrap them here once. Loops in case a row was encoded more than twice.
+
+DO $$
+BEGIN
+    LOOP
+        UPDATE mt_openai_analysis
+        SET analysis_json = (analysis_json #>> '{}')::jsonb
+        WHERE jsonb_typeof(analysis_json) = 'string'
+          AND (analysis_json #>> '{}') ~ '^\s*[\[{"]';
+        EXIT WHEN NOT FOUND;
+    END LOOP;
+
+    LOOP
+        UPDATE mt_script_technical_snapshot
+        SET result_json = (result_json #>> '{}')::jsonb
+        WHERE jsonb_typeof(result_json) = 'string'
+          AND (result_json #>> '{}') ~ '^\s*[\[{"]';
+        EXIT WHEN NOT FOUND;
+    END LOOP;
+END $$;
@@ -0,0 +1,26 @@
+-- Pushes is_blocked changes on mt_users to API workers (tasks/blocklist_updater.py) and
+-- stamps updated_at on them, so the periodic delta sync also sees blocks set by hand.
+
+CREATE OR REPLACE FUNCTION mt_users_blocked_notify() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' OR NEW.is_blocked IS DISTINCT FROM OLD.is_blocked THEN
+        NEW.updated_at := now();
+        -- Delivered on commit; "at" lets workers report propagation latency
+        PERFORM pg_notify('mt_user_blocked_changed', json_build_object(
+            'id', NEW.id,
+            'blocked', COALESCE(NEW.is_blocked, false),
+            'at', extract(epoch FROM clock_timestamp())
+        )::text);
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS mt_users_blocked_notify_trigger ON mt_users;
+
+CREATE TRIGGER mt_users_blocked_notify_trigger
+BEFORE INSERT OR UPDATE OF is_blocked ON mt_users
+FOR EACH ROW EXECUTE FUNCTION mt_users_blocked_notify();
+
+-- Delta sync: SELECT ... WHERE updated_at > $1
+CREATE INDEX IF NOT EXISTS mt_users_updated_at_idx ON mt_users (updated_at);
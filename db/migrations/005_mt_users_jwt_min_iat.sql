@@ -0,0 +1,25 @@
+-- Per-user token revocation: access tokens whose iat is at or before jwt_min_iat (whole seconds) are rejected by
+-- authorize_user. Set by /logout; pushed to API workers (tasks/token_revocation_refresher.py).
+
+ALTER TABLE mt_users ADD COLUMN IF NOT EXISTS jwt_min_iat timestamptz;
+
+CREATE OR REPLACE FUNCTION mt_users_token_revoked_notify() RETURNS trigger AS $$
+BEGIN
+    IF NEW.jwt_min_iat IS DISTINCT FROM OLD.jwt_min_iat THEN
+        PERFORM pg_notify('mt_user_token_revoked', json_build_object(
+            'id', NEW.id,
+            'min_iat', floor(extract(epoch FROM NEW.jwt_min_iat))
+        )::text);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS mt_users_token_revoked_notify_trigger ON mt_users;
+
+CREATE TRIGGER mt_users_token_revoked_notify_trigger
+AFTER UPDATE OF jwt_min_iat ON mt_users
+FOR EACH ROW EXECUTE FUNCTION mt_users_token_revoked_notify();
+
+-- Warm-up load only needs revocations younger than the longest token lifetime
+CREATE INDEX IF NOT EXISTS mt_users_jwt_min_iat_idx ON mt_users (jwt_min_iat) WHERE jwt_min_iat IS NOT NULL;
@@ -0,0 +1,18 @@
+-- Per-watchlist stock count, maintained by the routes that add and remove watchlist stocks
+-- (in the same statement as the insert/delete), so get_stocks_in_watchlist and the free-plan
+-- limit check no longer COUNT(*) the join on every request.
+
+ALTER TABLE mt_watchlists ADD COLUMN IF NOT EXISTS stock_count integer NOT NULL DEFAULT 0;
+
+UPDATE mt_watchlists w
+SET stock_count = c.total
+FROM (
+    SELECT watchlist_id, COUNT(*) AS total
+    FROM mt_watchlist_stocks
+    GROUP BY watchlist_id
+) c
+WHERE c.watchlist_id = w.id AND w.stock_count IS DISTINCT FROM c.total;
+
+-- Keyset pages on the default added_date sort read this index in order instead of sorting the watchlist
+CREATE INDEX IF NOT EXISTS mt_watchlist_stocks_watchlist_added_idx
+    ON mt_watchlist_stocks (watchlist_id, added_date, id);
@@ -0,0 +1,55 @@
+-- Price alerts on watchlist scripts. Workers hold every active alert in memory
+-- (utils/price_alerts.py), evaluate them on each script_master snapshot swap and claim a
+-- trigger by flipping is_active (tasks/price_alert_sender.py), so one worker notifies.
+-- Changes are pushed to workers on commit (tasks/price_alert_refresher.py).
+
+CREATE TABLE IF NOT EXISTS mt_price_alerts (
+    id bigserial PRIMARY KEY,
+    user_id integer NOT NULL,
+    script_id integer NOT NULL,
+    alert_type text NOT NULL
+        CHECK (alert_type IN ('price_above', 'price_below', 'change_above', 'change_below', 'high_52', 'low_52')),
+    threshold double precision,  -- NULL for high_52 / low_52
+    is_active boolean NOT NULL DEFAULT true,
+    created_at timestamptz NOT NULL DEFAULT now(),
+    updated_at timestamptz NOT NULL DEFAULT now(),
+    triggered_at timestamptz,
+    triggered_price double precision,
+    CHECK ((threshold IS NULL) = (alert_type IN ('high_52', 'low_52')))
+);
+
+-- One active alert per rule; create_price_alert inserts with ON CONFLICT DO NOTHING
+CREATE UNIQUE INDEX IF NOT EXISTS mt_price_alerts_active_rule_idx
+    ON mt_price_alerts (user_id, script_id, alert_type, COALESCE(threshold, 'NaN'))
+    WHERE is_active;
+
+-- get_price_alerts, newest first
+CREATE INDEX IF NOT EXISTS mt_price_alerts_user_idx ON mt_price_alerts (user_id, id);
+
+-- Delta sync: SELECT ... WHERE updated_at > $1
+CREATE INDEX IF NOT EXISTS mt_price_alerts_updated_at_idx ON mt_price_alerts (updated_at);
+
+CREATE OR REPLACE FUNCTION mt_price_alerts_notify() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        PERFORM pg_notify('mt_price_alert_changed', json_build_object(
+            'id', OLD.id, 'script_id', OLD.script_id, 'alert_type', OLD.alert_type,
+            'threshold', OLD.threshold, 'active', false
+        )::text);
+        RETURN OLD;
+    END IF;
+    NEW.updated_at := now();
+    -- Delivered on commit; carries the whole rule so workers apply it without a query
+    PERFORM pg_notify('mt_price_alert_changed', json_build_object(
+        'id', NEW.id, 'script_id', NEW.script_id, 'alert_type', NEW.alert_type,
+        'threshold', NEW.threshold, 'active', NEW.is_active
+    )::text);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS mt_price_alerts_notify_trigger ON mt_price_alerts;
+
+CREATE TRIGGER mt_price_alerts_notify_trigger
+BEFORE INSERT OR UPDATE OR DELETE ON mt_price_alerts
+FOR EACH ROW EXECUTE FUNCTION mt_price_alerts_notify();
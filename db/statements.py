@@ -0,0 +1,62 @@
+"""
+Registry of named, parameterized statements for hot endpoints.
+
+Routes register their SQL once at import time, with every sort/filter variant enumerated as
+its own name, and call it by name:
+
+    register_statement("get_top_scanners.page", "SELECT ... LIMIT $1 OFFSET $2")
+    rows = await fetch_all_statement("get_top_scanners.page", (limit, offset), conn)
+
+Limits, offsets and optional filters are bind parameters (LIMIT NULL means no limit,
+"$2::text IS NULL OR ..." skips a filter), so the text never varies per request. asyncpg's
+per-connection statement cache then prepares each text once per pooled connection (and
+survives release back to the pool), so Postgres plans it once and switches to its generic
+plan instead of re-planning every request.
+"""
+import time
+from utils.error_aggregator import report_error
+from utils.query_profiler import profile_query
+
+_statements: dict[str, str] = {}
+_stats = {"executions": 0, "errors": 0}
+
+
+def register_statement(name: str, sql: str) -> str:
+    existing = _statements.get(name)
+    if existing is not None and existing != sql:
+        raise ValueError(f"Statement {name} is already registered with different SQL")
+    _statements[name] = sql
+    return name
+
+
+def statement_sql(name: str) -> str:
+    return _statements[name]
+
+
+# /metrics counts these through the pool's query logger like any other query
+async def _run(helper: str, name: str, values: tuple, conn, method: str):
+    sql = _statements[name]
+    started = time.perf_counter()
+    try:
+        result = await getattr(conn, method)(sql, *values)
+    except Exception as e:
+        _stats["errors"] += 1
+        profile_query(helper, sql, values, started, error=True)
+        report_error(f"DB {helper}", e)
+        raise
+    _stats["executions"] += 1
+    rows = len(result) if method == "fetch" else (0 if result is None else 1)
+    profile_query(helper, sql, values, started, rows=rows)
+    return result
+
+
+async def fetch_all_statement(name: str, values: tuple, conn):
+    return await _run("fetch_all_statement", name, values, conn, "fetch")
+
+
+async def fetch_one_statement(name: str, values: tuple, conn):
+    return await _run("fetch_one_statement", name, values, conn, "fetchrow")
+
+
+def statement_stats() -> dict:
+    return {**_stats, "registered": len(_statements)}
@@ -1,15 +1,30 @@
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import FastAPI, HTTPException, Request, Depends
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import ORJSONResponse
+from fastapi.responses import ORJSONResponse, PlainTextResponse
 
 from utils.custom_response import CustomJSONResponse
 from utils.response_builder import error_response
-from utils.telegram_notifier import notify_internal
-from db.connection import get_single_connection
+from utils.telegram_notifier import notify_internal, telegram_sender_forever, close_telegram_notifier
+from utils.error_aggregator import report_error, ErrorRouteMiddleware
+from utils.razorpay_client import close_razorpay_client
+from utils.auth_providers import warm_provider_keys
+from utils.auth import authorize_internal
+from utils.metrics import MetricsMiddleware, render_metrics
+from db.connection import init_db_pool, close_db_pool, acquire_connection
 from routes import router as all_routes
 from tasks.blocklist_updater import refresh_blocked_users_forever
+from tasks.token_revocation_refresher import refresh_token_revocations_forever
+from tasks.config_refresher import refresh_config_forever
+from tasks.script_snapshot_refresher import refresh_script_snapshot_forever
+from tasks.leaderboard_builder import build_leaderboards_forever
+from tasks.price_alert_refresher import refresh_price_alerts_forever
+from tasks.price_alert_sender import send_price_alerts_forever
+from tasks.recently_viewed_flusher import flush_recently_viewed_forever, flush_recently_viewed
+from tasks.error_summary_sender import send_error_summaries_forever, send_error_summary
+from tasks.event_loop_monitor import monitor_event_loop_lag_forever
+from db.listener import listen_forever
 
 import asyncio
 
@@ -30,6 +45,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# ✅ Request path for error fingerprints (see utils/error_aggregator.py)
+app.add_middleware(ErrorRouteMiddleware)
+
+# ✅ Request metrics for /metrics; added last so it wraps GZip and sees on-the-wire sizes
+app.add_middleware(MetricsMiddleware, routes=app.router.routes)
+
 # ✅ Global HTTPException handler
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request: Request, exc: HTTPException):
@@ -53,7 +74,7 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
 # ✅ Global fallback error handler
 @app.exception_handler(Exception)
 async def generic_exception_handler(request: Request, exc: Exception):
-    await notify_internal(f"[Unhandled Error] {str(exc)}")
+    report_error("Unhandled Error", exc, route=request.url.path)
     return error_response(message="Internal Server Error", status_code=500)
 
 # ✅ Register all routers
@@ -62,17 +83,61 @@ app.include_router(all_routes)
 # ✅ Startup tasks
 @app.on_event("startup")
 async def startup():
+    # Telegram sender first, so startup failures below can still be reported
+    asyncio.create_task(telegram_sender_forever())
+    asyncio.create_task(send_error_summaries_forever())
+    asyncio.create_task(monitor_event_loop_lag_forever())
+
     try:
-        # Ping DB
-        conn = await get_single_connection()
-        await conn.execute("SELECT 1")
-        await conn.close()
+        # Create the shared DB pool and ping it
+        await init_db_pool()
+        async with acquire_connection() as conn:
+            await conn.execute("SELECT 1")
 
-        # Background blocklist refresh
+        # Blocklist: full load, then LISTEN/NOTIFY pushes with a periodic delta sync
         asyncio.create_task(refresh_blocked_users_forever())
+
+        # Per-user token revocations from /logout (LISTEN/NOTIFY with periodic fallback reload)
+        asyncio.create_task(refresh_token_revocations_forever())
+
+        # mt_config cache (LISTEN/NOTIFY with periodic fallback poll)
+        asyncio.create_task(refresh_config_forever())
+        asyncio.create_task(listen_forever())
+
+        # In-memory script_master snapshot for market-data reads
+        asyncio.create_task(refresh_script_snapshot_forever())
+
+        # get_market_trends leaderboards, rebuilt after every snapshot swap
+        asyncio.create_task(build_leaderboards_forever())
+
+        # Price alerts: in-memory rules (LISTEN/NOTIFY with periodic delta sync), evaluated on
+        # every snapshot swap; triggers are claimed in mt_price_alerts and sent by the notifier
+        asyncio.create_task(refresh_price_alerts_forever())
+        asyncio.create_task(send_price_alerts_forever())
+
+        # Write-behind flush of recently-viewed scripts
+        asyncio.create_task(flush_recently_viewed_forever())
+
+        # Google/Apple signing keys for local ID token verification
+        asyncio.create_task(warm_provider_keys())
     except Exception as e:
         await notify_internal(f"❌ Startup failure: {str(e)}")
 
+# ✅ Shutdown tasks
+@app.on_event("shutdown")
+async def shutdown():
+    # Persist buffered recently-viewed entries before the pool goes away
+    await flush_recently_viewed()
+    await close_db_pool()
+    await close_razorpay_client()
+    await send_error_summary()
+    await close_telegram_notifier()
+
+# ✅ Prometheus metrics (text exposition format), internal only
+@app.get("/metrics", include_in_schema=False)
+async def metrics(_=Depends(authorize_internal)):
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
 # ✅ ECS/Fargate-compatible health check
 @app.get("/health", include_in_schema=False)
 async def health_check():
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
 from typing import Literal
-from db.connection import get_single_connection
+from db.connection import get_db
 from utils.auth import authorize_user
 from utils.payment_calculator import calculate_final_price
 
@@ -16,9 +16,9 @@ class ApplyPromocodeRequest(BaseModel):
 @router.post("/apply_promocode")
 async def apply_promocode(
     payload: ApplyPromocodeRequest,
-    user_data: dict = Depends(authorize_user)
+    user_data: dict = Depends(authorize_user),
+    conn=Depends(get_db)
 ):
-    conn = await get_single_connection()
     try:
         result = await calculate_final_price(
             plan_id=payload.plan_id,
@@ -49,5 +49,3 @@ async def apply_promocode(
         raise HTTPException(status_code=400, detail=str(ve))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to apply promocode: {str(e)}")
-    finally:
-        await conn.close()
@@ -0,0 +1,199 @@
+from fastapi import APIRouter, Request, Depends, HTTPException
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
+from utils.auth import authorize_user
+from utils.datetime_utils import utc_now
+from utils.error_aggregator import report_error
+from utils.app_config import get_config
+from db.connection import get_db
+from db.db_helpers import fetch_one, fetch_all, execute_write, bulk_insert
+
+router = APIRouter()
+
+BATCH_MAX_OPERATIONS = 1000
+
+class WatchlistMutation(BaseModel):
+    action: Literal["add", "remove", "move"]
+    script_id: int
+    watchlist_id: int  # add: target; remove / move: source
+    to_watchlist_id: Optional[int] = None  # move only
+
+class BatchWatchlistMutationRequest(BaseModel):
+    operations: List[WatchlistMutation] = Field(..., min_length=1, max_length=BATCH_MAX_OPERATIONS)
+
+@router.post("/batch_watchlist_mutation")
+async def batch_watchlist_mutation(
+    payload: BatchWatchlistMutationRequest,
+    request: Request,
+    user_data: dict = Depends(authorize_user),
+    conn=Depends(get_db)
+):
+    """
+    Adds, removes and moves many scripts across the caller's watchlists in one transaction.
+    Operations apply in order; ones that cannot apply (unknown script, already present, not
+    in the watchlist) are skipped and reported, the rest are committed together.
+    """
+    user_id = user_data["user_id"]
+    operations = payload.operations
+
+    for index, op in enumerate(operations):
+        if op.action == "move" and (op.to_watchlist_id is None or op.to_watchlist_id == op.watchlist_id):
+            raise HTTPException(status_code=400, detail=f"operations[{index}]: move needs a different to_watchlist_id")
+
+    watchlist_ids = sorted({op.watchlist_id for op in operations} | {op.to_watchlist_id for op in operations if op.to_watchlist_id})
+    script_ids = sorted({op.script_id for op in operations})
+
+    try:
+        async with conn.transaction():
+            # Step 1: Ownership; row locks serialise this with other batches and the single add / delete routes
+            watchlists = await fetch_all(
+                "SELECT id, stock_count FROM mt_watchlists WHERE id = ANY($1::int[]) AND user_id = $2 ORDER BY id FOR UPDATE",
+                (watchlist_ids, user_id),
+                conn
+            )
+            if len(watchlists) != len(watchlist_ids):
+                raise HTTPException(status_code=404, detail="Watchlist not found or unauthorized")
+
+            # Step 2: Set-based lookups of prices and current membership
+            prices = {
+                row["script_id"]: row["latest_price"]
+                for row in await fetch_all(
+                    "SELECT script_id, latest_price FROM script_master WHERE script_id = ANY($1::int[])",
+                    (script_ids,),
+                    conn
+                )
+            }
+            membership = {
+                (row["watchlist_id"], row["script_id"]): dict(row)
+                for row in await fetch_all(
+                    """
+                    SELECT id, watchlist_id, script_id, added_price, added_date
+                    FROM mt_watchlist_stocks
+                    WHERE watchlist_id = ANY($1::int[]) AND script_id = ANY($2::int[])
+                    """,
+                    (watchlist_ids, script_ids),
+                    conn
+                )
+            }
+
+            # Step 3: Apply the operations in order against the in-memory membership
+            now = utc_now()
+            deleted_ids = []
+            history = []
+            deltas = dict.fromkeys(watchlist_ids, 0)
+            skipped = []
+            applied = {"add": 0, "remove": 0, "move": 0}
+
+            def take(watchlist_id: int, script_id: int) -> dict:
+                entry = membership.pop((watchlist_id, script_id))
+                if entry.get("id") is not None:
+                    deleted_ids.append(entry["id"])
+                deltas[watchlist_id] -= 1
+                history.append((
+                    user_id, watchlist_id, script_id, "removed", now, prices[script_id],
+                    (now - entry["added_date"]).days
+                ))
+                return entry
+
+            def put(watchlist_id: int, script_id: int, added_price, added_date):
+                membership[(watchlist_id, script_id)] = {"id": None, "added_price": added_price, "added_date": added_date}
+                deltas[watchlist_id] += 1
+                history.append((user_id, watchlist_id, script_id, "added", now, prices[script_id], None))
+
+            for index, op in enumerate(operations):
+                if op.script_id not in prices:
+                    skipped.append({"index": index, "reason": "Script ID not found in script_master"})
+                elif op.action == "add":
+                    if (op.watchlist_id, op.script_id) in membership:
+                        skipped.append({"index": index, "reason": "Script already exists in this watchlist"})
+                        continue
+                    put(op.watchlist_id, op.script_id, prices[op.script_id], now)
+                    applied["add"] += 1
+                elif (op.watchlist_id, op.script_id) not in membership:
+                    skipped.append({"index": index, "reason": "Stock not found in the watchlist"})
+                elif op.action == "remove":
+                    take(op.watchlist_id, op.script_id)
+                    applied["remove"] += 1
+                elif (op.to_watchlist_id, op.script_id) in membership:
+                    skipped.append({"index": index, "reason": "Script already exists in the target watchlist"})
+                else:
+                    # A move keeps the original entry price and date
+                    entry = take(op.watchlist_id, op.script_id)
+                    put(op.to_watchlist_id, op.script_id, entry["added_price"], entry["added_date"])
+                    applied["move"] += 1
+
+            # Step 4: Free plan limit, checked on the final counts
+            subscription = await fetch_one(
+                "SELECT plan_type FROM mt_subscriptions WHERE user_id = $1 AND is_active = true",
+                (user_id,),
+                conn
+            )
+            if subscription and subscription["plan_type"].lower() == "free":
+                config = await get_config(conn)
+                max_allowed = config.number_of_stocks_in_watchlist_for_free_users
+                for row in watchlists:
+                    if deltas[row["id"]] > 0 and row["stock_count"] + deltas[row["id"]] > max_allowed:
+                        raise HTTPException(
+                            status_code=403,
+                            detail=f"Free users can add only up to {max_allowed} stocks in a watchlist."
+                        )
+
+            # Step 5: Bulk writes
+            if deleted_ids:
+                await execute_write(
+                    "DELETE FROM mt_watchlist_stocks WHERE id = ANY($1::int[])",
+                    (deleted_ids,),
+                    conn
+                )
+
+            inserts = [
+                (watchlist_id, script_id, entry["added_price"], entry["added_date"])
+                for (watchlist_id, script_id), entry in membership.items()
+                if entry.get("id") is None
+            ]
+            if inserts:
+                await bulk_insert(
+                    """
+                    INSERT INTO mt_watchlist_stocks (watchlist_id, script_id, added_price, added_date)
+                    VALUES ($1, $2, $3, $4)
+                    """,
+                    inserts,
+                    conn
+                )
+
+            if history:
+                await bulk_insert(
+                    """
+                    INSERT INTO mt_watchlist_history (
+                        user_id, watchlist_id, script_id, action, action_date, price, holding_duration_days
+                    ) VALUES ($1, $2, $3, $4, $5, $6, $7)
+                    """,
+                    history,
+                    conn
+                )
+
+            changed = [(watchlist_id, delta) for watchlist_id, delta in deltas.items() if delta]
+            if changed:
+                await execute_write(
+                    """
+                    UPDATE mt_watchlists AS w SET stock_count = GREATEST(w.stock_count + d.delta, 0)
+                    FROM unnest($1::int[], $2::int[]) AS d(id, delta)
+                    WHERE w.id = d.id
+                    """,
+                    ([watchlist_id for watchlist_id, _ in changed], [delta for _, delta in changed]),
+                    conn
+                )
+
+        return {
+            "success": True,
+            "added": applied["add"],
+            "removed": applied["remove"],
+            "moved": applied["move"],
+            "skipped": skipped
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        report_error("Batch Watchlist Mutation Error", e)
+        raise HTTPException(status_code=500, detail="Internal Server Error")
@@ -1,10 +1,10 @@
 from fastapi import APIRouter, Request, Depends, HTTPException
 from pydantic import BaseModel
-from db.connection import get_single_connection
+from db.connection import get_db
 from db.db_helpers import fetch_one, execute_write
 from utils.auth import authorize_user
 from utils.datetime_utils import utc_now
-from utils.telegram_notifier import notify_internal
+from utils.error_aggregator import report_error
 
 router = APIRouter()
 
@@ -12,10 +12,8 @@ class BookmarkRequest(BaseModel):
     scanner_id: int
 
 @router.post("/bookmark_scanner")
-async def bookmark_scanner(payload: BookmarkRequest, request: Request, user_data=Depends(authorize_user)):
+async def bookmark_scanner(payload: BookmarkRequest, request: Request, user_data=Depends(authorize_user), conn=Depends(get_db)):
     try:
-        conn = await get_single_connection()
-
         # Check if bookmark already exists
         exists_query = """
             SELECT 1 FROM mt_bookmarked_scanners
@@ -24,7 +22,6 @@ async def bookmark_scanner(payload: BookmarkRequest, request: Request, user_data
         """
         exists = await fetch_one(exists_query, (user_data["user_id"], payload.scanner_id), conn)
         if exists:
-            await conn.close()
             return ({"success": False, "message": "Already bookmarked"})
 
         now = utc_now()
@@ -38,9 +35,8 @@ async def bookmark_scanner(payload: BookmarkRequest, request: Request, user_data
             conn
         )
 
-        await conn.close()
         return ({"success": True, "message": "Scanner bookmarked"})
 
     except Exception as e:
-        await notify_internal(f"[Bookmark Scanner Error] {e}")
+        report_error("Bookmark Scanner Error", e)
         raise HTTPException(status_code=500, detail="Failed to bookmark scanner")
@@ -0,0 +1,99 @@
+import os
+from fastapi import APIRouter, Request, Depends, HTTPException
+from pydantic import BaseModel
+from typing import Literal, Optional
+from utils.auth import authorize_user
+from utils.error_aggregator import report_error
+from utils.price_alerts import THRESHOLD_TYPES, apply_price_alert_changes
+from db.connection import get_db
+from db.db_helpers import fetch_one
+
+router = APIRouter()
+
+PRICE_ALERT_MAX_PER_USER = int(os.getenv("PRICE_ALERT_MAX_PER_USER", "50"))
+
+class CreatePriceAlertRequest(BaseModel):
+    script_id: int
+    alert_type: Literal["price_above", "price_below", "change_above", "change_below", "high_52", "low_52"]
+    threshold: Optional[float] = None  # price, or percentage for change_*; not used by high_52 / low_52
+
+@router.post("/create_price_alert")
+async def create_price_alert(
+    payload: CreatePriceAlertRequest,
+    request: Request,
+    user_data: dict = Depends(authorize_user),
+    conn=Depends(get_db)
+):
+    """
+    One-shot alert on a script in one of the caller's watchlists. It triggers on the first
+    price update that satisfies it (within SCRIPT_SNAPSHOT_REFRESH_SECONDS), is then
+    deactivated and shows triggered_at / triggered_price in get_price_alerts.
+    """
+    user_id = user_data["user_id"]
+    threshold = payload.threshold
+
+    if payload.alert_type in THRESHOLD_TYPES:
+        if threshold is None:
+            raise HTTPException(status_code=400, detail=f"threshold is required for {payload.alert_type}")
+        if payload.alert_type.startswith("price_") and threshold <= 0:
+            raise HTTPException(status_code=400, detail="threshold must be a positive price")
+    else:
+        threshold = None
+
+    try:
+        async with conn.transaction():
+            in_watchlist = await fetch_one(
+                """
+                SELECT 1
+                FROM mt_watchlist_stocks ws
+                JOIN mt_watchlists w ON w.id = ws.watchlist_id
+                WHERE w.user_id = $1 AND ws.script_id = $2
+                LIMIT 1
+                """,
+                (user_id, payload.script_id),
+                conn
+            )
+            if not in_watchlist:
+                raise HTTPException(status_code=404, detail="Script not found in your watchlists")
+
+            active = await fetch_one(
+                "SELECT COUNT(*) AS total FROM mt_price_alerts WHERE user_id = $1 AND is_active",
+                (user_id,),
+                conn
+            )
+            if active["total"] >= PRICE_ALERT_MAX_PER_USER:
+                raise HTTPException(
+                    status_code=403,
+                    detail=f"You can have up to {PRICE_ALERT_MAX_PER_USER} active price alerts."
+                )
+
+            row = await fetch_one(
+                """
+                INSERT INTO mt_price_alerts (user_id, script_id, alert_type, threshold)
+                VALUES ($1, $2, $3, $4)
+                ON CONFLICT DO NOTHING
+                RETURNING id, created_at
+                """,
+                (user_id, payload.script_id, payload.alert_type, threshold),
+                conn
+            )
+            if not row:
+                raise HTTPException(status_code=409, detail="This price alert already exists")
+
+        # This worker evaluates it from the next tick; others pick it up from the NOTIFY
+        apply_price_alert_changes([(row["id"], payload.script_id, payload.alert_type, threshold, True)], source="local")
+
+        return {
+            "alert_id": row["id"],
+            "script_id": payload.script_id,
+            "alert_type": payload.alert_type,
+            "threshold": threshold,
+            "created_at": row["created_at"],
+            "message": "Price alert created"
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        report_error("CreatePriceAlert Error", e)
+        raise HTTPException(status_code=500, detail="Internal Server Error")
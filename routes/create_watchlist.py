@@ -1,9 +1,10 @@
 from fastapi import APIRouter, Request, Depends, HTTPException
 from pydantic import BaseModel, constr
 from utils.auth import authorize_user
-from utils.telegram_notifier import notify_internal
-from db.connection import get_single_connection
+from utils.error_aggregator import report_error
+from db.connection import get_db
 from utils.datetime_utils import utc_now
+from utils.app_config import get_config
 
 router = APIRouter()
 
@@ -14,18 +15,17 @@ class CreateWatchlistRequest(BaseModel):
 async def create_watchlist(
     payload: CreateWatchlistRequest,
     request: Request,
-    user_data: dict = Depends(authorize_user)
+    user_data: dict = Depends(authorize_user),
+    conn=Depends(get_db)
 ):
     try:
         user_id = user_data["user_id"]
         watchlist_name = payload.watchlist_name.strip()
         now = utc_now()
 
-        conn = await get_single_connection()
-
         # ✅ Get free user watchlist limit from mt_config
-        config = await conn.fetchrow("SELECT watchlist_count_for_free_users FROM mt_config LIMIT 1")
-        max_allowed = config["watchlist_count_for_free_users"]
+        config = await get_config(conn)
+        max_allowed = config.watchlist_count_for_free_users
 
         # ✅ Check if the user has a free plan
         subscription = await conn.fetchrow(
@@ -71,5 +71,5 @@ async def create_watchlist(
     except HTTPException as he:
         raise he
     except Exception as e:
-        await notify_internal(f"[CreateWatchlist Error] {e}")
+        report_error("CreateWatchlist Error", e)
         raise HTTPException(status_code=500, detail="Internal Server Error")
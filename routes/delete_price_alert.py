@@ -0,0 +1,36 @@
+from fastapi import APIRouter, Request, Depends, HTTPException, Query
+from utils.auth import authorize_user
+from utils.error_aggregator import report_error
+from utils.price_alerts import apply_price_alert_changes
+from db.connection import get_db
+from db.db_helpers import fetch_one
+
+router = APIRouter()
+
+@router.delete("/delete_price_alert")
+async def delete_price_alert(
+    alert_id: int = Query(..., description="Price alert ID to delete"),
+    request: Request = None,
+    user_data: dict = Depends(authorize_user),
+    conn=Depends(get_db)
+):
+    try:
+        user_id = user_data["user_id"]
+
+        row = await fetch_one(
+            "DELETE FROM mt_price_alerts WHERE id = $1 AND user_id = $2 RETURNING script_id, alert_type, threshold",
+            (alert_id, user_id),
+            conn
+        )
+        if not row:
+            raise HTTPException(status_code=404, detail="Price alert not found")
+
+        apply_price_alert_changes([(alert_id, row["script_id"], row["alert_type"], row["threshold"], False)], source="local")
+
+        return {"alert_id": alert_id, "message": "Price alert deleted"}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        report_error("DeletePriceAlert Error", e)
+        raise HTTPException(status_code=500, detail="Internal Server Error")
@@ -1,9 +1,9 @@
 from fastapi import APIRouter, Request, Depends, HTTPException
 from pydantic import BaseModel
 from utils.auth import authorize_user
-from db.connection import get_single_connection
+from db.connection import get_db
 from db.db_helpers import fetch_one, execute_write
-from utils.telegram_notifier import notify_internal
+from utils.error_aggregator import report_error
 
 router = APIRouter()
 
@@ -15,43 +15,49 @@ class DeleteStockRequest(BaseModel):
 async def delete_stock_from_watchlist(
     payload: DeleteStockRequest,
     request: Request,
-    user_data: dict = Depends(authorize_user)
+    user_data: dict = Depends(authorize_user),
+    conn=Depends(get_db)
 ):
     user_id = user_data["user_id"]
-    conn = await get_single_connection()
 
     try:
-        # Step 1: Check if watchlist belongs to user
-        wl_check = await fetch_one(
-            "SELECT id FROM mt_watchlists WHERE id = $1 AND user_id = $2",
-            (payload.watchlist_id, user_id),
-            conn
-        )
-        if not wl_check:
-            raise HTTPException(status_code=404, detail="Watchlist not found or doesn't belong to user")
-
-        # Step 2: Check if stock exists in that watchlist
-        stock_check = await fetch_one(
-            "SELECT id FROM mt_watchlist_stocks WHERE watchlist_id = $1 AND script_id = $2",
-            (payload.watchlist_id, payload.script_id),
-            conn
-        )
-        if not stock_check:
-            raise HTTPException(status_code=404, detail="Stock not found in the watchlist")
-
-        # Step 3: Perform deletion
-        await execute_write(
-            "DELETE FROM mt_watchlist_stocks WHERE id = $1",
-            (stock_check["id"],),
-            conn
-        )
+        # The watchlist row lock serialises this with batch_watchlist_mutation and the add route
+        async with conn.transaction():
+            # Step 1: Check if watchlist belongs to user
+            wl_check = await fetch_one(
+                "SELECT id FROM mt_watchlists WHERE id = $1 AND user_id = $2 FOR UPDATE",
+                (payload.watchlist_id, user_id),
+                conn
+            )
+            if not wl_check:
+                raise HTTPException(status_code=404, detail="Watchlist not found or doesn't belong to user")
+
+            # Step 2: Check if stock exists in that watchlist
+            stock_check = await fetch_one(
+                "SELECT id FROM mt_watchlist_stocks WHERE watchlist_id = $1 AND script_id = $2",
+                (payload.watchlist_id, payload.script_id),
+                conn
+            )
+            if not stock_check:
+                raise HTTPException(status_code=404, detail="Stock not found in the watchlist")
+
+            # Step 3: Perform deletion and decrement the watchlist's stock_count in the same statement
+            await execute_write(
+                """
+                WITH removed AS (
+                    DELETE FROM mt_watchlist_stocks WHERE id = $1 RETURNING 1
+                )
+                UPDATE mt_watchlists SET stock_count = GREATEST(stock_count - (SELECT COUNT(*) FROM removed), 0)
+                WHERE id = $2
+                """,
+                (stock_check["id"], payload.watchlist_id),
+                conn
+            )
 
         return ({"success": True, "message": "Stock removed from watchlist"})
 
     except HTTPException:
         raise
     except Exception as e:
-        await notify_internal(f"[Delete Watchlist Stock Error] {str(e)}")
+        report_error("Delete Watchlist Stock Error", e)
         raise HTTPException(status_code=500, detail="Internal Server Error")
-    finally:
-        await conn.close()
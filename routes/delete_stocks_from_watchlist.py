@@ -4,7 +4,7 @@ from typing import List
 from utils.auth import authorize_user
 from db.connection import get_db
 from db.db_helpers import execute_write, fetch_one
-from utils.telegram_notifier import notify_internal
+from utils.error_aggregator import report_error
 from utils.datetime_utils import utc_now
 import asyncpg
 
@@ -29,61 +29,69 @@ async def delete_stock_from_watchlist(
         if not payload.script_ids:
             raise HTTPException(status_code=400, detail="No script_ids provided")
 
-        # Validate watchlist
-        result = await conn.fetchrow(
-            "SELECT id FROM mt_watchlists WHERE id = $1 AND user_id = $2",
-            (payload.watchlist_id, payload.user_id)
-        )
-        if not result:
-            raise HTTPException(status_code=404, detail="Watchlist not found for this user")
-
-        # For each script to be deleted, fetch existing data and log it
-        now = utc_now()
-        deleted_count = 0
-
-        for script_id in payload.script_ids:
-            # Check if exists in watchlist
-            existing = await fetch_one(
-                "SELECT added_date, added_price FROM mt_watchlist_stocks WHERE watchlist_id = $1 AND script_id = $2",
-                (payload.watchlist_id, script_id),
+        # The watchlist row lock serialises this with batch_watchlist_mutation and the add route
+        async with conn.transaction():
+            # Validate watchlist
+            result = await fetch_one(
+                "SELECT id FROM mt_watchlists WHERE id = $1 AND user_id = $2 FOR UPDATE",
+                (payload.watchlist_id, payload.user_id),
                 conn
             )
-            if not existing:
-                continue  # skip nonexistent entries
+            if not result:
+                raise HTTPException(status_code=404, detail="Watchlist not found for this user")
 
-            # Get current price
-            script = await fetch_one(
-                "SELECT latest_price FROM script_master WHERE script_id = $1",
-                (script_id,),
-                conn
-            )
-            if not script:
-                continue
+            # For each script to be deleted, fetch existing data and log it
+            now = utc_now()
+            deleted_count = 0
 
-            holding_days = (now - existing["added_date"]).days
+            for script_id in payload.script_ids:
+                # Check if exists in watchlist
+                existing = await fetch_one(
+                    "SELECT added_date, added_price FROM mt_watchlist_stocks WHERE watchlist_id = $1 AND script_id = $2",
+                    (payload.watchlist_id, script_id),
+                    conn
+                )
+                if not existing:
+                    continue  # skip nonexistent entries
 
-            # Log deletion in history
-            await execute_write(
-                """
-                INSERT INTO mt_watchlist_history (
-                    user_id, watchlist_id, script_id, action, action_date, price, holding_duration_days
-                ) VALUES ($1, $2, $3, 'removed', $4, $5, $6)
-                """,
-                (user_id, payload.watchlist_id, script_id, now, script["latest_price"], holding_days),
-                conn
-            )
+                # Get current price
+                script = await fetch_one(
+                    "SELECT latest_price FROM script_master WHERE script_id = $1",
+                    (script_id,),
+                    conn
+                )
+                if not script:
+                    continue
+
+                holding_days = (now - existing["added_date"]).days
+
+                # Log deletion in history
+                await execute_write(
+                    """
+                    INSERT INTO mt_watchlist_history (
+                        user_id, watchlist_id, script_id, action, action_date, price, holding_duration_days
+                    ) VALUES ($1, $2, $3, 'removed', $4, $5, $6)
+                    """,
+                    (user_id, payload.watchlist_id, script_id, now, script["latest_price"], holding_days),
+                    conn
+                )
 
-            deleted_count += 1
+                deleted_count += 1
 
-        if deleted_count == 0:
-            raise HTTPException(status_code=404, detail="No valid scripts to delete")
+            if deleted_count == 0:
+                raise HTTPException(status_code=404, detail="No valid scripts to delete")
 
-        # Bulk delete
-        delete_query = """
-            DELETE FROM mt_watchlist_stocks
-            WHERE watchlist_id = $1 AND script_id = ANY($2::int[])
-        """
-        await execute_write(delete_query, (payload.watchlist_id, payload.script_ids), conn)
+            # Bulk delete, decrementing the watchlist's stock_count in the same statement
+            delete_query = """
+                WITH removed AS (
+                    DELETE FROM mt_watchlist_stocks
+                    WHERE watchlist_id = $1 AND script_id = ANY($2::int[])
+                    RETURNING 1
+                )
+                UPDATE mt_watchlists SET stock_count = GREATEST(stock_count - (SELECT COUNT(*) FROM removed), 0)
+                WHERE id = $1
+            """
+            await execute_write(delete_query, (payload.watchlist_id, payload.script_ids), conn)
 
         return {
             "status": "success",
@@ -91,5 +99,5 @@ async def delete_stock_from_watchlist(
         }
 
     except Exception as e:
-        await notify_internal(f"[❌ Delete Watchlist Error] {str(e)}")
+        report_error("❌ Delete Watchlist Error", e)
         raise HTTPException(status_code=500, detail="Internal server error")
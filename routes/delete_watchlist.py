@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Request, Depends, HTTPException, Query
 from utils.auth import authorize_user
-from utils.telegram_notifier import notify_internal
-from db.connection import get_single_connection
+from utils.error_aggregator import report_error
+from db.connection import get_db
 
 router = APIRouter()
 
@@ -9,11 +9,11 @@ router = APIRouter()
 async def delete_watchlist(
     watchlist_id: int = Query(..., description="Watchlist ID to delete"),
     request: Request = None,
-    user_data: dict = Depends(authorize_user)
+    user_data: dict = Depends(authorize_user),
+    conn=Depends(get_db)
 ):
     try:
         user_id = user_data["user_id"]
-        conn = await get_single_connection()
 
         result = await conn.execute(
             "DELETE FROM mt_watchlists WHERE id = $1 AND user_id = $2",
@@ -28,5 +28,5 @@ async def delete_watchlist(
     except HTTPException:
         raise
     except Exception as e:
-        await notify_internal(f"[DeleteWatchlist Error] {e}")
+        report_error("DeleteWatchlist Error", e)
         raise HTTPException(status_code=500, detail="Internal Server Error")
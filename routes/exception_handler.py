@@ -3,7 +3,7 @@
 from fastapi import Request, HTTPException
 from fastapi.responses import ORJSONResponse
 from starlette.exceptions import HTTPException as StarletteHTTPException
-from utils.telegram_notifier import notify_internal
+from utils.error_aggregator import report_error
 
 async def http_exception_handler(request: Request, exc: StarletteHTTPException):
     return ORJSONResponse(
@@ -17,7 +17,7 @@ async def http_exception_handler(request: Request, exc: StarletteHTTPException):
     )
 
 async def unhandled_exception_handler(request: Request, exc: Exception):
-    await notify_internal(f"[Unhandled Exception] {type(exc).__name__}: {exc}")
+    report_error("Unhandled Exception", exc, route=request.url.path)
     return ORJSONResponse(
         status_code=500,
         content={
@@ -1,8 +1,9 @@
-from fastapi import APIRouter, Request, HTTPException
+from fastapi import APIRouter, Request, HTTPException, Depends
 from pydantic import BaseModel, EmailStr
-from db.connection import get_single_connection
+from db.connection import get_db
 from db.db_helpers import fetch_one, execute_write
 from utils.telegram_notifier import notify_internal
+from utils.error_aggregator import report_error
 from utils.version_utils import determine_update_type
 from utils.datetime_utils import utc_now, utc_in
 
@@ -19,14 +20,12 @@ class GenerateOtpRequest(BaseModel):
     platform: str
 
 @router.post("/generate_otp")
-async def generate_otp(payload: GenerateOtpRequest, request: Request):
+async def generate_otp(payload: GenerateOtpRequest, request: Request, conn=Depends(get_db)):
     try:
         email = payload.email.lower()
         now = utc_now()
         expires_at = utc_in(minutes=5)
 
-        conn = await get_single_connection()
-
         user_row = await conn.fetchrow("SELECT id, is_blocked FROM mt_users WHERE email = $1", email)
         if user_row and user_row["is_blocked"]:
             await notify_internal(f"[Blocked OTP Attempt] Email: {email}")
@@ -70,7 +69,7 @@ async def generate_otp(payload: GenerateOtpRequest, request: Request):
     except HTTPException:
         raise
     except Exception as e:
-        await notify_internal(f"[Generate OTP Error] {str(e)}")
+        report_error("Generate OTP Error", e)
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 async def send_otp_email(email: str, otp_code: str):
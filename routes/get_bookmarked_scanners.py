@@ -1,16 +1,14 @@
 from fastapi import APIRouter, Request, Depends, HTTPException
-from db.connection import get_single_connection
+from db.connection import get_db
 from db.db_helpers import fetch_all
 from utils.auth import authorize_user
-from utils.telegram_notifier import notify_internal
+from utils.error_aggregator import report_error
 
 router = APIRouter()
 
 @router.get("/get_bookmarked_scanners")
-async def get_bookmarked_scanners(request: Request, user_data=Depends(authorize_user)):
+async def get_bookmarked_scanners(request: Request, user_data=Depends(authorize_user), conn=Depends(get_db)):
     try:
-        conn = await get_single_connection()
-
         query = """
             SELECT s.*
             FROM mt_scanners s
@@ -20,11 +18,10 @@ async def get_bookmarked_scanners(request: Request, user_data=Depends(authorize_
         """
 
         records = await fetch_all(query, (user_data["user_id"],), conn)
-        await conn.close()
 
         bookmarked = [dict(row) for row in records]
         return (bookmarked)
 
     except Exception as e:
-        await notify_internal(f"[Get Bookmarked Scanners Error] {e}")
+        report_error("Get Bookmarked Scanners Error", e)
         raise HTTPException(status_code=500, detail="Failed to fetch bookmarked scanners")
@@ -1,12 +1,66 @@
 from fastapi import APIRouter, Query, Request, Depends, HTTPException
-from db.connection import get_single_connection
-from db.db_helpers import fetch_all
+from db.connection import request_connection
+from db.statements import register_statement, fetch_all_statement
 from utils.auth import authorize_user
-from utils.telegram_notifier import notify_internal
+from utils.error_aggregator import report_error
+from utils.app_config import get_config
+from utils.script_snapshot import get_snapshot
+from utils.market_leaderboards import get_leaderboards, trend_indices
+from utils.single_flight import single_flight
 
 router = APIRouter()
 
+COMPANY_SIZE_MAP = {
+    "SMALL": "Small Cap",
+    "MID": "Mid Cap",
+    "LARGE": "Large Cap"
+}
+
+TREND_FIELDS = (
+    "script_id", "co_code", "companyname", "companyshortname", "latest_price",
+    "changed_percentage", "volume", "exchange", "company_size"
+)
+
+# trend -> (extra filters, order); $5 is the volume threshold where a trend uses one
+TREND_QUERIES = {
+    "gainers": ("changed_percentage > 0", "changed_percentage DESC"),
+    "losers": ("changed_percentage < 0", "changed_percentage ASC"),
+    "active": ("volume >= $5", "volume DESC"),
+    "unusual_volume": (
+        "volume >= volume_moving_average * 2 AND volume >= $5",
+        "(volume::float / NULLIF(volume_moving_average, 0)) DESC"
+    ),
+    "high_52": ("latest_price >= alltime_high AND alltime_high_date >= NOW() - INTERVAL '1 year'", "companyname ASC"),
+    "low_52": ("latest_price <= alltime_low AND alltime_low_date >= NOW() - INTERVAL '1 year'", "companyname ASC"),
+    "ath": ("latest_price >= alltime_high", "companyname ASC"),
+    "atl": ("latest_price <= alltime_low", "companyname ASC"),
+}
+
+for _trend, (_filters, _order) in TREND_QUERIES.items():
+    register_statement(f"get_market_trends.{_trend}", f"""
+        SELECT
+            script_id, co_code, companyname, companyshortname, latest_price,
+            changed_percentage, volume, exchange, company_size
+        FROM script_master
+        WHERE latest_price IS NOT NULL
+          AND ($1::text IS NULL OR exchange = $1)
+          AND ($2::text IS NULL OR company_size = $2)
+          AND {_filters}
+        ORDER BY {_order}
+        LIMIT $3 OFFSET $4
+    """)
+
+async def fetch_market_trends_from_db(conn, trend: str, exchange: str | None, size_label: str | None,
+                                      volume_threshold, limit: int, offset: int) -> list[dict]:
+    """Original SQL path, used before the first script_master snapshot is loaded."""
+    params = (exchange, size_label, limit, offset)
+    if "$5" in TREND_QUERIES[trend][0]:
+        params += (volume_threshold,)
+    results = await fetch_all_statement(f"get_market_trends.{trend}", params, conn)
+    return [dict(row) for row in results]
+
 @router.get("/get_market_trends")
+@single_flight(normalize={"exchange": str.upper, "company_size": str.upper})
 async def get_market_trends(
     request: Request,
     trend: str = Query(..., regex="^(gainers|losers|active|unusual_volume|high_52|low_52|ath|atl)$"),
@@ -17,84 +71,30 @@ async def get_market_trends(
     user_data: dict = Depends(authorize_user)
 ):
     try:
-        conn = await get_single_connection()
-
-        config = await conn.fetchrow("SELECT unusual_volume_threshold FROM mt_config LIMIT 1")
-        if not config:
-            raise Exception("Config not found in mt_config")
-        volume_threshold = config["unusual_volume_threshold"]
-
-        base_query = """
-            SELECT
-                script_id, co_code, companyname, companyshortname, latest_price,
-                changed_percentage, volume, exchange, company_size
-            FROM script_master
-            WHERE latest_price IS NOT NULL
-        """
-
-        filters = []
-        params = []
-
-        if exchange:
-            filters.append("exchange = $%d" % (len(params) + 1))
-            params.append(exchange.upper())
-
-        company_size_map = {
-            "SMALL": "Small Cap",
-            "MID": "Mid Cap",
-            "LARGE": "Large Cap"
-        }
-        if company_size:
-            mapped_value = company_size_map.get(company_size.upper())
-            if mapped_value:
-                filters.append("company_size = $%d" % (len(params) + 1))
-                params.append(mapped_value)
-
-        if trend == "gainers":
-            filters.append("changed_percentage > 0")
-            order_clause = "ORDER BY changed_percentage DESC"
-
-        elif trend == "losers":
-            filters.append("changed_percentage < 0")
-            order_clause = "ORDER BY changed_percentage ASC"
-
-        elif trend == "active":
-            filters.append("volume >= $%d" % (len(params) + 1))
-            params.append(volume_threshold)
-            order_clause = "ORDER BY volume DESC"
-
-        elif trend == "unusual_volume":
-            filters.append("volume >= volume_moving_average * 2")
-            filters.append("volume >= $%d" % (len(params) + 1))
-            params.append(volume_threshold)
-            order_clause = "ORDER BY (volume::float / NULLIF(volume_moving_average, 0)) DESC"
-
-        elif trend == "high_52":
-            filters.append("latest_price >= alltime_high")
-            filters.append("alltime_high_date >= NOW() - INTERVAL '1 year'")
-            order_clause = "ORDER BY companyname ASC"
-
-        elif trend == "low_52":
-            filters.append("latest_price <= alltime_low")
-            filters.append("alltime_low_date >= NOW() - INTERVAL '1 year'")
-            order_clause = "ORDER BY companyname ASC"
-
-        elif trend == "ath":
-            filters.append("latest_price >= alltime_high")
-            order_clause = "ORDER BY companyname ASC"
-
-        elif trend == "atl":
-            filters.append("latest_price <= alltime_low")
-            order_clause = "ORDER BY companyname ASC"
-
-        if filters:
-            base_query += " AND " + " AND ".join(filters)
-
-        base_query += f" {order_clause} LIMIT {limit} OFFSET {offset}"
-
-        results = await fetch_all(base_query, tuple(params), conn)
-        return {"results": [dict(row) for row in results]}
-
+        config = await get_config()
+        volume_threshold = config.unusual_volume_threshold
+        size_label = COMPANY_SIZE_MAP.get(company_size.upper()) if company_size else None
+        exchange = exchange.upper() if exchange else None
+
+        # Precomputed boards: O(limit) slice of the latest build
+        leaderboards = get_leaderboards()
+        if leaderboards is not None and leaderboards.volume_threshold == volume_threshold:
+            snapshot = leaderboards.snapshot
+            page = leaderboards.page(trend, exchange, size_label, offset, limit)
+            return {"results": snapshot.records(page, TREND_FIELDS), "snapshot": snapshot.meta()}
+
+        # Snapshot loaded but no matching build yet: sort on the fly
+        snapshot = get_snapshot()
+        if snapshot is not None:
+            page = trend_indices(snapshot, trend, exchange, size_label, volume_threshold)[offset:offset + limit]
+            return {"results": snapshot.records(page, TREND_FIELDS), "snapshot": snapshot.meta()}
+
+        async with request_connection() as conn:
+            results = await fetch_market_trends_from_db(conn, trend, exchange, size_label, volume_threshold, limit, offset)
+        return {"results": results, "snapshot": None}
+
+    except HTTPException:
+        raise
     except Exception as e:
-        await notify_internal(f"[get_market_trends Error] {str(e)}")
+        report_error("get_market_trends Error", e)
         raise HTTPException(status_code=500, detail="Internal Server Error")
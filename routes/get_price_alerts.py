@@ -0,0 +1,37 @@
+from fastapi import APIRouter, Request, Depends, HTTPException, Query
+from utils.auth import authorize_user
+from utils.error_aggregator import report_error
+from db.connection import get_db
+from db.db_helpers import fetch_all
+
+router = APIRouter()
+
+@router.get("/get_price_alerts")
+async def get_price_alerts(
+    request: Request,
+    script_id: int | None = Query(None, description="Omit for alerts on every script"),
+    active_only: bool = Query(False, description="Hide alerts that already triggered"),
+    user_data: dict = Depends(authorize_user),
+    conn=Depends(get_db)
+):
+    try:
+        user_id = user_data["user_id"]
+        rows = await fetch_all(
+            """
+            SELECT a.id AS alert_id, a.script_id, sm.companyname, a.alert_type, a.threshold, a.is_active,
+                   a.created_at, a.triggered_at, a.triggered_price
+            FROM mt_price_alerts a
+            LEFT JOIN script_master sm ON sm.script_id = a.script_id
+            WHERE a.user_id = $1
+              AND ($2::int IS NULL OR a.script_id = $2)
+              AND (NOT $3 OR a.is_active)
+            ORDER BY a.id DESC
+            """,
+            (user_id, script_id, active_only),
+            conn
+        )
+        return {"alerts": [dict(row) for row in rows]}
+
+    except Exception as e:
+        report_error("GetPriceAlerts Error", e)
+        raise HTTPException(status_code=500, detail="Internal Server Error")
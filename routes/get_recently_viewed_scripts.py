@@ -1,33 +1,47 @@
 from fastapi import APIRouter, Request, Depends, HTTPException
 from utils.auth import authorize_user
-from utils.telegram_notifier import notify_internal
-from db.connection import get_single_connection
-from db.db_helpers import fetch_all, fetch_one
+from utils.error_aggregator import report_error
+from db.connection import get_db
+from db.db_helpers import fetch_all
+from utils.app_config import get_config
+from utils.recently_viewed_buffer import buffered_views
 
 router = APIRouter()
 
 @router.get("/get_recently_viewed_scripts")
-async def get_recently_viewed_scripts(request: Request, user=Depends(authorize_user)):
+async def get_recently_viewed_scripts(request: Request, user=Depends(authorize_user), conn=Depends(get_db)):
     try:
         user_id = user["user_id"]
-        conn = await get_single_connection()
 
-        config_row = await fetch_one("SELECT recently_viewed_count FROM mt_config LIMIT 1", (), conn)
-        max_count = config_row["recently_viewed_count"] or 20  # fallback
+        config = await get_config(conn)
+        max_count = config.recently_viewed_count
 
+        # Views still in the write-behind buffer are merged in, newest view per script wins
         query = f"""
+            WITH views AS (
+                SELECT script_id, MAX(viewed_at) AS viewed_at
+                FROM (
+                    SELECT script_id, viewed_at
+                    FROM mt_recently_viewed_scripts
+                    WHERE user_id = $1
+                    UNION ALL
+                    SELECT script_id, viewed_at
+                    FROM unnest($2::bigint[], $3::timestamptz[]) AS b(script_id, viewed_at)
+                ) v
+                GROUP BY script_id
+            )
             SELECT s.script_id, s.co_code, s.companyname, s.companyshortname,
                    s.latest_price, s.changed_percentage, s.exchange, s.company_size
-            FROM mt_recently_viewed_scripts rv
+            FROM views rv
             JOIN script_master s ON rv.script_id = s.script_id
-            WHERE rv.user_id = $1
             ORDER BY rv.viewed_at DESC
             LIMIT {max_count}
         """
 
-        rows = await fetch_all(query, (user_id,), conn)
+        script_ids, viewed_at = buffered_views(user_id)
+        rows = await fetch_all(query, (user_id, script_ids, viewed_at), conn)
         return {"scripts": [dict(row) for row in rows]}
 
     except Exception as e:
-        await notify_internal(f"[Get Recently Viewed Error] {str(e)}")
+        report_error("Get Recently Viewed Error", e)
         raise HTTPException(status_code=500, detail="Failed to retrieve recently viewed scripts")
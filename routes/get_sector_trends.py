@@ -1,8 +1,10 @@
 from fastapi import APIRouter, Request, Depends, HTTPException, Query
 from utils.auth import authorize_user
-from db.connection import get_single_connection
+from db.connection import request_connection
 from db.db_helpers import fetch_all
-from utils.telegram_notifier import notify_internal
+from utils.error_aggregator import report_error
+from utils.script_snapshot import get_snapshot
+from utils.single_flight import single_flight
 from decimal import Decimal
 
 router = APIRouter()
@@ -11,13 +13,66 @@ ALLOWED_SORT_FIELDS = {
     "dma10", "dma20", "dma50", "dma100", "dma200", "current_value", "trend", "sectorname", "stock_count"
 }
 
+SNAPSHOT_QUERY = """
+    WITH sector_stock_counts AS (
+        SELECT * FROM unnest($1::int[], $2::bigint[]) AS c(sectorcode, stock_count)
+    )
+    SELECT DISTINCT
+        sma.sectorcode,
+        sma.sectorname,
+        sma.dma10,
+        sma.dma20,
+        sma.dma50,
+        sma.dma100,
+        sma.dma200,
+        sma.current_value,
+        sma.trend,
+        COALESCE(ssc.stock_count, 0) AS stock_count
+    FROM sectoral_moving_averages sma
+    LEFT JOIN sector_stock_counts ssc
+        ON sma.sectorcode = ssc.sectorcode
+    WHERE sma.sectorcode = ANY($3::int[])
+"""
+
+_sector_counts_cache: tuple[int, list] | None = None
+
 def serialize_row(row):
     return {
         k: float(v) if isinstance(v, Decimal) else v
         for k, v in dict(row).items()
     }
 
+def sector_counts_from_snapshot(snapshot) -> list:
+    """
+    [sectorcodes, stock_counts, listed_sectorcodes]: the sector_stock_counts CTE and the
+    script_master join of the SQL path, computed once per snapshot version.
+    """
+    global _sector_counts_cache
+    if _sector_counts_cache and _sector_counts_cache[0] == snapshot.version:
+        return _sector_counts_cache[1]
+
+    co_codes, listed = {}, set()
+    price = snapshot["latest_price"]
+    sector_labels = snapshot.labels["sector"]
+    for i, raw_code in enumerate(snapshot["sectorcode"].tolist()):
+        if raw_code is None:
+            continue
+        try:
+            code = int(raw_code)
+        except ValueError:
+            continue
+        if sector_labels[snapshot["sector"][i]] is not None:
+            listed.add(code)
+        if price[i] > 0:
+            co_codes.setdefault(code, set()).add(snapshot["co_code"][i])
+
+    codes = sorted(co_codes)
+    result = [codes, [len(co_codes[c]) for c in codes], sorted(listed)]
+    _sector_counts_cache = (snapshot.version, result)
+    return result
+
 @router.get("/get_sector_trends")
+@single_flight(normalize={"sectorname": str.lower, "sort_order": str.lower})
 async def get_sector_trends(
     request: Request,
     user_data: dict = Depends(authorize_user),
@@ -25,9 +80,14 @@ async def get_sector_trends(
     sort_by: str = Query(None, description="Field to sort by"),
     sort_order: str = Query("asc", pattern="^(asc|desc)$", description="Sort order: asc or desc")
 ):
-    conn = await get_single_connection()
     try:
-        base_query = """
+        snapshot = get_snapshot()
+        if snapshot is not None:
+            base_query = SNAPSHOT_QUERY
+            values = list(sector_counts_from_snapshot(snapshot))
+        else:
+            values = []
+            base_query = """
             WITH sector_stock_counts AS (
                 SELECT sectorcode::int AS sectorcode, COUNT(DISTINCT co_code) AS stock_count
                 FROM script_master
@@ -54,7 +114,6 @@ async def get_sector_trends(
         """
 
         conditions = []
-        values = []
 
         if sectorname:
             conditions.append(f"LOWER(sma.sectorname) LIKE LOWER(${len(values) + 1})")
@@ -70,12 +129,13 @@ async def get_sector_trends(
 
         base_query += " LIMIT 1000"
 
-        rows = await fetch_all(base_query, tuple(values), conn)
+        async with request_connection() as conn:
+            rows = await fetch_all(base_query, tuple(values), conn)
         results = [serialize_row(row) for row in rows]
-        return {"data": results}
+        return {"data": results, "snapshot": snapshot.meta() if snapshot is not None else None}
 
+    except HTTPException:
+        raise
     except Exception as e:
-        await notify_internal(f"[get_sector_trends Error] {e}")
+        report_error("get_sector_trends Error", e)
         raise HTTPException(status_code=500, detail="Internal Server Error")
-    finally:
-        await conn.close()
@@ -1,227 +1,267 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from utils.auth import authorize_user
-from db.connection import get_single_connection
-from db.db_helpers import fetch_all, fetch_one, execute_write
-from utils.telegram_notifier import notify_internal
-from utils.datetime_utils import utc_now
-import json
+from db.connection import acquire_connection
+from db.db_helpers import fetch_all, fetch_one
+from utils.error_aggregator import report_error
+from utils.app_config import get_config
+from utils.script_snapshot import get_snapshot
+from utils.recently_viewed_buffer import record_view
+from utils.stock_details_cache import stock_details_cache
+from utils.server_timing import SectionTimer
+from utils.custom_response import CustomJSONResponse, json_fragment, raw_json
+import numpy as np
+import asyncio
 
 router = APIRouter()
 
 LIMIT_LARGE_SHAREHOLDERS = 10
+LIMIT_SIMILAR_COMPANIES = 5
+
+SIMILAR_COMPANY_FIELDS = (
+    "companyname", "companyshortname", "co_code", "script_id",
+    "latest_price", "changed_percentage", "exchange"
+)
+
+LIVE_FIELDS = (
+    "script_id", "co_code", "companyname", "companyshortname", "sector", "company_size",
+    "latest_price", "changed_percentage", "price_difference", "market_cap"
+)
+
+LIVE_QUERY = f"""
+    SELECT {", ".join(LIVE_FIELDS)}
+    FROM script_master
+    WHERE script_id = $1
+"""
+
+ANALYSIS_QUERY = """
+    SELECT analysis_json
+    FROM mt_openai_analysis
+    WHERE co_code = $1
+    LIMIT 1
+"""
+
+FINANCIAL_RATIOS_QUERY = """
+    SELECT
+        yearend,
+        pe,
+        pbv,
+        pricetosalesratio,
+        pegratio,
+        debt_equity,
+        interestcover,
+        roe,
+        roce,
+        roa,
+        netprofitmargin_perc,
+        operatingmargin_perc
+    FROM financial_ratios_standalone
+    WHERE co_code = $1
+    ORDER BY yearend ASC
+"""
+
+SHAREHOLDING_QUERY = """
+    SELECT
+        yearandmonth,
+        promoters,
+        dii,
+        fii,
+        public
+    FROM shareholding_pattern
+    WHERE co_code = $1
+    ORDER BY yearandmonth ASC
+"""
+
+LARGE_SHAREHOLDERS_QUERY = f"""
+    SELECT *
+    FROM mt_large_shareholders
+    WHERE co_code = $1
+    ORDER BY "PortfolioValueInCr" DESC NULLS LAST
+    LIMIT {LIMIT_LARGE_SHAREHOLDERS}
+"""
+
+# ✅ Consolidated + Standalone "Total Revenue" & "Profit After Tax"
+FINANCIAL_SUBSET_QUERY = """
+    SELECT year, section, value
+    FROM {table}
+    WHERE co_code = $1 AND section IN ('Total Revenue', 'Profit After Tax')
+    ORDER BY year DESC
+"""
+
+SIMILAR_COMPANIES_QUERY = f"""
+    WITH ranked_scripts AS (
+        SELECT
+            script_id,
+            co_code,
+            companyname,
+            companyshortname,
+            latest_price,
+            changed_percentage,
+            market_cap,
+            exchange,
+            ROW_NUMBER() OVER (
+                PARTITION BY co_code
+                ORDER BY CASE WHEN exchange = 'NSE' THEN 1 ELSE 2 END
+            ) AS row_rank
+        FROM script_master
+        WHERE sector = $1 AND market_cap IS NOT NULL AND market_cap > 0 AND co_code != $2
+    )
+    SELECT *
+    FROM ranked_scripts
+    WHERE row_rank = 1
+    ORDER BY ABS(market_cap - $3)
+    LIMIT {LIMIT_SIMILAR_COMPANIES}
+"""
+
+def similar_companies_from_snapshot(snapshot, sector, co_code, market_cap) -> list[dict]:
+    """Same sector, closest market cap, one script per company (NSE preferred)."""
+    if sector is None:
+        return []
+    cap = snapshot["market_cap"]
+    with np.errstate(invalid="ignore"):
+        mask = snapshot.category_mask("sector", sector) & (cap > 0) & (snapshot["co_code"] != co_code)
+    indices = snapshot.distinct_co_code(np.flatnonzero(mask))
+    distance = np.abs(cap - float(market_cap)) if market_cap is not None else np.zeros(snapshot.size)
+    nearest = snapshot.top_k(indices, distance, LIMIT_SIMILAR_COMPANIES, descending=False)
+    return snapshot.records(nearest, SIMILAR_COMPANY_FIELDS)
+
+async def fetch_section(query: str, values: tuple):
+    """Runs one independent read on its own pooled connection so sections can run concurrently."""
+    async with acquire_connection() as conn:
+        return await fetch_all(query, values, conn)
+
+def structure_financial_data(rows):
+    result = {}
+    for row in rows:
+        y = row["year"]
+        sec = row["section"]
+        val = float(row["value"]) if row["value"] is not None else None
+        if y not in result:
+            result[y] = {}
+        result[y][sec] = val
+    return result
+
+async def load_live_fields(script_id: int, snapshot) -> dict | None:
+    """Identity and price fields, from the snapshot when it has the script, else script_master."""
+    if snapshot is not None and script_id in snapshot.position:
+        return snapshot.records([snapshot.position[script_id]], LIVE_FIELDS)[0]
+    async with acquire_connection() as conn:
+        row = await fetch_one(LIVE_QUERY, (script_id,), conn)
+    return dict(row) if row else None
+
+async def load_static_sections(co_code, timer: SectionTimer) -> dict:
+    """The sections that only depend on co_code; cached in stock_details_cache."""
+    # Independent reads run concurrently; latency is the slowest one instead of the sum
+    analysis_rows, financials, shareholding, raw_large_shareholders, consolidated_rows, standalone_rows = \
+        await asyncio.gather(
+            timer.run("analysis", fetch_section(ANALYSIS_QUERY, (co_code,))),
+            timer.run("financials", fetch_section(FINANCIAL_RATIOS_QUERY, (co_code,))),
+            timer.run("shareholding", fetch_section(SHAREHOLDING_QUERY, (co_code,))),
+            timer.run("large_shareholders", fetch_section(LARGE_SHAREHOLDERS_QUERY, (co_code,))),
+            timer.run("consolidated", fetch_section(FINANCIAL_SUBSET_QUERY.format(table="financial_data_consolidated"), (co_code,))),
+            timer.run("standalone", fetch_section(FINANCIAL_SUBSET_QUERY.format(table="financial_data_standalone"), (co_code,))),
+        )
+
+    # monk_ai_analysis is spliced into the response as raw JSON, never decoded
+    try:
+        monk_analysis = raw_json(analysis_rows[0]["analysis_json"]) if analysis_rows else None
+    except Exception:
+        monk_analysis = None
+
+    large_shareholders = [
+        {k: v for k, v in dict(row).items() if k not in ("co_code", "Shares")}
+        for row in raw_large_shareholders
+    ]
+
+    # Serialized once per cache fill; hits only copy bytes
+    return {
+        "monk_ai_analysis": monk_analysis,
+        "financials": json_fragment([dict(row) for row in financials]),
+        "shareholding_pattern": json_fragment([dict(row) for row in shareholding]),
+        "large_shareholders": json_fragment(large_shareholders),
+        "financial_data": json_fragment({
+            "consolidated": structure_financial_data(consolidated_rows),
+            "standalone": structure_financial_data(standalone_rows)
+        }),
+    }
 
 @router.get("/get_stock_details")
 async def get_stock_details(
+    request: Request,
     script_id: int = Query(..., description="Script ID"),
     user=Depends(authorize_user)
 ):
-    conn = await get_single_connection()
+    # No request-wide connection: each section borrows its own, so a request never holds
+    # one connection while waiting for another (which could starve the pool under load)
+    timer = SectionTimer()
     try:
-        # Fetch main script and analysis
-        meta_query = """
-            SELECT
-                sm.script_id,
-                sm.co_code,
-                sm.companyname,
-                sm.companyshortname,
-                sm.sector,
-                sm.company_size,
-                sm.latest_price,
-                sm.changed_percentage,
-                sm.price_difference,
-                sm.market_cap,
-                oaa.analysis_json
-            FROM script_master sm
-            LEFT JOIN mt_openai_analysis oaa ON sm.co_code = oaa.co_code
-            WHERE sm.script_id = $1
-        """
-        meta = await fetch_one(meta_query, (script_id,), conn)
-        if not meta:
+        snapshot = get_snapshot()
+        live = await timer.run("live", load_live_fields(script_id, snapshot))
+        if not live:
             raise HTTPException(status_code=404, detail="Script not found")
 
-        co_code = meta["co_code"]
-
-        # ✅ Add to recently viewed
-        try:
-            user_id = user["user_id"]
-            now = utc_now()
-
-            await execute_write("""
-                DELETE FROM mt_recently_viewed_scripts
-                WHERE user_id = $1 AND script_id = $2
-            """, (user_id, script_id), conn)
-
-            await execute_write("""
-                INSERT INTO mt_recently_viewed_scripts (user_id, script_id, viewed_at)
-                VALUES ($1, $2, $3)
-            """, (user_id, script_id, now), conn)
-
-            config_row = await fetch_one("SELECT recently_viewed_count FROM mt_config LIMIT 1", (), conn)
-            max_count = config_row["recently_viewed_count"] or 20
-
-            await execute_write(f"""
-                DELETE FROM mt_recently_viewed_scripts
-                WHERE id NOT IN (
-                    SELECT id FROM mt_recently_viewed_scripts
-                    WHERE user_id = $1
-                    ORDER BY viewed_at DESC
-                    LIMIT {max_count}
-                )
-                AND user_id = $1
-            """, (user_id,), conn)
-        except Exception as log_e:
-            await notify_internal(f"[Recently Viewed Error] {str(log_e)}")
-
-        # Safely decode monk_ai_analysis
-        try:
-            monk_analysis = meta["analysis_json"]
-            if isinstance(monk_analysis, str):
-                monk_analysis = json.loads(monk_analysis)
-                if isinstance(monk_analysis, str):
-                    monk_analysis = json.loads(monk_analysis)
-        except Exception:
-            monk_analysis = None
-
-        # Financial ratios
-        fr_query = """
-            SELECT
-                yearend,
-                pe,
-                pbv,
-                pricetosalesratio,
-                pegratio,
-                debt_equity,
-                interestcover,
-                roe,
-                roce,
-                roa,
-                netprofitmargin_perc,
-                operatingmargin_perc
-            FROM financial_ratios_standalone
-            WHERE co_code = $1
-            ORDER BY yearend ASC
-        """
-        financials = await fetch_all(fr_query, (co_code,), conn)
-
-        # Shareholding pattern
-        shp_query = """
-            SELECT
-                yearandmonth,
-                promoters,
-                dii,
-                fii,
-                public
-            FROM shareholding_pattern
-            WHERE co_code = $1
-            ORDER BY yearandmonth ASC
-        """
-        shareholding = await fetch_all(shp_query, (co_code,), conn)
-
-        # Top large shareholders
-        mls_query = f"""
-            SELECT *
-            FROM mt_large_shareholders
-            WHERE co_code = $1
-            ORDER BY "PortfolioValueInCr" DESC NULLS LAST
-            LIMIT {LIMIT_LARGE_SHAREHOLDERS}
-        """
-        raw_large_shareholders = await fetch_all(mls_query, (co_code,), conn)
-        large_shareholders = [
-            {k: v for k, v in dict(row).items() if k not in ("co_code", "Shares")}
-            for row in raw_large_shareholders
-        ]
-
-        # ✅ Consolidated + Standalone "Total Revenue" & "Profit After Tax"
-        def fetch_financial_subset(table: str):
-            query = f"""
-                SELECT year, section, value
-                FROM {table}
-                WHERE co_code = $1 AND section IN ('Total Revenue', 'Profit After Tax')
-                ORDER BY year DESC
-            """
-            return fetch_all(query, (co_code,), conn)
-
-        def structure_financial_data(rows):
-            result = {}
-            for row in rows:
-                y = row["year"]
-                sec = row["section"]
-                val = float(row["value"]) if row["value"] is not None else None
-                if y not in result:
-                    result[y] = {}
-                result[y][sec] = val
-            return result
-
-        consolidated_rows = await fetch_financial_subset("financial_data_consolidated")
-        standalone_rows = await fetch_financial_subset("financial_data_standalone")
-
-        consolidated_data = structure_financial_data(consolidated_rows)
-        standalone_data = structure_financial_data(standalone_rows)
+        co_code = live["co_code"]
+
+        # ✅ Add to recently viewed (buffered; flushed to Postgres in batches)
+        config = await get_config()
+        record_view(user["user_id"], script_id, config.recently_viewed_count)
+
+        # Slow-changing sections come from the per-company cache (stale-while-revalidate)
+        static_sections = timer.run(
+            "static_sections", stock_details_cache.get(co_code, lambda: load_static_sections(co_code, timer))
+        )
 
         # ✅ Similar companies (exclude same co_code, include exchange)
-        similar_companies_sql = """
-            WITH ranked_scripts AS (
-                SELECT
-                    script_id,
-                    co_code,
-                    companyname,
-                    companyshortname,
-                    latest_price,
-                    changed_percentage,
-                    market_cap,
-                    exchange,
-                    ROW_NUMBER() OVER (
-                        PARTITION BY co_code
-                        ORDER BY CASE WHEN exchange = 'NSE' THEN 1 ELSE 2 END
-                    ) AS row_rank
-                FROM script_master
-                WHERE sector = $1 AND market_cap IS NOT NULL AND market_cap > 0 AND co_code != $2
+        if snapshot is not None:
+            static, cache_state = await static_sections
+            with timer.measure("similar_companies"):
+                similar_companies_result = similar_companies_from_snapshot(
+                    snapshot, live["sector"], co_code, live["market_cap"]
+                )
+        else:
+            (static, cache_state), similar_companies = await asyncio.gather(
+                static_sections,
+                timer.run("similar_companies", fetch_section(
+                    SIMILAR_COMPANIES_QUERY, (live["sector"], co_code, live["market_cap"])
+                )),
             )
-            SELECT *
-            FROM ranked_scripts
-            WHERE row_rank = 1
-            ORDER BY ABS(market_cap - $3)
-            LIMIT 5
-        """
-
-        similar_companies = await fetch_all(similar_companies_sql, (meta["sector"], meta["co_code"], meta["market_cap"]), conn)
-
-        similar_companies_result = [
-            {
-                "companyname": row["companyname"],
-                "companyshortname": row["companyshortname"],
-                "co_code": row["co_code"],
-                "script_id": row["script_id"],
-                "latest_price": float(row["latest_price"]) if row["latest_price"] is not None else None,
-                "changed_percentage": float(row["changed_percentage"]) if row["changed_percentage"] is not None else None,
-                "exchange": row["exchange"]
-            }
-            for row in similar_companies
-        ]
-
-        return {
-            "script_id": meta["script_id"],
-            "companyname": meta["companyname"],
-            "companyshortname": meta["companyshortname"],
-            "sector": meta["sector"],
-            "company_size": meta["company_size"],
-            "latest_price": float(meta["latest_price"] or 0),
-            "changed_percentage": float(meta["changed_percentage"] or 0),
-            "price_difference": float(meta["price_difference"] or 0),
-            "market_cap": float(meta["market_cap"] or 0),
-            "monk_ai_analysis": monk_analysis,
-            "financials": [dict(row) for row in financials],
-            "shareholding_pattern": [dict(row) for row in shareholding],
-            "large_shareholders": large_shareholders,
-            "financial_data": {
-                "consolidated": consolidated_data,
-                "standalone": standalone_data
-            },
-            "similar_companies": similar_companies_result
-        }
+            similar_companies_result = [
+                {
+                    "companyname": row["companyname"],
+                    "companyshortname": row["companyshortname"],
+                    "co_code": row["co_code"],
+                    "script_id": row["script_id"],
+                    "latest_price": float(row["latest_price"]) if row["latest_price"] is not None else None,
+                    "changed_percentage": float(row["changed_percentage"]) if row["changed_percentage"] is not None else None,
+                    "exchange": row["exchange"]
+                }
+                for row in similar_companies
+            ]
+
+        timer.note("cache", cache_state)
+        # Returned as a response object so the fragments bypass jsonable_encoder
+        return timer.attach(request, CustomJSONResponse({
+            "script_id": live["script_id"],
+            "companyname": live["companyname"],
+            "companyshortname": live["companyshortname"],
+            "sector": live["sector"],
+            "company_size": live["company_size"],
+            "latest_price": float(live["latest_price"] or 0),
+            "changed_percentage": float(live["changed_percentage"] or 0),
+            "price_difference": float(live["price_difference"] or 0),
+            "market_cap": float(live["market_cap"] or 0),
+            "monk_ai_analysis": static["monk_ai_analysis"],
+            "financials": static["financials"],
+            "shareholding_pattern": static["shareholding_pattern"],
+            "large_shareholders": static["large_shareholders"],
+            "financial_data": static["financial_data"],
+            "similar_companies": similar_companies_result,
+            "snapshot": snapshot.meta() if snapshot is not None else None
+        }))
 
+    except HTTPException:
+        raise
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=503, detail="Database is busy, please retry")
     except Exception as e:
-        await notify_internal(f"[Get Stock Details Error] {e}")
+        report_error("Get Stock Details Error", e)
         raise HTTPException(status_code=500, detail="Internal server error")
-    finally:
-        await conn.close()
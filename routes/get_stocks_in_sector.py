@@ -1,14 +1,21 @@
 from fastapi import APIRouter, Request, Depends, HTTPException, Query
 from utils.auth import authorize_user
-from db.connection import get_single_connection
+from db.connection import request_connection
 from db.db_helpers import fetch_all
-from utils.telegram_notifier import notify_internal
+from utils.error_aggregator import report_error
+from utils.script_snapshot import get_snapshot
 from decimal import Decimal
+import numpy as np
 
 router = APIRouter()
 
 ALLOWED_SORT_FIELDS = {"companyname", "latest_price"}
 
+SECTOR_STOCK_FIELDS = (
+    "script_id", "co_code", "companyname", "companyshortname",
+    "latest_price", "changed_percentage", "exchange", "company_size"
+)
+
 def serialize_row(row):
     return {
         k: float(v) if isinstance(v, Decimal) else v
@@ -25,10 +32,25 @@ async def get_stocks_in_sector(
     company_size: str = Query(None, description="Optional filter: Small Cap, Mid Cap, Large Cap"),
     exchange: str = Query(None, description="Optional filter: NSE or BSE")
 ):
-    conn = await get_single_connection()
     try:
         padded_sectorcode = str(sectorcode).zfill(8)
 
+        snapshot = get_snapshot()
+        if snapshot is not None:
+            price = snapshot["latest_price"]
+            mask = (snapshot["sectorcode"] == padded_sectorcode) & snapshot.not_null("latest_price")
+            with np.errstate(invalid="ignore"):
+                mask &= price > 0
+            if company_size:
+                mask &= snapshot.category_mask("company_size", company_size)
+            if exchange:
+                mask &= snapshot.category_mask("exchange", exchange)
+
+            indices = snapshot.distinct_co_code(np.flatnonzero(mask))
+            key = snapshot["companyname_lower"] if sort_by == "companyname" else price
+            indices = snapshot.order(indices, key, descending=sort_order == "desc")
+            return {"data": snapshot.records(indices, SECTOR_STOCK_FIELDS), "snapshot": snapshot.meta()}
+
         filters = ["sectorcode = $1", "latest_price IS NOT NULL", "latest_price > 0"]
         values = [padded_sectorcode]
         param_index = 2
@@ -63,11 +85,13 @@ async def get_stocks_in_sector(
             ORDER BY {sort_by} {sort_order.upper()}
         """
 
-        rows = await fetch_all(query, tuple(values), conn)
+        # Only this fallback (no snapshot loaded yet) takes a pooled connection
+        async with request_connection() as conn:
+            rows = await fetch_all(query, tuple(values), conn)
         results = [serialize_row(row) for row in rows]
-        return {"data": results}
+        return {"data": results, "snapshot": None}
+    except HTTPException:
+        raise
     except Exception as e:
-        await notify_internal(f"[get_stocks_in_sector Error] {e}")
+        report_error("get_stocks_in_sector Error", e)
         raise HTTPException(status_code=500, detail="Internal Server Error")
-    finally:
-        await conn.close()
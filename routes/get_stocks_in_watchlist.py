@@ -1,23 +1,90 @@
 from fastapi import APIRouter, Request, Depends, HTTPException, Query
-from db.connection import get_single_connection
-from db.db_helpers import fetch_all, fetch_one
+from db.connection import get_db
+from db.statements import register_statement, fetch_all_statement, fetch_one_statement
 from utils.auth import authorize_user
-from utils.telegram_notifier import notify_internal
+from utils.error_aggregator import report_error
+from utils.page_cursor import encode_cursor, decode_cursor
+from datetime import datetime
 from decimal import Decimal
 import math
 
 router = APIRouter()
 
+# sort_by -> sort key. NULLs are coalesced so (sort key, w.id) is a total order that keyset
+# cursors can resume from.
 VALID_SORT_COLUMNS = {
     "added_date": "w.added_date",
-    "latest_price": "w.added_price",
-    "sector": "sm.sectorname",
-    "company_size": "sm.company_size",
-    "companyname": "sm.companyname",
-    "changed_percentage": "sm.changed_percentage",
-    "price_difference": "sm.price_difference"
+    "latest_price": "COALESCE(w.added_price, 0)",
+    "sector": "COALESCE(sm.sectorname, '')",
+    "company_size": "COALESCE(sm.company_size, '')",
+    "companyname": "COALESCE(sm.companyname, '')",
+    "changed_percentage": "COALESCE(sm.changed_percentage, 0)",
+    "price_difference": "COALESCE(sm.price_difference, 0)"
 }
 
+# Python types a cursor's sort key may have per sort_by; anything else would fail to bind as $5
+SORT_KEY_TYPES = {
+    "added_date": (datetime,),
+    "latest_price": (Decimal, int, float),
+    "sector": (str,),
+    "company_size": (str,),
+    "companyname": (str,),
+    "changed_percentage": (Decimal, int, float),
+    "price_difference": (Decimal, int, float)
+}
+
+# Filters are case-insensitive and skipped when NULL: $2 sector, $3 company size
+FILTER_SQL = """
+    WHERE w.watchlist_id = $1
+      AND ($2::text IS NULL OR sm.sectorname ILIKE $2)
+      AND ($3::text IS NULL OR sm.company_size ILIKE $3)
+"""
+
+register_statement(
+    "get_stocks_in_watchlist.owner",
+    "SELECT id, stock_count FROM mt_watchlists WHERE id = $1 AND user_id = $2"
+)
+
+# Only needed with a filter; otherwise mt_watchlists.stock_count is the total
+register_statement("get_stocks_in_watchlist.count", f"""
+    SELECT COUNT(*) FROM mt_watchlist_stocks w
+    JOIN script_master sm ON w.script_id = sm.script_id
+    {FILTER_SQL}
+""")
+
+# Per sort variant: "page" ($4 limit (NULL = all), $5 offset) and "after" (keyset: rows after
+# the cursor's ($5 sort key, $6 id), $4 limit)
+for _sort_by, _sort_key in VALID_SORT_COLUMNS.items():
+    for _sort_direction, _after in (("ASC", ">"), ("DESC", "<")):
+        _select_sql = f"""
+            SELECT 
+                w.script_id,
+                w.added_price,
+                w.added_date,
+                COALESCE(sm.companyname, '') AS companyname,
+                COALESCE(sm.companyshortname, '') AS companyshortname,
+                COALESCE(sm.exchange, '') AS exchange,
+                COALESCE(sm.changed_percentage, 0.0) AS changed_percentage,
+                COALESCE(sm.price_difference, 0.0) AS price_difference,
+                COALESCE(sm.sectorcode, '') AS sectorcode,
+                COALESCE(sm.sector, '') AS sector,
+                COALESCE(sm.company_size, '') AS company_size,
+                {_sort_key} AS sort_key,
+                w.id AS row_id
+            FROM mt_watchlist_stocks w
+            JOIN script_master sm ON w.script_id = sm.script_id
+            {FILTER_SQL}
+        """
+        _order_sql = f"ORDER BY {_sort_key} {_sort_direction}, w.id {_sort_direction}"
+        register_statement(
+            f"get_stocks_in_watchlist.page.{_sort_by}.{_sort_direction}",
+            f"{_select_sql} {_order_sql} LIMIT $4 OFFSET $5"
+        )
+        register_statement(
+            f"get_stocks_in_watchlist.after.{_sort_by}.{_sort_direction}",
+            f"{_select_sql} AND ({_sort_key}, w.id) {_after} ($5, $6) {_order_sql} LIMIT $4"
+        )
+
 @router.get("/get_stocks_in_watchlist")
 async def get_stocks_in_watchlist(
     watchlist_id: int = Query(..., description="Watchlist ID"),
@@ -31,83 +98,73 @@ async def get_stocks_in_watchlist(
     ),
     sort_order: str = Query("desc", pattern="^(asc|desc)$"),
     sector: str | None = Query(None),
-    company_size: str | None = Query(None)
+    company_size: str | None = Query(None),
+    cursor: str | None = Query(None, description="next_cursor of the previous page; replaces page"),
+    conn=Depends(get_db)
 ):
     user_id = user_data["user_id"]
-    sort_column = VALID_SORT_COLUMNS.get(sort_by, "w.added_date")
     sort_direction = "ASC" if sort_order == "asc" else "DESC"
+    sector_filter = sector or None
+    company_size_filter = company_size or None
     offset = (page - 1) * limit if limit else 0
 
-    conn = await get_single_connection()
+
+    if cursor is not None:
+        if not limit:
+            raise HTTPException(status_code=400, detail="cursor requires limit")
+        try:
+            cursor_sort_by, cursor_direction, cursor_key, cursor_id = decode_cursor(cursor)
+        except (ValueError, TypeError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        if (cursor_sort_by, cursor_direction) != (sort_by, sort_direction):
+            raise HTTPException(status_code=400, detail="cursor does not match sort_by / sort_order")
+        if not isinstance(cursor_id, int) or isinstance(cursor_id, bool) or isinstance(cursor_key, bool) \
+                or not isinstance(cursor_key, SORT_KEY_TYPES[sort_by]):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
 
     try:
         # Step 1: Verify ownership
-        ownership = await fetch_one(
-            "SELECT id FROM mt_watchlists WHERE id = $1 AND user_id = $2",
-            (watchlist_id, user_id),
-            conn
-        )
+        ownership = await fetch_one_statement("get_stocks_in_watchlist.owner", (watchlist_id, user_id), conn)
         if not ownership:
             raise HTTPException(status_code=404, detail="The specified watchlist does not exist.")
 
-        # Step 2: Build filter clause (case-insensitive)
-        filter_clause = []
-        params = [watchlist_id]
-
-        if sector:
-            filter_clause.append("sm.sectorname ILIKE ${}".format(len(params) + 1))
-            params.append(sector)
-
-        if company_size:
-            filter_clause.append("sm.company_size ILIKE ${}".format(len(params) + 1))
-            params.append(company_size)
-
-        where_sql = " AND " + " AND ".join(filter_clause) if filter_clause else ""
-
-        # Step 3: Count query
-        count_sql = f"""
-            SELECT COUNT(*) FROM mt_watchlist_stocks w
-            JOIN script_master sm ON w.script_id = sm.script_id
-            WHERE w.watchlist_id = $1 {where_sql}
-        """
-        count_row = await fetch_one(count_sql, tuple(params), conn)
-        total_stocks = count_row["count"] if count_row else 0
-
-        # Step 4: Select query
-        select_sql = f"""
-            SELECT 
-                w.script_id,
-                w.added_price,
-                w.added_date,
-                COALESCE(sm.companyname, '') AS companyname,
-                COALESCE(sm.companyshortname, '') AS companyshortname,
-                COALESCE(sm.exchange, '') AS exchange,
-                COALESCE(sm.changed_percentage, 0.0) AS changed_percentage,
-                COALESCE(sm.price_difference, 0.0) AS price_difference,
-                COALESCE(sm.sectorcode, '') AS sectorcode,
-                COALESCE(sm.sector, '') AS sector,
-                COALESCE(sm.company_size, '') AS company_size
-            FROM mt_watchlist_stocks w
-            JOIN script_master sm ON w.script_id = sm.script_id
-            WHERE w.watchlist_id = $1 {where_sql}
-            ORDER BY {sort_column} {sort_direction}
-        """
-
-        if limit:
-            select_sql += " LIMIT ${} OFFSET ${}".format(len(params) + 1, len(params) + 2)
-            params += [limit, offset]
-
-        rows = await fetch_all(select_sql, tuple(params), conn)
+        # Step 2: Total (maintained count unless filtered)
+        if sector_filter or company_size_filter:
+            count_row = await fetch_one_statement(
+                "get_stocks_in_watchlist.count", (watchlist_id, sector_filter, company_size_filter), conn
+            )
+            total_stocks = count_row["count"] if count_row else 0
+        else:
+            total_stocks = ownership["stock_count"]
+
+        # Step 3: Select query; one extra row tells whether there is a next page
+        if cursor is not None:
+            rows = await fetch_all_statement(
+                f"get_stocks_in_watchlist.after.{sort_by}.{sort_direction}",
+                (watchlist_id, sector_filter, company_size_filter, limit + 1, cursor_key, cursor_id),
+                conn
+            )
+        else:
+            rows = await fetch_all_statement(
+                f"get_stocks_in_watchlist.page.{sort_by}.{sort_direction}",
+                (watchlist_id, sector_filter, company_size_filter, limit + 1 if limit else None, offset),
+                conn
+            )
+
+        has_next_page = bool(limit) and len(rows) > limit
+        if has_next_page:
+            rows = rows[:limit]
 
         def normalize(row):
             return {
                 k: float(v) if isinstance(v, Decimal) else v
                 for k, v in dict(row).items()
+                if k not in ("sort_key", "row_id")
             }
 
         stocks = [normalize(row) for row in rows]
 
-        # Step 5: Build response
+        # Step 4: Build response
         meta = {
             "watchlist_id": watchlist_id,
             "total_stocks": total_stocks,
@@ -119,21 +176,25 @@ async def get_stocks_in_watchlist(
         }
 
         if limit:
-            total_pages = math.ceil(total_stocks / limit) if total_stocks > 0 else 1
+            last = rows[-1] if rows else None
             meta.update({
-                "page": page,
                 "limit": limit,
-                "total_pages": total_pages,
-                "has_next_page": page < total_pages,
-                "has_prev_page": page > 1
+                "has_next_page": has_next_page,
+                "next_cursor": encode_cursor([sort_by, sort_direction, last["sort_key"], last["row_id"]])
+                if has_next_page else None
             })
+            if cursor is None:
+                total_pages = math.ceil(total_stocks / limit) if total_stocks > 0 else 1
+                meta.update({
+                    "page": page,
+                    "total_pages": total_pages,
+                    "has_prev_page": page > 1
+                })
 
         return {"data": meta}
 
     except HTTPException:
         raise
     except Exception as e:
-        await notify_internal(f"[Get Watchlist Stocks Error] {e}")
+        report_error("Get Watchlist Stocks Error", e)
         raise HTTPException(status_code=500, detail="Something went wrong")
-    finally:
-        await conn.close()
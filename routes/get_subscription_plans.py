@@ -1,7 +1,7 @@
-from fastapi import APIRouter, Request, Query
-from db.connection import get_single_connection
+from fastapi import APIRouter, Request, Query, Depends
+from db.connection import get_db
 from db.db_helpers import fetch_all
-from utils.telegram_notifier import notify_internal
+from utils.error_aggregator import report_error
 from decimal import Decimal
 
 router = APIRouter()
@@ -10,9 +10,8 @@ def convert_decimal_to_float(row: dict) -> dict:
     return {k: float(v) if isinstance(v, Decimal) else v for k, v in row.items()}
 
 @router.get("/get_subscription_plans")
-async def get_subscription_plans(request: Request, device_type: str = Query(...)):
+async def get_subscription_plans(request: Request, device_type: str = Query(...), conn=Depends(get_db)):
     try:
-        conn = await get_single_connection()
         query = """
             SELECT 
                 id, plan_name, duration_days, original_price, discount_percent,
@@ -27,6 +26,6 @@ async def get_subscription_plans(request: Request, device_type: str = Query(...)
         processed = [convert_decimal_to_float(dict(r)) for r in rows]
         return {"plans": processed}
     except Exception as e:
-        await notify_internal(f"[Subscription Plans Error] {str(e)}")
+        report_error("Subscription Plans Error", e)
         raise HTTPException(status_code=500, detail="Failed to fetch subscription plans")
 
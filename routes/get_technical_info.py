@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from utils.auth import authorize_user
 from db.connection import get_db
 from db.db_helpers import fetch_all
-from utils.telegram_notifier import notify_internal
+from utils.error_aggregator import report_error
 
 router = APIRouter()
 
@@ -17,5 +17,5 @@ async def get_technical_info(user=Depends(authorize_user), conn=Depends(get_db))
         rows = await fetch_all(query, (), conn)
         return {"technical_info": [dict(row) for row in rows]}
     except Exception as e:
-        await notify_internal(f"[Get Technical Info Error] {e}")
+        report_error("Get Technical Info Error", e)
         raise HTTPException(status_code=500, detail="Failed to fetch technical info.")
@@ -1,29 +1,30 @@
 from fastapi import APIRouter, HTTPException, Depends, Query
 from utils.auth import authorize_user
-from db.connection import get_single_connection
+from db.connection import get_db
 from db.db_helpers import fetch_one
-from utils.telegram_notifier import notify_internal
-import json
+from utils.error_aggregator import report_error
+from utils.custom_response import CustomJSONResponse, raw_json
 
 router = APIRouter()
 
 @router.get("/get_technicals")
 async def get_technicals(
     script_id: int = Query(..., description="Script ID to fetch technicals"),
-    user=Depends(authorize_user)
+    user=Depends(authorize_user),
+    conn=Depends(get_db)
 ):
     query = "SELECT * FROM mt_script_technical_snapshot WHERE script_id = $1"
 
-    conn = await get_single_connection()
     try:
         row = await fetch_one(query, (script_id,), conn)
         if not row:
             raise HTTPException(status_code=404, detail="Script ID not found")
 
+        # Spliced into the response as raw JSON instead of being decoded and re-encoded
         try:
-            parsed_json = json.loads(row["result_json"]) if isinstance(row["result_json"], str) else row["result_json"]
+            result_json = raw_json(row["result_json"])
         except Exception as e:
-            await notify_internal(f"[Parse Error] script_id={script_id} | {e}")
+            report_error("Get Technicals Parse Error", e)
             raise HTTPException(status_code=500, detail="Invalid result_json format")
 
         response = {
@@ -31,13 +32,13 @@ async def get_technicals(
             "alltime_low": float(row["alltime_low"]) if row["alltime_low"] is not None else None,
             "high_52_week": float(row["high_52_week"]) if row["high_52_week"] is not None else None,
             "low_52_week": float(row["low_52_week"]) if row["low_52_week"] is not None else None,
-            "result_json": parsed_json
+            "result_json": result_json
         }
 
-        return {"technicals": response}
+        return CustomJSONResponse({"technicals": response})
 
+    except HTTPException:
+        raise
     except Exception as e:
-        await notify_internal(f"[Get Technicals Error] script_id={script_id} | {e}")
-        raise HTTPException(status_code=500, detail="Internal server error")
-    finally:
-        await conn.close()
\ No newline at end of file
+        report_error("Get Technicals Error", e)
+        raise HTTPException(status_code=500, detail="Internal server error")
\ No newline at end of file
@@ -1,12 +1,27 @@
 from fastapi import APIRouter, Request, Depends, HTTPException, Query
-from db.connection import get_single_connection
-from db.db_helpers import fetch_all
+from db.connection import request_connection
+from db.statements import register_statement, fetch_all_statement
 from utils.auth import authorize_user
-from utils.telegram_notifier import notify_internal
+from utils.error_aggregator import report_error
+from utils.single_flight import single_flight
 
 router = APIRouter()
 
+register_statement("get_top_scanners.page", """
+    SELECT s.*, top.bookmark_count
+    FROM mt_scanners s
+    JOIN (
+        SELECT "scannerID", COUNT(*) AS bookmark_count
+        FROM mt_bookmarked_scanners
+        GROUP BY "scannerID"
+        ORDER BY bookmark_count DESC
+        LIMIT $1 OFFSET $2
+    ) top ON s."scannerID" = top."scannerID"
+    ORDER BY top.bookmark_count DESC
+""")
+
 @router.get("/get_top_scanners")
+@single_flight()
 async def get_top_scanners(
     request: Request,
     limit: int = Query(10, ge=1, le=100),
@@ -14,27 +29,14 @@ async def get_top_scanners(
     user_data=Depends(authorize_user)
 ):
     try:
-        conn = await get_single_connection()
-
-        query = f"""
-            SELECT s.*, top.bookmark_count
-            FROM mt_scanners s
-            JOIN (
-                SELECT "scannerID", COUNT(*) AS bookmark_count
-                FROM mt_bookmarked_scanners
-                GROUP BY "scannerID"
-                ORDER BY bookmark_count DESC
-                LIMIT {limit} OFFSET {offset}
-            ) top ON s."scannerID" = top."scannerID"
-            ORDER BY top.bookmark_count DESC
-        """
-
-        records = await fetch_all(query, (), conn)
-        await conn.close()
+        async with request_connection() as conn:
+            records = await fetch_all_statement("get_top_scanners.page", (limit, offset), conn)
 
         top_scanners = [dict(row) for row in records]
         return {"top_scanners": top_scanners}
 
+    except HTTPException:
+        raise
     except Exception as e:
-        await notify_internal(f"[Get Top Scanners Error] {e}")
+        report_error("Get Top Scanners Error", e)
         raise HTTPException(status_code=500, detail="Failed to fetch top scanners")
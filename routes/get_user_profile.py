@@ -1,8 +1,8 @@
 from fastapi import APIRouter, Depends, Request, HTTPException, Query
-from db.connection import get_single_connection
+from db.connection import get_db
 from db.db_helpers import fetch_one
 from utils.auth import authorize_user
-from utils.telegram_notifier import notify_internal
+from utils.error_aggregator import report_error
 
 router = APIRouter()
 
@@ -10,11 +10,10 @@ router = APIRouter()
 async def get_user_profile(
     user_id: int = Query(..., description="User ID to fetch profile"),
     request: Request = None,
-    payload: dict = Depends(authorize_user)
+    payload: dict = Depends(authorize_user),
+    conn=Depends(get_db)
 ):
     try:
-        conn = await get_single_connection()
-
         # Fetch user details
         user_query = """
             SELECT email, phone_number, first_name, last_name, is_blocked
@@ -35,8 +34,6 @@ async def get_user_profile(
         """
         subscription = await fetch_one(sub_query, (user_id,), conn)
 
-        await conn.close()
-
         return {
             "email": user["email"],
             "phone_number": user["phone_number"],
@@ -51,5 +48,5 @@ async def get_user_profile(
     except HTTPException:
         raise
     except Exception as e:
-        await notify_internal(f"[get_user_profile Error] {e}")
+        report_error("get_user_profile Error", e)
         raise HTTPException(status_code=500, detail="Internal server error")
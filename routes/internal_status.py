@@ -0,0 +1,82 @@
+from fastapi import APIRouter, Body, Depends, Query
+from utils.auth import authorize_internal, token_cache_stats
+from utils.app_config import config_stats
+from utils.script_snapshot import snapshot_stats
+from utils.market_leaderboards import leaderboard_stats
+from utils.search_index import search_index_stats
+from utils.recently_viewed_buffer import recently_viewed_buffer_stats
+from utils.stock_details_cache import stock_details_cache_stats, invalidate_stock_details
+from utils.single_flight import single_flight_stats
+from utils.telegram_notifier import telegram_stats
+from utils.error_aggregator import error_aggregator_stats, error_aggregates
+from utils.razorpay_client import razorpay_stats
+from utils.auth_providers import provider_keys_stats
+from utils.user_blocklist import blocklist_stats
+from utils.token_revocations import token_revocation_stats
+from db.statements import statement_stats
+from utils.price_hub import price_hub_stats
+from utils.price_stream import price_stream_stats
+from utils.price_alerts import price_alert_stats
+from utils.alert_notifier import alert_notifier_stats
+from utils.query_profiler import query_profiler_stats, query_profile, update_settings, reset_query_profile
+
+router = APIRouter()
+
+@router.get("/internal/status", include_in_schema=False)
+async def internal_status(_=Depends(authorize_internal)):
+    return {
+        "config": config_stats(),
+        "script_snapshot": snapshot_stats(),
+        "market_leaderboards": leaderboard_stats(),
+        "search_index": search_index_stats(),
+        "recently_viewed_buffer": recently_viewed_buffer_stats(),
+        "stock_details_cache": stock_details_cache_stats(),
+        "single_flight": single_flight_stats(),
+        "telegram": telegram_stats(),
+        "errors": error_aggregator_stats(),
+        "razorpay": razorpay_stats(),
+        "provider_keys": provider_keys_stats(),
+        "auth_token_cache": token_cache_stats(),
+        "blocklist": blocklist_stats(),
+        "token_revocations": token_revocation_stats(),
+        "query_profiler": query_profiler_stats(),
+        "prepared_statements": statement_stats(),
+        "price_hub": price_hub_stats(),
+        "price_stream": price_stream_stats(),
+        "price_alerts": {**price_alert_stats(), "notifier": alert_notifier_stats()},
+    }
+
+@router.post("/internal/stock_details_cache/invalidate", include_in_schema=False)
+async def invalidate_stock_details_cache(
+    co_code: int = Query(None, description="Omit to drop every cached company"),
+    _=Depends(authorize_internal)
+):
+    return {"co_code": co_code, "invalidated": invalidate_stock_details(co_code)}
+
+@router.get("/internal/errors", include_in_schema=False)
+async def internal_errors(
+    limit: int = Query(100, ge=1, le=1000, description="Most recently seen fingerprints first"),
+    _=Depends(authorize_internal)
+):
+    return {"stats": error_aggregator_stats(), "errors": error_aggregates(limit)}
+
+@router.get("/internal/queries", include_in_schema=False)
+async def internal_queries(
+    top: int = Query(20, ge=1, le=200),
+    sort: str = Query("total_ms", pattern="^(total_ms|max_ms|calls|rows|errors)$"),
+    _=Depends(authorize_internal)
+):
+    return query_profile(top, sort)
+
+@router.post("/internal/queries/settings", include_in_schema=False)
+async def update_query_profiling(
+    enabled: bool = Body(None),
+    slow_ms: float = Body(None, ge=0),
+    explain: bool = Body(None, description="EXPLAIN ANALYZE read-only statements slower than explain_ms"),
+    explain_ms: float = Body(None, ge=0),
+    reset: bool = Body(False, description="Clear the top-N table and slow log"),
+    _=Depends(authorize_internal)
+):
+    if reset:
+        reset_query_profile()
+    return update_settings(enabled=enabled, slow_ms=slow_ms, explain=explain, explain_ms=explain_ms)
@@ -1,9 +1,10 @@
-from fastapi import APIRouter, Request, HTTPException
+from fastapi import APIRouter, Request, HTTPException, Depends
 from pydantic import BaseModel
 from utils.jwt_utils import decode_jwt_token
-from db.connection import get_single_connection
+from db.connection import get_db
 from utils.datetime_utils import utc_now
-from utils.telegram_notifier import notify_internal
+from utils.error_aggregator import report_error
+from utils.token_revocations import revoke_tokens_before
 
 router = APIRouter()
 
@@ -11,7 +12,7 @@ class LogoutRequest(BaseModel):
     token: str
 
 @router.post("/logout")
-async def logout_user(payload: LogoutRequest, request: Request):
+async def logout_user(payload: LogoutRequest, request: Request, conn=Depends(get_db)):
     try:
         token = payload.token
         decoded = decode_jwt_token(token, expect_type="access")
@@ -21,16 +22,20 @@ async def logout_user(payload: LogoutRequest, request: Request):
         if not user_id or not iat:
             raise HTTPException(status_code=400, detail="Invalid token")
 
-        conn = await get_single_connection()
         now = utc_now()
 
+        # jwt_min_iat revokes every token issued up to and including this second; the trigger from
+        # migration 005 NOTIFYs the other workers, this one is updated right away
         await conn.execute(
-            "UPDATE mt_users SET jwt_exp = $1, updated_at = now() WHERE id = $2",
+            "UPDATE mt_users SET jwt_exp = $1, jwt_min_iat = $1, updated_at = now() WHERE id = $2",
             now, user_id
         )
+        revoke_tokens_before(user_id, int(now.timestamp()))
 
         return {"message": "Logged out successfully"}
 
+    except HTTPException:
+        raise
     except Exception as e:
-        await notify_internal(f"[Logout Error] {str(e)}")
+        report_error("Logout Error", e)
         raise HTTPException(status_code=500, detail="Failed to logout")
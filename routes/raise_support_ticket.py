@@ -2,7 +2,8 @@ from fastapi import APIRouter, Request, Depends, HTTPException
 from pydantic import BaseModel, EmailStr
 from utils.datetime_utils import utc_now
 from utils.auth import authorize_user
-from utils.telegram_notifier import _send_to_telegram, TELEGRAM_CHANNELS, notify_internal
+from utils.telegram_notifier import _send_to_telegram, TELEGRAM_CHANNELS
+from utils.error_aggregator import report_error
 import aiohttp
 import os
 import re
@@ -69,7 +70,7 @@ async def raise_support_ticket(
             ) as resp:
                 if resp.status != 200:
                     error_text = await resp.text()
-                    await notify_internal(f"[Support Ticket Email Error] {resp.status}: {error_text}")
+                    report_error("Support Ticket Email Error", f"SparkPost {resp.status}: {error_text}")
                     raise HTTPException(status_code=500, detail="Failed to send support ticket")
 
         # Properly escaped Telegram message
@@ -92,6 +93,8 @@ async def raise_support_ticket(
 
         return {"message": "Support ticket submitted successfully"}
 
+    except HTTPException:
+        raise
     except Exception as e:
-        await notify_internal(f"[Support Ticket Error] {str(e)}")
+        report_error("Support Ticket Error", e)
         raise HTTPException(status_code=500, detail="Internal Server Error")
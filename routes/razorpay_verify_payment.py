@@ -5,10 +5,11 @@ from datetime import datetime, timedelta, timezone
 import hmac
 import hashlib
 import os
-from db.connection import get_single_connection
+from db.connection import get_db
 from db.db_helpers import fetch_one, execute_write
 from utils.auth import authorize_user
 from utils.telegram_notifier import notify_internal
+from utils.error_aggregator import report_error
 from utils.payment_calculator import calculate_final_price
 
 router = APIRouter()
@@ -27,8 +28,7 @@ def utc_today():
     return datetime.now(timezone.utc).date()
 
 @router.post("/razorpay_verify_payment")
-async def razorpay_verify_payment(payload: VerifyPaymentRequest, user_data: dict = Depends(authorize_user)):
-    conn = await get_single_connection()
+async def razorpay_verify_payment(payload: VerifyPaymentRequest, user_data: dict = Depends(authorize_user), conn=Depends(get_db)):
     try:
         user_id = user_data["user_id"]
 
@@ -122,10 +122,8 @@ async def razorpay_verify_payment(payload: VerifyPaymentRequest, user_data: dict
         return {"amount": result["final_price"]}
 
     except ValueError as ve:
-        await notify_internal(f"[❌ Razorpay Verify Error] {str(ve)}")
+        report_error("Razorpay Verify Error", ve)
         raise HTTPException(status_code=400, detail=str(ve))
     except Exception as e:
-        await notify_internal(f"[❌ Razorpay Verify Error] {str(e)}")
+        report_error("Razorpay Verify Error", e)
         raise HTTPException(status_code=500, detail="Verification failed")
-    finally:
-        await conn.close()
@@ -1,8 +1,8 @@
 from fastapi import APIRouter, Request, Depends, HTTPException, Query
-from db.connection import get_single_connection
+from db.connection import get_db
 from db.db_helpers import fetch_one, execute_write
 from utils.auth import authorize_user
-from utils.telegram_notifier import notify_internal
+from utils.error_aggregator import report_error
 
 router = APIRouter()
 
@@ -10,11 +10,10 @@ router = APIRouter()
 async def remove_scanner_bookmark(
     scanner_id: int = Query(..., description="Scanner ID to remove bookmark"),
     request: Request = None,
-    user_data=Depends(authorize_user)
+    user_data=Depends(authorize_user),
+    conn=Depends(get_db)
 ):
     try:
-        conn = await get_single_connection()
-
         # Check if bookmark exists
         exists_query = """
             SELECT 1 FROM mt_bookmarked_scanners
@@ -23,7 +22,6 @@ async def remove_scanner_bookmark(
         """
         exists = await fetch_one(exists_query, (user_data["user_id"], scanner_id), conn)
         if not exists:
-            await conn.close()
             raise HTTPException(status_code=404, detail="Bookmark not found")
 
         await execute_write(
@@ -35,9 +33,8 @@ async def remove_scanner_bookmark(
             conn
         )
 
-        await conn.close()
         return {"message": "Bookmark removed"}
 
     except Exception as e:
-        await notify_internal(f"[Remove Scanner Bookmark Error] {e}")
+        report_error("Remove Scanner Bookmark Error", e)
         raise HTTPException(status_code=500, detail="Failed to remove bookmark")
@@ -1,8 +1,8 @@
 from fastapi import APIRouter, Request, Depends, HTTPException
 from pydantic import BaseModel, constr
 from utils.auth import authorize_user
-from utils.telegram_notifier import notify_internal
-from db.connection import get_single_connection
+from utils.error_aggregator import report_error
+from db.connection import get_db
 
 router = APIRouter()
 
@@ -11,10 +11,9 @@ class RenameWatchlistRequest(BaseModel):
     new_name: constr(strip_whitespace=True, min_length=1, max_length=255)
 
 @router.post("/rename_watchlist")
-async def rename_watchlist(payload: RenameWatchlistRequest, request: Request, user_data: dict = Depends(authorize_user)):
+async def rename_watchlist(payload: RenameWatchlistRequest, request: Request, user_data: dict = Depends(authorize_user), conn=Depends(get_db)):
     try:
         user_id = user_data["user_id"]
-        conn = await get_single_connection()
 
         # Case-insensitive duplicate name check
         existing = await conn.fetchrow(
@@ -41,5 +40,5 @@ async def rename_watchlist(payload: RenameWatchlistRequest, request: Request, us
     except HTTPException as he:
         raise he
     except Exception as e:
-        await notify_internal(f"[RenameWatchlist Error] {e}")
+        report_error("RenameWatchlist Error", e)
         raise HTTPException(status_code=500, detail="Internal Server Error")
@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Request, Query, Depends, HTTPException
-from db.connection import get_single_connection
+from db.connection import get_db
 from db.db_helpers import fetch_all
 from utils.auth import authorize_user
 
@@ -10,11 +10,10 @@ async def search_investor(
     request: Request,
     investor_name: str = Query(..., min_length=2),
     min_portfolio_value: float = Query(1.0, ge=0),
-    user=Depends(authorize_user)
+    user=Depends(authorize_user),
+    conn=Depends(get_db)
 ):
     try:
-        conn = await get_single_connection()
-
         query = """
             SELECT "Investor", "InvestorType", "PortfolioValueInCr"
             FROM mt_large_shareholders
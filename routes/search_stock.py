@@ -1,11 +1,17 @@
 from fastapi import APIRouter, Request, Depends, HTTPException, Query
-from db.connection import get_single_connection
+from db.connection import request_connection
 from db.db_helpers import fetch_all
 from utils.auth import authorize_user
-from utils.telegram_notifier import notify_internal
+from utils.error_aggregator import report_error
+from utils.search_index import get_search_index
 
 router = APIRouter()
 
+SEARCH_FIELDS = (
+    "script_id", "co_code", "companyname", "companyshortname", "latest_price",
+    "exchange", "sector", "company_size", "changed_percentage"
+)
+
 @router.get("/search_stock")
 async def search_stock(
     request: Request,
@@ -14,7 +20,6 @@ async def search_stock(
     user=Depends(authorize_user)
 ):
     try:
-        conn = await get_single_connection()
         term = search.strip() if search else ""
         term_len = len(term)
 
@@ -26,8 +31,13 @@ async def search_stock(
         """
 
         results = []
+        index = get_search_index()
+        snapshot = index.snapshot if index is not None else None
+
+        if index is not None:
+            results = snapshot.records(index.search(term), SEARCH_FIELDS)
 
-        if not term and not watchlist_id:
+        elif not term and not watchlist_id:
             # Return top 20 stocks by market cap
             query = f"""
                 SELECT
@@ -45,7 +55,7 @@ async def search_stock(
                 ORDER BY market_cap DESC
                 LIMIT 20
             """
-            results = await fetch_all(query, (), conn)
+            values = ()
 
         elif term_len == 1:
             query = f"""
@@ -64,7 +74,7 @@ async def search_stock(
                 ORDER BY companyname, market_cap DESC
                 LIMIT 20
             """
-            results = await fetch_all(query, (), conn)
+            values = ()
 
         else:
             query = f"""
@@ -87,7 +97,12 @@ async def search_stock(
                 ORDER BY market_cap DESC
                 LIMIT 20
             """
-            results = await fetch_all(query, (term,), conn)
+            values = (term,)
+
+        # A connection is only taken when the search index is not loaded yet
+        if index is None:
+            async with request_connection() as conn:
+                results = await fetch_all(query, values, conn)
 
         script_list = [row["script_id"] for row in results]
 
@@ -97,7 +112,8 @@ async def search_stock(
                 SELECT script_id FROM mt_watchlist_stocks
                 WHERE watchlist_id = $1 AND script_id = ANY($2)
             """
-            watchlist_result = await fetch_all(watchlist_query, (watchlist_id, script_list), conn)
+            async with request_connection() as conn:
+                watchlist_result = await fetch_all(watchlist_query, (watchlist_id, script_list), conn)
             watchlist_scripts = {row["script_id"] for row in watchlist_result}
 
         enriched_results = []
@@ -106,8 +122,10 @@ async def search_stock(
             item["watchlist_status"] = item["script_id"] in watchlist_scripts
             enriched_results.append(item)
 
-        return {"stocks": enriched_results}
+        return {"stocks": enriched_results, "snapshot": snapshot.meta() if snapshot is not None else None}
 
+    except HTTPException:
+        raise
     except Exception as e:
-        await notify_internal(f"[Search Stock Error] {e}")
+        report_error("Search Stock Error", e)
         raise HTTPException(status_code=500, detail="Internal Server Error")
@@ -1,12 +1,13 @@
-from fastapi import APIRouter, Request
+from fastapi import APIRouter, Request, Depends, HTTPException
 from pydantic import BaseModel, EmailStr
-from db.connection import get_single_connection
+from db.connection import get_db
 from utils.jwt_utils import create_jwt_token
 from utils.telegram_notifier import notify_internal
+from utils.error_aggregator import report_error
 from utils.auth_providers import verify_google_token, verify_apple_token
 from utils.version_utils import determine_update_type
 from utils.datetime_utils import utc_now, utc_in
-import traceback
+from utils.token_revocations import token_issue_time
 from typing import Optional
 
 router = APIRouter()
@@ -19,9 +20,10 @@ class SocialLoginRequest(BaseModel):
     lastname: Optional[str] = None
     appversion: str
     provider_user_id: str
+    id_token: Optional[str] = None  # provider-signed ID token; verified locally when sent
 
 @router.post("/social_login")
-async def social_login(payload: SocialLoginRequest, request: Request):
+async def social_login(payload: SocialLoginRequest, request: Request, conn=Depends(get_db)):
     try:
         print(f"[LOG] Login Attempt: {payload.dict()}")
 
@@ -29,15 +31,24 @@ async def social_login(payload: SocialLoginRequest, request: Request):
         if platform not in ["google", "apple"]:
             raise HTTPException(status_code=400, detail="Unsupported platform")
 
+        if payload.id_token:
+            verify = verify_google_token if platform == "google" else verify_apple_token
+            try:
+                claims = await verify(payload.id_token)
+            except Exception as ve:
+                print(f"[LOG] {ve}")
+                raise HTTPException(status_code=401, detail="Invalid sign-in token")
+            if claims.get("sub") != payload.provider_user_id:
+                raise HTTPException(status_code=401, detail="Sign-in token does not match this account")
+
         phone_number = payload.phone_number or None
-        conn = await get_single_connection()
         now = utc_now()
         access_exp = utc_in(days=30)
 
         update_type = await determine_update_type(conn, platform, payload.appversion)
 
         select_query = """
-            SELECT id, is_blocked FROM mt_users
+            SELECT id, is_blocked, jwt_min_iat FROM mt_users
             WHERE (email = $1 AND $1 IS NOT NULL)
                OR (provider_user_id = $2 AND provider = $3)
             LIMIT 1
@@ -55,6 +66,8 @@ async def social_login(payload: SocialLoginRequest, request: Request):
                     print(f"[Telegram Notify Failed] {te}")
                     raise HTTPException(status_code=403, detail="User account is blocked. Please contact support.")
 
+            # A logout in this same second would otherwise revoke the new token too
+            now = token_issue_time(user_id, now, result["jwt_min_iat"])
             await conn.execute(
                 "UPDATE mt_users SET jwt_iat = $1, jwt_exp = $2 WHERE id = $3",
                 now, access_exp, user_id
@@ -83,11 +96,11 @@ async def social_login(payload: SocialLoginRequest, request: Request):
                     access_exp
                 )
             except Exception as db_exc:
-                await notify_internal(f"[DB Insert Error] {db_exc}\n{traceback.format_exc()}")
+                report_error("Social Login DB Insert Error", db_exc)
                 raise HTTPException(status_code=500, detail="Failed to create user in database.")
 
             if not row or "id" not in row:
-                await notify_internal("[DB Insert Error] Insert succeeded but no row returned.")
+                report_error("Social Login DB Insert Error", "Insert succeeded but no row returned")
                 raise HTTPException(status_code=500, detail="User creation failed.")                    
 
             user_id = row["id"]
@@ -113,10 +126,8 @@ async def social_login(payload: SocialLoginRequest, request: Request):
             "update_type": update_type
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
-        print("[EXCEPTION CAUGHT] Sending to Telegram...")
-        try:
-            await notify_internal(f"[Login Error] {e}\n{traceback.format_exc()}")
-        except Exception as te:
-            print(f"[Telegram Notify Failed] {te}")
+        report_error("Social Login Error", e)
         raise HTTPException(status_code=500, detail="Something went wrong. Please try again.")
\ No newline at end of file
@@ -0,0 +1,83 @@
+import asyncio
+import os
+from typing import List
+from fastapi import APIRouter, Request, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from db.connection import request_connection
+from db.db_helpers import fetch_all
+from utils.auth import authorize_user
+from utils.error_aggregator import report_error
+from utils.price_stream import has_capacity, subscribe, unsubscribe, current_prices
+
+router = APIRouter()
+
+PRICE_STREAM_HEARTBEAT_SECONDS = float(os.getenv("PRICE_STREAM_HEARTBEAT_SECONDS", "15"))
+
+async def price_events(script_ids: set):
+    # Subscribed here, not in the route, so the finally below always runs for it
+    subscriber = subscribe(script_ids)
+    try:
+        yield b"retry: 5000\nevent: prices\ndata: " + current_prices(script_ids) + b"\n\n"
+        while True:
+            try:
+                await asyncio.wait_for(subscriber.wake.wait(), PRICE_STREAM_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                # Keeps proxies from closing an idle stream
+                yield b": ping\n\n"
+                continue
+            payload = subscriber.take()
+            if payload is not None:
+                # Suspends while the client is slow; updates keep coalescing meanwhile
+                yield b"event: prices\ndata: " + payload + b"\n\n"
+    finally:
+        unsubscribe(subscriber)
+
+@router.get("/stream_watchlist_prices")
+async def stream_watchlist_prices(
+    request: Request,
+    watchlist_ids: List[int] | None = Query(None, description="Omit to stream all of the user's watchlists"),
+    user_data: dict = Depends(authorize_user)
+):
+    """
+    Server-sent events: one "prices" event with the current latest_price / changed_percentage /
+    price_difference of every script in the watchlists, then only changed scripts as they
+    change. Membership is read at connect; reconnect after editing a watchlist.
+    """
+    user_id = user_data["user_id"]
+
+    try:
+        # The connection is released before streaming starts
+        async with request_connection() as conn:
+            rows = await fetch_all(
+                """
+                SELECT w.id, ws.script_id
+                FROM mt_watchlists w
+                LEFT JOIN mt_watchlist_stocks ws ON ws.watchlist_id = w.id
+                WHERE w.user_id = $1 AND ($2::int[] IS NULL OR w.id = ANY($2::int[]))
+                """,
+                (user_id, watchlist_ids),
+                conn
+            )
+
+        if watchlist_ids and {row["id"] for row in rows} != set(watchlist_ids):
+            raise HTTPException(status_code=404, detail="Watchlist not found or unauthorized")
+
+        if not has_capacity():
+            raise HTTPException(status_code=503, detail="Too many live streams, please retry later")
+
+        return StreamingResponse(
+            price_events({row["script_id"] for row in rows if row["script_id"] is not None}),
+            media_type="text/event-stream",
+            headers={
+                "Cache-Control": "no-cache",
+                "X-Accel-Buffering": "no",
+                # GZipMiddleware would hold small events in its compressor; this makes it pass them through
+                "Content-Encoding": "identity",
+            }
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        report_error("Stream Watchlist Prices Error", e)
+        raise HTTPException(status_code=500, detail="Internal Server Error")
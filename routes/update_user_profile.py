@@ -1,9 +1,9 @@
 from fastapi import APIRouter, Depends, Request, HTTPException
 from pydantic import BaseModel, EmailStr
-from db.connection import get_single_connection
+from db.connection import get_db
 from db.db_helpers import execute_write
 from utils.auth import authorize_user
-from utils.telegram_notifier import notify_internal
+from utils.error_aggregator import report_error
 from utils.datetime_utils import utc_now
 from utils.user_blocklist import is_user_blocked
 
@@ -19,7 +19,8 @@ class UpdateUserProfileRequest(BaseModel):
 async def update_user_profile(
     payload: UpdateUserProfileRequest,
     request: Request,
-    token_payload: dict = Depends(authorize_user)
+    token_payload: dict = Depends(authorize_user),
+    conn=Depends(get_db)
 ):
     try:
         user_id = token_payload.get("user_id")
@@ -64,14 +65,12 @@ async def update_user_profile(
             WHERE id = ${len(values)}
         """
 
-        conn = await get_single_connection()
         await execute_write(query, tuple(values), conn)
-        await conn.close()
 
         return {"message": "Profile updated successfully"}
 
     except HTTPException:
         raise
     except Exception as e:
-        await notify_internal(f"[update_user_profile Error] {e}")
+        report_error("update_user_profile Error", e)
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -2,10 +2,11 @@ from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
 from typing import Optional
 from datetime import datetime, timedelta, timezone
-from db.connection import get_single_connection
+from db.connection import get_db
 from db.db_helpers import execute_write, fetch_one
 from utils.auth import authorize_user
 from utils.telegram_notifier import notify_internal
+from utils.error_aggregator import report_error
 from utils.payment_calculator import calculate_final_price
 
 router = APIRouter()
@@ -23,8 +24,7 @@ def utc_today():
     return datetime.now(timezone.utc).date()
 
 @router.post("/verify_apple_payment")
-async def verify_apple_payment(payload: ApplePaymentRequest, user_data: dict = Depends(authorize_user)):
-    conn = await get_single_connection()
+async def verify_apple_payment(payload: ApplePaymentRequest, user_data: dict = Depends(authorize_user), conn=Depends(get_db)):
     try:
         user_id = user_data["user_id"]
         today = utc_today()
@@ -90,10 +90,8 @@ async def verify_apple_payment(payload: ApplePaymentRequest, user_data: dict = D
         return {"amount": result["final_price"]}
 
     except ValueError as ve:
-        await notify_internal(f"[❌ Apple Verify Error] {str(ve)}")
+        report_error("Apple Verify Error", ve)
         raise HTTPException(status_code=400, detail=str(ve))
     except Exception as e:
-        await notify_internal(f"[❌ Apple Verify Error] {str(e)}")
+        report_error("Apple Verify Error", e)
         raise HTTPException(status_code=500, detail="Apple payment verification failed")
-    finally:
-        await conn.close()
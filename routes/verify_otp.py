@@ -1,9 +1,10 @@
-from fastapi import APIRouter, Request, HTTPException
+from fastapi import APIRouter, Request, HTTPException, Depends
 from pydantic import BaseModel, EmailStr
-from db.connection import get_single_connection
+from db.connection import get_db
 from utils.jwt_utils import create_jwt_token
-from utils.telegram_notifier import notify_internal
+from utils.error_aggregator import report_error
 from utils.datetime_utils import utc_now, utc_in
+from utils.token_revocations import token_issue_time
 
 router = APIRouter()
 
@@ -12,15 +13,13 @@ class VerifyOtpRequest(BaseModel):
     otp: str
 
 @router.post("/verify_otp")
-async def verify_otp(payload: VerifyOtpRequest, request: Request):
+async def verify_otp(payload: VerifyOtpRequest, request: Request, conn=Depends(get_db)):
     try:
         email = payload.email.lower()
         otp = payload.otp.strip()
         now = utc_now()
         access_exp = utc_in(days=30)
 
-        conn = await get_single_connection()
-
         row = await conn.fetchrow(
             """
             SELECT * FROM mt_otps
@@ -35,11 +34,13 @@ async def verify_otp(payload: VerifyOtpRequest, request: Request):
 
         await conn.execute("UPDATE mt_otps SET is_valid = false WHERE id = $1", row["id"])
 
-        user_row = await conn.fetchrow("SELECT id FROM mt_users WHERE email = $1", email)
+        user_row = await conn.fetchrow("SELECT id, jwt_min_iat FROM mt_users WHERE email = $1", email)
         is_new_user = False
 
         if user_row:
             user_id = user_row["id"]
+            # A logout in this same second would otherwise revoke the new token too
+            now = token_issue_time(user_id, now, user_row["jwt_min_iat"])
         else:
             is_new_user = True
             insert_query = """
@@ -76,5 +77,5 @@ async def verify_otp(payload: VerifyOtpRequest, request: Request):
         }
 
     except Exception as e:
-        await notify_internal(f"[Verify OTP Error] {str(e)}")
+        report_error("Verify OTP Error", e)
         raise HTTPException(status_code=500, detail="Internal Server Error")
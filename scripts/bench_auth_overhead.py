@@ -0,0 +1,67 @@
+"""
+Per-request cost of authorize_user: full JWT verification on every call (cache disabled)
+vs. the verified-token cache, for a realistic mix of returning tokens, and what the
+logout revocation check adds on top.
+
+    python scripts/bench_auth_overhead.py --calls 100000 --users 5000
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.security import HTTPAuthorizationCredentials
+
+from scripts.bench_endpoint_latency import percentile
+from utils import auth
+from utils.datetime_utils import utc_now, utc_in
+from utils.jwt_utils import create_jwt_token
+from utils.token_revocations import set_token_revocations, token_revocation_stats
+
+
+async def measure(label: str, credentials: list, calls: int, cache_entries: int):
+    auth.AUTH_TOKEN_CACHE_MAX_ENTRIES = cache_entries
+    auth._verified_tokens.clear()
+    timings = []
+    for _ in range(calls):
+        creds = random.choice(credentials)
+        start = time.perf_counter()
+        await auth.authorize_user(creds)
+        timings.append((time.perf_counter() - start) * 1_000_000)
+    timings.sort()
+    print(f"{label}: mean {sum(timings) / len(timings):.1f} us | p50 {percentile(timings, 50):.1f} us | "
+          f"p99 {percentile(timings, 99):.1f} us")
+
+
+async def run(calls: int, users: int, revoked: int):
+    now, exp = utc_now(), utc_in(days=30)
+    credentials = [
+        HTTPAuthorizationCredentials(scheme="Bearer", credentials=create_jwt_token(user_id=i + 1, iat=now, exp=exp))
+        for i in range(users)
+    ]
+    print(f"backend: {auth.token_cache_stats()['backend']}, {calls} calls over {users} tokens")
+    await measure("no cache   ", credentials, calls, 0)
+    await measure("token cache", credentials, calls, 50000)
+
+    # Revocation check cost: same run with a populated min-iat map (none of these tokens revoked)
+    set_token_revocations({users + i: int(now.timestamp()) for i in range(revoked)}, prune_before=0)
+    await measure(f"token cache + {revoked} revocations", credentials, calls, 50000)
+    print(auth.token_cache_stats())
+    print(token_revocation_stats())
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=100000)
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--revoked", type=int, default=100000, help="users in the revocation map")
+    args = parser.parse_args()
+    asyncio.run(run(args.calls, args.users, args.revoked))
+
+
+if __name__ == "__main__":
+    main()
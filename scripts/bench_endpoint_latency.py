@@ -0,0 +1,76 @@
+"""
+Measures p50/p99 latency of an API endpoint under concurrent load.
+
+Run the server (uvicorn main:app) against a local Postgres, then e.g.:
+
+    python scripts/bench_endpoint_latency.py --path /api/get_watchlists --user-id 1
+
+Check out the commit before a change, run it again, and compare the two outputs.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import aiohttp
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.datetime_utils import utc_now, utc_in
+from utils.jwt_utils import create_jwt_token
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def run(base_url: str, path: str, token: str, requests_total: int, concurrency: int):
+    latencies = []
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    async with aiohttp.ClientSession(headers=headers) as session:
+        async def one():
+            nonlocal errors
+            async with semaphore:
+                start = time.perf_counter()
+                async with session.get(base_url + path) as resp:
+                    await resp.read()
+                    if resp.status != 200:
+                        errors += 1
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        # Warm up so connection setup is not part of the measurement
+        await asyncio.gather(*(one() for _ in range(min(concurrency, 20))))
+        latencies.clear()
+
+        wall_start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests_total)))
+        wall = time.perf_counter() - wall_start
+
+    latencies.sort()
+    print(f"{path}: {requests_total} requests, concurrency {concurrency}, errors {errors}")
+    print(f"  p50 {percentile(latencies, 50):.2f} ms | p99 {percentile(latencies, 99):.2f} ms | "
+          f"max {latencies[-1]:.2f} ms | {requests_total / wall:.0f} req/s")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--path", default="/api/get_watchlists")
+    parser.add_argument("--user-id", type=int, required=True)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    token = create_jwt_token(user_id=args.user_id, iat=utc_now(), exp=utc_in(days=1))
+    asyncio.run(run(args.base_url, args.path, token, args.requests, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
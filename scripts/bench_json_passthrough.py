@@ -0,0 +1,90 @@
+"""
+Serialization time and peak memory of a get_stock_details-style response holding a large
+analysis blob: decode + re-encode (old path) vs. splicing the raw JSON (raw_json).
+
+    python scripts/bench_json_passthrough.py                 # synthetic ~256 KB blob
+    python scripts/bench_json_passthrough.py --from-db 5     # the 5 largest analysis_json rows
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.custom_response import CustomJSONResponse, raw_json
+
+
+def synthetic_blob(size_kb: int) -> str:
+    section = {
+        "summary": "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 8,
+        "scores": {f"metric_{i}": i * 1.25 for i in range(40)},
+        "points": [{"title": f"Point {i}", "detail": "Sed do eiusmod tempor incididunt " * 4} for i in range(10)],
+    }
+    blob, i = {}, 0
+    while len(json.dumps(blob)) < size_kb * 1024:
+        blob[f"section_{i}"] = section
+        i += 1
+    return json.dumps(blob)
+
+
+async def largest_rows(count: int) -> list[str]:
+    from db.connection import init_db_pool, close_db_pool, acquire_connection
+    await init_db_pool()
+    try:
+        async with acquire_connection() as conn:
+            rows = await conn.fetch("""
+                SELECT analysis_json FROM mt_openai_analysis
+                ORDER BY octet_length(analysis_json::text) DESC
+                LIMIT $1
+            """, count)
+        return [row["analysis_json"] for row in rows]
+    finally:
+        await close_db_pool()
+
+
+def decode_path(text: str) -> bytes:
+    value = json.loads(text)
+    if isinstance(value, str):
+        value = json.loads(value)
+    return CustomJSONResponse({"monk_ai_analysis": value}).body
+
+
+def passthrough_path(text: str) -> bytes:
+    return CustomJSONResponse({"monk_ai_analysis": raw_json(text)}).body
+
+
+def measure(fn, text: str, iterations: int) -> tuple[float, int]:
+    fn(text)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn(text)
+    per_call_ms = (time.perf_counter() - start) / iterations * 1000
+
+    tracemalloc.start()
+    fn(text)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return per_call_ms, peak
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size-kb", type=int, default=256)
+    parser.add_argument("--from-db", type=int, default=0, help="benchmark the N largest analysis_json rows")
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    blobs = asyncio.run(largest_rows(args.from_db)) if args.from_db else [synthetic_blob(args.size_kb)]
+    for text in blobs:
+        print(f"blob: {len(text) / 1024:.0f} KB")
+        for name, fn in (("decode + re-encode", decode_path), ("raw passthrough", passthrough_path)):
+            per_call_ms, peak = measure(fn, text, args.iterations)
+            print(f"  {name:<20} {per_call_ms:8.3f} ms/response | peak {peak / 1024:8.0f} KB")
+
+
+if __name__ == "__main__":
+    main()
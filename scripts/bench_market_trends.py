@@ -0,0 +1,84 @@
+"""
+Compares the get_market_trends SQL path with the precomputed leaderboards at high concurrency.
+
+Runs in-process against the database from .env (no server needed):
+
+    python scripts/bench_market_trends.py --requests 1000
+
+Both paths get the same random mix of trend / exchange / company_size / offset. The SQL
+path goes through the shared pool, so with DB_POOL_MAX_SIZE connections most of the 1k
+requests queue for a connection; the leaderboard path only slices arrays.
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db.connection import init_db_pool, close_db_pool, acquire_connection
+from routes.get_market_trends import COMPANY_SIZE_MAP, TREND_FIELDS, fetch_market_trends_from_db
+from scripts.bench_endpoint_latency import percentile
+from tasks.script_snapshot_refresher import FULL_QUERY
+from utils.app_config import load_config
+from utils.market_leaderboards import TRENDS, build_leaderboards
+from utils.script_snapshot import ScriptSnapshot
+
+
+def report(name: str, latencies: list[float], wall: float):
+    latencies.sort()
+    print(f"{name}: {len(latencies)} requests in {wall * 1000:.0f} ms ({len(latencies) / wall:.0f} req/s)")
+    print(f"  p50 {percentile(latencies, 50):.2f} ms | p99 {percentile(latencies, 99):.2f} ms | max {latencies[-1]:.2f} ms")
+
+
+async def run(requests_total: int, limit: int):
+    await init_db_pool()
+    try:
+        async with acquire_connection() as conn:
+            volume_threshold = (await load_config(conn)).unusual_volume_threshold
+            rows = await conn.fetch(FULL_QUERY)
+
+        snapshot = ScriptSnapshot.from_records(rows)
+        started = time.perf_counter()
+        leaderboards = build_leaderboards(snapshot, volume_threshold)
+        print(f"snapshot: {snapshot.size} rows | build: {len(leaderboards.boards)} boards in "
+              f"{(time.perf_counter() - started) * 1000:.1f} ms")
+
+        exchanges = [None] + [label for label in snapshot.labels["exchange"] if label]
+        sizes = [None] + list(COMPANY_SIZE_MAP.values())
+        mix = [(random.choice(TRENDS), random.choice(exchanges), random.choice(sizes), random.choice((0, 0, limit)))
+               for _ in range(requests_total)]
+
+        async def sql_request(params, latencies):
+            start = time.perf_counter()
+            async with acquire_connection() as conn:
+                await fetch_market_trends_from_db(conn, params[0], params[1], params[2], volume_threshold, limit, params[3])
+            latencies.append((time.perf_counter() - start) * 1000)
+
+        async def leaderboard_request(params, latencies):
+            start = time.perf_counter()
+            page = leaderboards.page(params[0], params[1], params[2], params[3], limit)
+            snapshot.records(page, TREND_FIELDS)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+        for name, request in (("sql", sql_request), ("leaderboards", leaderboard_request)):
+            latencies = []
+            wall_start = time.perf_counter()
+            await asyncio.gather(*(request(params, latencies) for params in mix))
+            report(name, latencies, time.perf_counter() - wall_start)
+    finally:
+        await close_db_pool()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, args.limit))
+
+
+if __name__ == "__main__":
+    main()
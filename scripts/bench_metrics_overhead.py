@@ -0,0 +1,101 @@
+"""
+Per-request cost of MetricsMiddleware: drives a trivial FastAPI route directly through ASGI
+(no sockets, so the middleware is a visible share of the time) with and without it, then
+the middleware alone around a no-op app, which is what the 15 us budget in utils/metrics.py
+applies to.
+
+    python scripts/bench_metrics_overhead.py --requests 20000
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from collections import namedtuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI
+
+from utils.metrics import MetricsMiddleware, record_query, render_metrics, HTTP_DB_QUERIES
+
+BUDGET_US = 15
+FakeQuery = namedtuple("FakeQuery", "query elapsed exception")
+
+
+def make_app(with_metrics: bool) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/api/items/{item_id}")
+    async def item(item_id: int):
+        # What asyncpg's query logger does after each query on a pooled connection
+        asyncio.get_running_loop().call_soon(record_query, FakeQuery("SELECT 1", 0.0004, None))
+        return {"item_id": item_id}
+
+    if with_metrics:
+        app.add_middleware(MetricsMiddleware, routes=app.router.routes)
+    return app
+
+
+async def drive(app, requests_total: int) -> float:
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    def scope(i):
+        return {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+            "path": f"/api/items/{i}", "raw_path": f"/api/items/{i}".encode(), "root_path": "", "query_string": b"",
+            "headers": [], "client": ("127.0.0.1", 1), "server": ("127.0.0.1", 80),
+        }
+
+    # sleep(0) lets queued callbacks run between requests, as a real server's loop would
+    for i in range(500):  # warm-up
+        await app(scope(i), receive, send)
+        await asyncio.sleep(0)
+    started = time.perf_counter()
+    for i in range(requests_total):
+        await app(scope(i), receive, send)
+        await asyncio.sleep(0)
+    return (time.perf_counter() - started) / requests_total * 1_000_000
+
+
+async def bare_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def run(requests_total: int):
+    # Interleave a few rounds so CPU frequency drift does not favour one side
+    plain, metered = make_app(False), make_app(True)
+    plain_us, metered_us = [], []
+    for _ in range(5):
+        plain_us.append(await drive(plain, requests_total))
+        metered_us.append(await drive(metered, requests_total))
+    print(f"FastAPI route without metrics: {min(plain_us):.1f} us/request")
+    print(f"FastAPI route with metrics:    {min(metered_us):.1f} us/request (end-to-end, noisy)")
+
+    # The middleware alone around a no-op ASGI app: the number the budget applies to
+    bare = MetricsMiddleware(bare_app, [])
+    bare_us = min([await drive(bare, requests_total) for _ in range(5)])
+    noop_us = min([await drive(bare_app, requests_total) for _ in range(5)])
+    overhead = bare_us - noop_us
+    print(f"middleware overhead: {overhead:.1f} us/request (budget {BUDGET_US} us) -> "
+          f"{'OK' if overhead <= BUDGET_US else 'OVER BUDGET'}")
+
+    render_metrics()
+    series = HTTP_DB_QUERIES._series[("GET", "/api/items/{item_id}")]
+    print(f"db queries counted per request: {series[1] / series[2]:.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Evaluation time of the price alert engine (utils/price_alerts.py) for 1M alerts, without a database.
+
+Builds a synthetic script_master snapshot and --alerts random alerts over it (all six types,
+thresholds a few percent away from the current price), then reports:
+
+- loading them (what a full reload costs after the SELECT),
+- one vectorized pass over every alert,
+- snapshot swaps in which --changed scripts move (the per-tick path through the price hub),
+- applying a burst of --churn created / deleted alerts and merging them at the next tick.
+
+    python scripts/bench_price_alerts.py --alerts 1000000 --scripts 10000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.bench_endpoint_latency import percentile
+from utils import price_alerts
+from utils.price_alerts import ALERT_TYPES, THRESHOLD_TYPES, evaluate_alerts
+from utils.script_snapshot import ScriptSnapshot, SNAPSHOT_COLUMNS, set_snapshot
+
+
+def record(script_id: int, price: float, change: float) -> dict:
+    r = {column: None for column in SNAPSHOT_COLUMNS}
+    r.update(script_id=script_id, latest_price=price, changed_percentage=change, price_difference=0.0,
+             alltime_high=price * 1.3, alltime_low=price * 0.7, alltime_high_date=None, alltime_low_date=None,
+             co_code=str(script_id), companyname=f"Company {script_id}", exchange="NSE")
+    return r
+
+
+def synthetic_alerts(count: int, prices: dict) -> list:
+    script_ids = list(prices)
+    rows = []
+    for alert_id in range(1, count + 1):
+        script_id = random.choice(script_ids)
+        alert_type = random.choice(ALERT_TYPES)
+        if alert_type.startswith("price_"):
+            sign = 1 if alert_type == "price_above" else -1
+            threshold = round(prices[script_id] * (1 + sign * random.uniform(0.005, 0.05)), 2)
+        elif alert_type in THRESHOLD_TYPES:
+            threshold = random.choice((3.0, 5.0, 10.0)) * (1 if alert_type == "change_above" else -1)
+        else:
+            threshold = None
+        rows.append((alert_id, script_id, alert_type, threshold))
+    return rows
+
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return (time.perf_counter() - started) * 1000, result
+
+
+def run(alerts: int, scripts: int, changed: int, ticks: int, churn: int):
+    prices = {sid: random.uniform(50, 5000) for sid in range(1, scripts + 1)}
+    changes = {sid: 0.0 for sid in prices}
+    snapshot = ScriptSnapshot.from_records([record(sid, prices[sid], 0.0) for sid in prices])
+    set_snapshot(snapshot, None)
+
+    rows = synthetic_alerts(alerts, prices)
+    elapsed, _ = timed(price_alerts.set_price_alerts, rows)
+    stats = price_alerts.price_alert_stats()
+    print(f"{stats['alerts']} alerts on {scripts} scripts | load {elapsed:.0f} ms | "
+          f"{stats['memory_bytes'] / 1e6:.1f} MB of arrays")
+
+    # One pass over every alert, as if every script had changed
+    at = np.searchsorted(snapshot["script_id"], price_alerts._script_id)
+    passes = [timed(evaluate_alerts, snapshot, at, price_alerts._type, price_alerts._threshold) for _ in range(5)]
+    full = sorted(ms for ms, _ in passes)
+    print(f"full evaluation of {len(at)} alerts: p50 {percentile(full, 50):.1f} ms | "
+          f"max {full[-1]:.1f} ms | {int(passes[0][1].sum())} would trigger")
+
+    latencies = []
+    for _ in range(ticks):
+        moved = random.sample(list(prices), changed)
+        for sid in moved:
+            step = random.gauss(0, 0.004)
+            prices[sid] *= 1 + step
+            changes[sid] += step * 100
+        snapshot, positions = snapshot.apply_changes([record(sid, prices[sid], changes[sid]) for sid in moved])
+        set_snapshot(snapshot, positions)
+        latencies.append(price_alerts.price_alert_stats()["last_evaluation_ms"])
+        price_alerts.take_triggers()
+    latencies.sort()
+    stats = price_alerts.price_alert_stats()
+    print(f"{changed} changed scripts per tick (~{alerts * changed // scripts} alerts evaluated): "
+          f"p50 {percentile(latencies, 50):.1f} ms | p99 {percentile(latencies, 99):.1f} ms | "
+          f"max {latencies[-1]:.1f} ms | {stats['triggered']} triggered over {ticks} ticks")
+
+    created = [(alerts + i, random.choice(list(prices)), "price_above", 1e9, True) for i in range(1, churn + 1)]
+    deleted = [(alert_id, script_id, alert_type, threshold, False)
+               for alert_id, script_id, alert_type, threshold in random.sample(rows, churn)]
+    elapsed, _ = timed(price_alerts.apply_price_alert_changes, created + deleted)
+    merge_ms, _ = timed(price_alerts._merge_pending)
+    print(f"{churn} created + {churn} deleted: apply {elapsed:.1f} ms | merge at next tick {merge_ms:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--alerts", type=int, default=1000000)
+    parser.add_argument("--scripts", type=int, default=10000)
+    parser.add_argument("--changed", type=int, default=2000)
+    parser.add_argument("--ticks", type=int, default=20)
+    parser.add_argument("--churn", type=int, default=1000)
+    args = parser.parse_args()
+    run(args.alerts, args.scripts, args.changed, args.ticks, args.churn)
+
+
+if __name__ == "__main__":
+    main()
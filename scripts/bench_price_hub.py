@@ -0,0 +1,85 @@
+"""
+Tick cost of the price hub (utils/price_hub.py) at 100k subscriptions, without a database.
+
+Builds a synthetic script_master snapshot, subscribes --subscribers watchlist streams
+(utils.price_stream subscribers) to --per-subscriber random scripts each, then applies
+--ticks deltas in which --changed scripts get a new latest_price and reports the time of
+each swap's diff + fan-out, plus the cost of subscription churn:
+
+    python scripts/bench_price_hub.py --scripts 10000 --subscribers 2000 --per-subscriber 50
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.bench_endpoint_latency import percentile
+from utils import price_hub, price_stream
+from utils.script_snapshot import ScriptSnapshot, SNAPSHOT_COLUMNS, set_snapshot
+
+
+def record(script_id: int, price: float) -> dict:
+    r = {column: None for column in SNAPSHOT_COLUMNS}
+    r.update(script_id=script_id, latest_price=price, changed_percentage=0.0, price_difference=0.0,
+             volume=1000, co_code=str(script_id), companyname=f"Company {script_id}", exchange="NSE")
+    return r
+
+
+def run(scripts: int, subscribers: int, per_subscriber: int, changed: int, ticks: int):
+    script_ids = list(range(1, scripts + 1))
+    prices = {sid: 100.0 for sid in script_ids}
+    snapshot = ScriptSnapshot.from_records([record(sid, price) for sid, price in prices.items()])
+    set_snapshot(snapshot, None)
+
+    started = time.perf_counter()
+    streams = [price_stream.subscribe(random.sample(script_ids, per_subscriber)) for _ in range(subscribers)]
+    print(f"{scripts} scripts | {subscribers} subscribers x {per_subscriber} = "
+          f"{subscribers * per_subscriber} subscriptions in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    def tick(label: str) -> float:
+        nonlocal snapshot
+        moved = random.sample(script_ids, changed)
+        for sid in moved:
+            prices[sid] += 0.05
+        snapshot, positions = snapshot.apply_changes([record(sid, prices[sid]) for sid in moved])
+        started = time.perf_counter()
+        set_snapshot(snapshot, positions)
+        elapsed = (time.perf_counter() - started) * 1000
+        for stream in streams:
+            stream.take()
+        return elapsed
+
+    tick("warm-up")  # first tick folds the pending subscriptions into the arrays
+    latencies = sorted(tick("tick") for _ in range(ticks))
+    stats = price_hub.price_hub_stats()
+    print(f"{changed} changed scripts per tick: p50 {percentile(latencies, 50):.2f} ms | "
+          f"p99 {percentile(latencies, 99):.2f} ms | max {latencies[-1]:.2f} ms | "
+          f"{stats['notified'] / stats['ticks']:.0f} subscribers notified per tick")
+
+    # Churn: a tenth of the streams reconnect between ticks
+    churn = subscribers // 10
+    started = time.perf_counter()
+    for i in range(churn):
+        price_stream.unsubscribe(streams[i])
+        streams[i] = price_stream.subscribe(random.sample(script_ids, per_subscriber))
+    churn_ms = (time.perf_counter() - started) * 1000
+    elapsed = tick("churn")
+    print(f"{churn} reconnects: {churn_ms:.1f} ms to (un)subscribe | next tick incl. rebuild {elapsed:.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--scripts", type=int, default=10000)
+    parser.add_argument("--subscribers", type=int, default=2000)
+    parser.add_argument("--per-subscriber", type=int, default=50)
+    parser.add_argument("--changed", type=int, default=2000)
+    parser.add_argument("--ticks", type=int, default=50)
+    args = parser.parse_args()
+    run(args.scripts, args.subscribers, args.per_subscriber, args.changed, args.ticks)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Event-loop stall while creating Razorpay orders concurrently: the old blocking requests.post
+call vs. utils.razorpay_client.create_order. Starts scripts/fake_razorpay_server.py itself.
+
+    python scripts/bench_razorpay_order_stall.py --orders 50 --latency 0.2
+
+A ticker task sleeps 10 ms in a loop on the same event loop; its overshoot is how long every
+other request on this worker would have waited.
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+import uuid
+
+import requests
+
+PORT = 8093
+os.environ["RAZORPAY_API_BASE"] = f"http://127.0.0.1:{PORT}"
+os.environ.setdefault("RAZORPAY_KEY_ID", "rzp_test_fake")
+os.environ.setdefault("RAZORPAY_KEY_SECRET", "fake_secret")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.bench_endpoint_latency import percentile
+from utils.razorpay_client import create_order, close_razorpay_client, razorpay_stats
+
+TICK_SECONDS = 0.01
+
+
+async def measure(label: str, orders: int, create_one):
+    lags = []
+    stop = asyncio.Event()
+
+    async def ticker():
+        while not stop.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(TICK_SECONDS)
+            lags.append((time.perf_counter() - start - TICK_SECONDS) * 1000)
+
+    tick_task = asyncio.create_task(ticker())
+    await asyncio.sleep(0.05)
+    wall_start = time.perf_counter()
+    await asyncio.gather(*(create_one() for _ in range(orders)))
+    wall = time.perf_counter() - wall_start
+    stop.set()
+    await tick_task
+
+    lags.sort()
+    print(f"{label}: {orders} orders in {wall:.2f}s | loop lag p50 {percentile(lags, 50):.1f} ms, "
+          f"p99 {percentile(lags, 99):.1f} ms, max {lags[-1]:.1f} ms")
+
+
+async def blocking_order():
+    # What routes/razorpay_create_order.py used to do inside the async handler
+    response = requests.post(
+        f"{os.environ['RAZORPAY_API_BASE']}/v1/orders",
+        auth=(os.environ["RAZORPAY_KEY_ID"], os.environ["RAZORPAY_KEY_SECRET"]),
+        json={"amount": 49900, "currency": "INR", "receipt": str(uuid.uuid4()), "payment_capture": 1},
+        timeout=10,
+    )
+    response.raise_for_status()
+
+
+async def async_order():
+    await create_order(amount_in_paise=49900, receipt=str(uuid.uuid4()))
+
+
+async def run(orders: int):
+    await measure("requests.post (blocking)", orders, blocking_order)
+    await measure("razorpay_client (async) ", orders, async_order)
+    await close_razorpay_client()
+    print(razorpay_stats())
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--orders", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.2, help="fake Razorpay response time")
+    args = parser.parse_args()
+
+    server = subprocess.Popen(
+        [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_razorpay_server.py"),
+         "--port", str(PORT), "--latency", str(args.latency)],
+        stdout=subprocess.DEVNULL,
+    )
+    try:
+        for _ in range(50):
+            try:
+                requests.get(f"http://127.0.0.1:{PORT}/v1/orders", timeout=0.2)
+                break
+            except requests.ConnectionError:
+                time.sleep(0.1)
+        asyncio.run(run(args.orders))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
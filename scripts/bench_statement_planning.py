@@ -0,0 +1,173 @@
+"""
+Planning-time and latency savings of the prepared-statement registry (db/statements.py) on
+get_stocks_in_watchlist and get_market_trends (SQL fallback path).
+
+Runs in-process against the database from .env (no server needed):
+
+    python scripts/bench_statement_planning.py --watchlist-id 1 --iterations 500
+
+Two measurements, each with the same random mix of sort / filter / limit / offset:
+
+1. Server planning time, from EXPLAIN's "Planning Time": the text-built SQL the routes used
+   to send (every distinct limit/offset/sort is a new statement, planned from scratch) vs.
+   EXECUTE of the registered statement after Postgres has settled on its cached plan.
+2. Client latency per call: conn.fetch() of the text-built SQL (asyncpg's statement cache
+   only helps when the exact text repeats) vs. fetch_all_statement().
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db.connection import init_db_pool, close_db_pool, acquire_connection
+from db.statements import fetch_all_statement, statement_sql
+from routes.get_market_trends import TREND_QUERIES
+from routes.get_stocks_in_watchlist import VALID_SORT_COLUMNS
+from scripts.bench_endpoint_latency import percentile
+
+SIZE_LABELS = (None, "Small Cap", "Mid Cap", "Large Cap")
+EXCHANGES = (None, "NSE", "BSE")
+VOLUME_THRESHOLD = 100000
+
+
+def sql_literal(value) -> str:
+    if value is None:
+        return "NULL"
+    if isinstance(value, str):
+        return "'" + value.replace("'", "''") + "'"
+    return str(value)
+
+
+# --- the text-built SQL the routes sent before the registry ---
+
+def legacy_watchlist_sql(watchlist_id: int, sort_by: str, direction: str, limit: int, offset: int) -> str:
+    return f"""
+        SELECT w.script_id, w.added_price, w.added_date,
+               COALESCE(sm.companyname, '') AS companyname, COALESCE(sm.sector, '') AS sector
+        FROM mt_watchlist_stocks w
+        JOIN script_master sm ON w.script_id = sm.script_id
+        WHERE w.watchlist_id = {watchlist_id}
+        ORDER BY {VALID_SORT_COLUMNS[sort_by]} {direction}
+        LIMIT {limit} OFFSET {offset}
+    """
+
+
+def legacy_trends_sql(trend: str, exchange: str | None, size_label: str | None, limit: int, offset: int) -> str:
+    filters, order = TREND_QUERIES[trend]
+    filters = filters.replace("$5", str(VOLUME_THRESHOLD))
+    if exchange:
+        filters += f" AND exchange = {sql_literal(exchange)}"
+    if size_label:
+        filters += f" AND company_size = {sql_literal(size_label)}"
+    return f"""
+        SELECT script_id, co_code, companyname, companyshortname, latest_price,
+               changed_percentage, volume, exchange, company_size
+        FROM script_master
+        WHERE latest_price IS NOT NULL AND {filters}
+        ORDER BY {order} LIMIT {limit} OFFSET {offset}
+    """
+
+
+def random_cases(watchlist_id: int, count: int) -> list[tuple]:
+    """(label, legacy sql, statement name, statement args) per call."""
+    cases = []
+    for _ in range(count):
+        limit, offset = random.choice((10, 20, 25, 50)), random.randrange(0, 200, 10)
+        if random.random() < 0.5:
+            sort_by, direction = random.choice(list(VALID_SORT_COLUMNS)), random.choice(("ASC", "DESC"))
+            cases.append((
+                "get_stocks_in_watchlist",
+                legacy_watchlist_sql(watchlist_id, sort_by, direction, limit, offset),
+                f"get_stocks_in_watchlist.page.{sort_by}.{direction}",
+                (watchlist_id, None, None, limit, offset),
+            ))
+        else:
+            trend, exchange, size_label = random.choice(list(TREND_QUERIES)), random.choice(EXCHANGES), random.choice(SIZE_LABELS)
+            args = (exchange, size_label, limit, offset)
+            if "$5" in TREND_QUERIES[trend][0]:
+                args += (VOLUME_THRESHOLD,)
+            cases.append((
+                "get_market_trends",
+                legacy_trends_sql(trend, exchange, size_label, limit, offset),
+                f"get_market_trends.{trend}",
+                args,
+            ))
+    return cases
+
+
+async def planning_ms(conn, explain_target: str) -> float:
+    plan = await conn.fetchval(f"EXPLAIN (ANALYZE, SUMMARY, FORMAT JSON) {explain_target}")
+    return json.loads(plan)[0]["Planning Time"]
+
+
+async def measure_planning(conn, cases: list[tuple]) -> dict:
+    results = {}
+    prepared = {}
+    for label, legacy_sql, name, args in cases:
+        legacy = await planning_ms(conn, legacy_sql)
+        server_name = prepared.get(name)
+        if server_name is None:
+            server_name = prepared[name] = f"bench_{len(prepared)}"
+            await conn.execute(f"PREPARE {server_name} AS {statement_sql(name)}")
+            for _ in range(6):  # past the 5 custom plans Postgres tries before caching a generic one
+                await planning_ms(conn, f"EXECUTE {server_name}({', '.join(map(sql_literal, args))})")
+        registry = await planning_ms(conn, f"EXECUTE {server_name}({', '.join(map(sql_literal, args))})")
+        results.setdefault(label, ([], []))
+        results[label][0].append(legacy)
+        results[label][1].append(registry)
+    await conn.execute("DEALLOCATE ALL")
+    return results
+
+
+async def measure_latency(conn, cases: list[tuple]) -> dict:
+    results = {}
+    for label, legacy_sql, name, args in cases:
+        started = time.perf_counter()
+        await conn.fetch(legacy_sql)
+        legacy = (time.perf_counter() - started) * 1000
+        started = time.perf_counter()
+        await fetch_all_statement(name, args, conn)
+        registry = (time.perf_counter() - started) * 1000
+        results.setdefault(label, ([], []))
+        results[label][0].append(legacy)
+        results[label][1].append(registry)
+    return results
+
+
+def report(title: str, results: dict):
+    print(title)
+    for label, (legacy, registry) in results.items():
+        legacy.sort()
+        registry.sort()
+        print(f"  {label} ({len(legacy)} calls)")
+        print(f"    text-built  p50 {percentile(legacy, 50):.3f} ms | p95 {percentile(legacy, 95):.3f} ms")
+        print(f"    registry    p50 {percentile(registry, 50):.3f} ms | p95 {percentile(registry, 95):.3f} ms")
+
+
+async def run(watchlist_id: int, iterations: int):
+    await init_db_pool()
+    try:
+        async with acquire_connection() as conn:
+            report("Server planning time", await measure_planning(conn, random_cases(watchlist_id, iterations)))
+            report("Client latency per call", await measure_latency(conn, random_cases(watchlist_id, iterations)))
+    finally:
+        await close_db_pool()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--watchlist-id", type=int, required=True)
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    random.seed(args.seed)
+    asyncio.run(run(args.watchlist_id, args.iterations))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Throughput of importing scripts into a watchlist: one add_stock_to_watchlist call per script
+vs. a single batch_watchlist_mutation call, then the same for removal
+(delete_stock_from_watchlist per script vs. one batch).
+
+Run the server (uvicorn main:app) against a local Postgres (migration 006 applied), then:
+
+    python scripts/bench_watchlist_batch_import.py --user-id 1 --scripts 500
+
+The user should be on a paid plan (or the free limit must allow the import). The script
+creates two throwaway watchlists for the user and deletes them afterwards.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import aiohttp
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db.connection import init_db_pool, close_db_pool, acquire_connection
+from utils.datetime_utils import utc_now, utc_in
+from utils.jwt_utils import create_jwt_token
+
+
+async def per_script(session, base_url: str, method: str, path: str, user_id: int, watchlist_id: int,
+                     script_ids: list[int], concurrency: int) -> tuple[float, int]:
+    semaphore = asyncio.Semaphore(concurrency)
+    errors = 0
+
+    async def one(script_id: int):
+        nonlocal errors
+        async with semaphore:
+            async with session.request(method, base_url + path,
+                                       # delete_stocks_from_watchlist serves the same DELETE path with this shape
+                                       json={"watchlist_id": watchlist_id, "script_id": script_id,
+                                             "user_id": user_id, "script_ids": [script_id]}) as resp:
+                await resp.read()
+                if resp.status != 200:
+                    errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(script_id) for script_id in script_ids))
+    return time.perf_counter() - started, errors
+
+
+async def batch(session, base_url: str, action: str, watchlist_id: int, script_ids: list[int]) -> tuple[float, int]:
+    operations = [{"action": action, "script_id": script_id, "watchlist_id": watchlist_id} for script_id in script_ids]
+    started = time.perf_counter()
+    async with session.post(base_url + "/api/batch_watchlist_mutation", json={"operations": operations}) as resp:
+        body = await resp.json()
+    wall = time.perf_counter() - started
+    errors = len(script_ids) if resp.status != 200 else len((body.get("data") or body).get("skipped", []))
+    return wall, errors
+
+
+def report(label: str, count: int, wall: float, errors: int):
+    print(f"  {label:<44} {wall * 1000:8.0f} ms | {count / wall:8.0f} scripts/s | errors {errors}")
+
+
+async def run(base_url: str, user_id: int, count: int, concurrency: int):
+    await init_db_pool()
+    watchlist_ids = []
+    try:
+        async with acquire_connection() as conn:
+            script_ids = [r["script_id"] for r in await conn.fetch(
+                "SELECT script_id FROM script_master ORDER BY script_id LIMIT $1", count
+            )]
+            watchlist_ids = [
+                await conn.fetchval(
+                    "INSERT INTO mt_watchlists (user_id, watchlist_name, created_at) VALUES ($1, $2, $3) RETURNING id",
+                    user_id, f"bench-batch-{name}-{time.time_ns()}", utc_now()
+                )
+                for name in ("single", "batch")
+            ]
+
+        token = create_jwt_token(user_id=user_id, iat=utc_now(), exp=utc_in(days=1))
+        single_id, batch_id = watchlist_ids
+        print(f"{len(script_ids)} scripts, per-script concurrency {concurrency}")
+        async with aiohttp.ClientSession(headers={"Authorization": f"Bearer {token}"}) as session:
+            wall, errors = await per_script(session, base_url, "POST", "/api/add_stock_to_watchlist",
+                                            user_id, single_id, script_ids, concurrency)
+            report("add: add_stock_to_watchlist per script", len(script_ids), wall, errors)
+            wall, errors = await batch(session, base_url, "add", batch_id, script_ids)
+            report("add: one batch_watchlist_mutation", len(script_ids), wall, errors)
+
+            wall, errors = await per_script(session, base_url, "DELETE", "/api/delete_stock_from_watchlist",
+                                            user_id, single_id, script_ids, concurrency)
+            report("remove: delete_stock_from_watchlist per script", len(script_ids), wall, errors)
+            wall, errors = await batch(session, base_url, "remove", batch_id, script_ids)
+            report("remove: one batch_watchlist_mutation", len(script_ids), wall, errors)
+    finally:
+        async with acquire_connection() as conn:
+            await conn.execute("DELETE FROM mt_watchlist_history WHERE watchlist_id = ANY($1::int[])", watchlist_ids)
+            await conn.execute("DELETE FROM mt_watchlist_stocks WHERE watchlist_id = ANY($1::int[])", watchlist_ids)
+            await conn.execute("DELETE FROM mt_watchlists WHERE id = ANY($1::int[])", watchlist_ids)
+        await close_db_pool()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--user-id", type=int, required=True)
+    parser.add_argument("--scripts", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(run(args.base_url, args.user_id, args.scripts, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+OFFSET pagination + COUNT(*) join vs. keyset cursors + mt_watchlists.stock_count for
+get_stocks_in_watchlist, on watchlists of 10, 1k and 10k stocks.
+
+Runs in-process against the database from .env (migration 006 applied). Creates throwaway
+watchlists for --user-id, filled from script_master, and deletes them afterwards:
+
+    python scripts/bench_watchlist_pagination.py --user-id 1 --limit 50
+
+For each size it times the first, middle and last page with both strategies, for the
+default sort (added_date, index-backed) and a join-column sort (changed_percentage).
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db.connection import init_db_pool, close_db_pool, acquire_connection
+from db.statements import fetch_all_statement, fetch_one_statement
+from scripts.bench_endpoint_latency import percentile
+from utils.datetime_utils import utc_now
+
+SIZES = (10, 1000, 10000)
+SORTS = ("added_date", "changed_percentage")
+
+
+async def create_watchlist(conn, user_id: int, size: int, script_ids: list[int]) -> int:
+    watchlist_id = await conn.fetchval(
+        "INSERT INTO mt_watchlists (user_id, watchlist_name, created_at) VALUES ($1, $2, $3) RETURNING id",
+        user_id, f"bench-pagination-{size}-{time.time_ns()}", utc_now()
+    )
+    now = utc_now()
+    await conn.copy_records_to_table(
+        "mt_watchlist_stocks",
+        columns=("watchlist_id", "script_id", "added_price", "added_date"),
+        records=[(watchlist_id, script_ids[i % len(script_ids)], 100, now) for i in range(size)],
+    )
+    await conn.execute("UPDATE mt_watchlists SET stock_count = $2 WHERE id = $1", watchlist_id, size)
+    await conn.execute("ANALYZE mt_watchlist_stocks")
+    return watchlist_id
+
+
+async def timed(fn, repeat: int) -> list[float]:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return timings
+
+
+async def bench_watchlist(conn, watchlist_id: int, size: int, limit: int, repeat: int):
+    for sort_by in SORTS:
+        page_name = f"get_stocks_in_watchlist.page.{sort_by}.DESC"
+        after_name = f"get_stocks_in_watchlist.after.{sort_by}.DESC"
+        for label, offset in (("first", 0), ("middle", (size // 2) // limit * limit), ("last", max(0, size - limit))):
+            async def offset_page():
+                await fetch_one_statement("get_stocks_in_watchlist.count", (watchlist_id, None, None), conn)
+                await fetch_all_statement(page_name, (watchlist_id, None, None, limit + 1, offset), conn)
+
+            if offset:
+                # The cursor a client would hold after paging down to this offset
+                previous = await fetch_all_statement(page_name, (watchlist_id, None, None, 1, offset - 1), conn)
+                cursor = (previous[0]["sort_key"], previous[0]["row_id"])
+
+                async def keyset_page():
+                    await fetch_all_statement(after_name, (watchlist_id, None, None, limit + 1, *cursor), conn)
+            else:
+                async def keyset_page():
+                    await fetch_all_statement(page_name, (watchlist_id, None, None, limit + 1, 0), conn)
+
+            await offset_page()
+            await keyset_page()  # prepare both before timing
+            offset_ms = await timed(offset_page, repeat)
+            keyset_ms = await timed(keyset_page, repeat)
+            print(f"  {size:>6} stocks | {sort_by:<18} | {label:<6} page | "
+                  f"offset+count p50 {percentile(offset_ms, 50):7.2f} ms | "
+                  f"keyset p50 {percentile(keyset_ms, 50):7.2f} ms")
+
+
+async def run(user_id: int, limit: int, repeat: int):
+    await init_db_pool()
+    try:
+        async with acquire_connection() as conn:
+            script_ids = [r["script_id"] for r in await conn.fetch("SELECT script_id FROM script_master LIMIT 10000")]
+            if not script_ids:
+                raise SystemExit("script_master is empty")
+            for size in SIZES:
+                watchlist_id = await create_watchlist(conn, user_id, size, script_ids)
+                try:
+                    await bench_watchlist(conn, watchlist_id, size, limit, repeat)
+                finally:
+                    await conn.execute("DELETE FROM mt_watchlist_stocks WHERE watchlist_id = $1", watchlist_id)
+                    await conn.execute("DELETE FROM mt_watchlists WHERE id = $1", watchlist_id)
+    finally:
+        await close_db_pool()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--user-id", type=int, required=True, help="Owner of the throwaway watchlists")
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(run(args.user_id, args.limit, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
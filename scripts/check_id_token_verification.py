@@ -0,0 +1,97 @@
+"""
+Exercises utils/auth_providers' local ID token verification against scripts/fake_jwks_server.py
+(started in-process with freshly generated RSA keys). Exits non-zero on the first failed check.
+
+    python scripts/check_id_token_verification.py
+"""
+import asyncio
+import os
+import sys
+import time
+
+from aiohttp import web
+
+PORT = 8095
+os.environ["GOOGLE_KEYS_URL"] = f"http://127.0.0.1:{PORT}/keys"
+os.environ["APPLE_KEYS_URL"] = f"http://127.0.0.1:{PORT}/keys"
+os.environ["GOOGLE_CLIENT_ID"] = "google-client"
+os.environ["APPLE_CLIENT_ID"] = "apple-client"
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.fake_jwks_server import KeyRing, make_app
+from utils import auth_providers
+from utils.auth_providers import verify_google_token, verify_apple_token, google_keys
+
+
+def check(name: str, condition: bool):
+    print(f"{'ok  ' if condition else 'FAIL'} {name}")
+    if not condition:
+        sys.exit(1)
+
+
+async def rejects(coro) -> bool:
+    try:
+        await coro
+    except Exception:
+        return True
+    return False
+
+
+async def run():
+    ring = KeyRing(bits=1024)
+    app = make_app(ring, max_age=600)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", PORT).start()
+    stats = app["stats"]
+    try:
+        google = lambda **kw: ring.id_token(kw.pop("sub", "g-1"), kw.pop("aud", "google-client"), kw.pop("iss", "https://accounts.google.com"), **kw)
+
+        claims = await verify_google_token(google())
+        check("valid Google token verifies", claims["sub"] == "g-1")
+        check("Cache-Control max-age is honoured", 590 < google_keys.stats()["expires_in_seconds"] <= 600)
+
+        tokens = [google(sub=f"g-{i}") for i in range(200)]
+        started = time.perf_counter()
+        for token in tokens:
+            await verify_google_token(token)
+        per_token_ms = (time.perf_counter() - started) / 200 * 1000
+        check(f"cached keys: no refetch for 200 logins ({per_token_ms:.2f} ms/token)", stats["key_requests"] == 1)
+
+        check("wrong audience rejected", await rejects(verify_google_token(google(aud="someone-else"))))
+        check("wrong issuer rejected", await rejects(verify_google_token(google(iss="https://evil.example"))))
+        check("expired token rejected", await rejects(verify_google_token(google(ttl=-10))))
+        tampered = google()[:-4] + "AAAA"
+        check("bad signature rejected", await rejects(verify_google_token(tampered)))
+
+        apple = ring.id_token("a-1", "apple-client", "https://appleid.apple.com")
+        check("valid Apple token verifies", (await verify_apple_token(apple))["sub"] == "a-1")
+        check("Apple token rejected as Google", await rejects(verify_google_token(apple)))
+
+        # Rotation: a token with a new kid triggers one refetch...
+        google_keys.min_refresh_seconds = 0
+        ring.rotate()
+        before = stats["key_requests"]
+        check("rotated key verifies after refetch", (await verify_google_token(google()))["sub"] == "g-1")
+        check("exactly one refetch for the new kid", stats["key_requests"] == before + 1)
+
+        # ...but unknown kids do not refetch again inside min_refresh_seconds
+        google_keys.min_refresh_seconds = 30
+        forged = KeyRing(bits=1024).id_token("g-1", "google-client", "https://accounts.google.com")
+        before = stats["key_requests"]
+        for _ in range(20):
+            await rejects(verify_google_token(forged))
+        check("unknown kid refetch is rate limited", stats["key_requests"] == before)
+
+        # Expired cache + provider down: previous keys keep serving
+        await runner.cleanup()
+        google_keys._expires_at = 0
+        check("stale keys serve while provider is down", (await verify_google_token(google()))["sub"] == "g-1")
+    finally:
+        await runner.cleanup()
+    print(auth_providers.provider_keys_stats())
+
+
+if __name__ == "__main__":
+    asyncio.run(run())
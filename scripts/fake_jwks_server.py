@@ -0,0 +1,92 @@
+"""
+Local stand-in for Google's / Apple's JWKS endpoints, with locally generated RSA keys.
+
+    python scripts/fake_jwks_server.py --port 8083 --max-age 600
+    GOOGLE_KEYS_URL=http://127.0.0.1:8083/keys APPLE_KEYS_URL=http://127.0.0.1:8083/keys uvicorn main:app
+
+    GET  /keys                                   the public key set, with Cache-Control max-age
+    GET  /token?sub=..&aud=..&iss=..&ttl=3600    an ID token signed with the current key
+    POST /rotate                                 adds a new key (new kid) and signs with it from now on
+"""
+import argparse
+import base64
+import time
+import uuid
+
+import rsa
+from aiohttp import web
+from jose import jwt
+
+
+def _b64url_uint(value: int) -> str:
+    raw = value.to_bytes((value.bit_length() + 7) // 8, "big")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+class KeyRing:
+    def __init__(self, bits: int = 2048):
+        self.bits = bits
+        self.keys: list[tuple[str, rsa.PublicKey, bytes]] = []  # (kid, public key, private PEM)
+        self.rotate()
+
+    def rotate(self) -> str:
+        public, private = rsa.newkeys(self.bits)
+        kid = uuid.uuid4().hex[:16]
+        self.keys.append((kid, public, private.save_pkcs1()))
+        return kid
+
+    def jwks(self) -> dict:
+        return {"keys": [
+            {"kty": "RSA", "kid": kid, "use": "sig", "alg": "RS256", "n": _b64url_uint(public.n), "e": _b64url_uint(public.e)}
+            for kid, public, _ in self.keys
+        ]}
+
+    def sign(self, claims: dict, kid: str | None = None) -> str:
+        kid, _, private_pem = next((k for k in self.keys if k[0] == kid), self.keys[-1])
+        return jwt.encode(claims, private_pem, algorithm="RS256", headers={"kid": kid})
+
+    def id_token(self, sub: str, aud: str, iss: str, ttl: int = 3600, kid: str | None = None) -> str:
+        now = int(time.time())
+        return self.sign({"sub": sub, "aud": aud, "iss": iss, "iat": now, "exp": now + ttl, "at_hash": "unused"}, kid)
+
+
+def make_app(ring: KeyRing, max_age: int) -> web.Application:
+    stats = {"key_requests": 0}
+
+    async def keys(request: web.Request) -> web.Response:
+        stats["key_requests"] += 1
+        headers = {"Cache-Control": f"public, max-age={max_age}, must-revalidate, no-transform"}
+        return web.json_response(ring.jwks(), headers=headers)
+
+    async def token(request: web.Request) -> web.Response:
+        q = request.query
+        return web.json_response({"id_token": ring.id_token(
+            q.get("sub", "provider-user-1"), q.get("aud", "test-client-id"),
+            q.get("iss", "https://accounts.google.com"), int(q.get("ttl", "3600")),
+        )})
+
+    async def rotate(request: web.Request) -> web.Response:
+        return web.json_response({"kid": ring.rotate()})
+
+    async def status(request: web.Request) -> web.Response:
+        return web.json_response(stats)
+
+    app = web.Application()
+    app["stats"] = stats
+    app.router.add_get("/keys", keys)
+    app.router.add_get("/token", token)
+    app.router.add_post("/rotate", rotate)
+    app.router.add_get("/status", status)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8083)
+    parser.add_argument("--max-age", type=int, default=600, help="Cache-Control max-age for /keys")
+    args = parser.parse_args()
+    web.run_app(make_app(KeyRing(), args.max_age), port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Local stand-in for the Razorpay Orders API (POST /v1/orders, GET /v1/orders?receipt=...).
+
+    python scripts/fake_razorpay_server.py --port 8082 --latency 0.3 --fail-rate 0.2
+    RAZORPAY_API_BASE=http://127.0.0.1:8082 uvicorn main:app
+
+--fail-rate answers that share of order creations with a 500 before creating anything;
+--lost-response-rate creates the order but then stalls past the client timeout, which is the
+case receipt lookups on retry exist for. Duplicate receipts are reported on exit.
+"""
+import argparse
+import asyncio
+import random
+import time
+import uuid
+
+from aiohttp import web
+
+
+def make_app(latency: float, fail_rate: float, lost_response_rate: float, stall_seconds: float) -> web.Application:
+    orders_by_receipt: dict[str, list[dict]] = {}
+
+    def authorized(request: web.Request) -> bool:
+        return request.headers.get("Authorization", "").startswith("Basic ")
+
+    async def create_order(request: web.Request) -> web.Response:
+        if not authorized(request):
+            return web.json_response({"error": {"code": "BAD_REQUEST_ERROR", "description": "Authentication failed"}}, status=401)
+        if latency:
+            await asyncio.sleep(latency)
+        if random.random() < fail_rate:
+            return web.json_response({"error": {"code": "SERVER_ERROR", "description": "fake failure"}}, status=500)
+
+        payload = await request.json()
+        if not isinstance(payload.get("amount"), int) or payload["amount"] < 100:
+            return web.json_response({"error": {"code": "BAD_REQUEST_ERROR", "description": "amount invalid"}}, status=400)
+        order = {
+            "id": f"order_{uuid.uuid4().hex[:14]}",
+            "entity": "order",
+            "amount": payload["amount"],
+            "amount_paid": 0,
+            "amount_due": payload["amount"],
+            "currency": payload.get("currency", "INR"),
+            "receipt": payload.get("receipt"),
+            "status": "created",
+            "attempts": 0,
+            "created_at": int(time.time()),
+        }
+        orders_by_receipt.setdefault(order["receipt"], []).append(order)
+        if random.random() < lost_response_rate:
+            await asyncio.sleep(stall_seconds)
+        return web.json_response(order)
+
+    async def list_orders(request: web.Request) -> web.Response:
+        if not authorized(request):
+            return web.json_response({"error": {"code": "BAD_REQUEST_ERROR", "description": "Authentication failed"}}, status=401)
+        receipt = request.query.get("receipt")
+        items = orders_by_receipt.get(receipt, []) if receipt else [o for v in orders_by_receipt.values() for o in v]
+        return web.json_response({"entity": "collection", "count": len(items), "items": items})
+
+    async def report(app):
+        orders = sum(len(v) for v in orders_by_receipt.values())
+        duplicates = sum(1 for v in orders_by_receipt.values() if len(v) > 1)
+        print(f"fake razorpay: {orders} orders, {len(orders_by_receipt)} receipts, {duplicates} duplicated receipts")
+
+    app = web.Application()
+    app.router.add_post("/v1/orders", create_order)
+    app.router.add_get("/v1/orders", list_orders)
+    app.on_cleanup.append(report)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8082)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds before answering")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="share of creations answered with 500")
+    parser.add_argument("--lost-response-rate", type=float, default=0.0, help="share created but not answered in time")
+    parser.add_argument("--stall-seconds", type=float, default=30.0)
+    args = parser.parse_args()
+    web.run_app(make_app(args.latency, args.fail_rate, args.lost_response_rate, args.stall_seconds), port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Local stand-in for the Telegram Bot API sendMessage endpoint.
+
+    python scripts/fake_telegram_server.py --port 8081 --latency 2 --rate-limit-every 5
+    TELEGRAM_API_BASE=http://127.0.0.1:8081 uvicorn main:app
+
+Prints every message it receives. --latency simulates a slow Telegram and
+--rate-limit-every N answers every Nth call with a 429 + retry_after, like the real API.
+"""
+import argparse
+import asyncio
+import time
+
+from aiohttp import web
+
+
+def make_app(latency: float, rate_limit_every: int, retry_after: int) -> web.Application:
+    received = {"count": 0}
+
+    async def send_message(request: web.Request) -> web.Response:
+        received["count"] += 1
+        data = await request.post()
+        if latency:
+            await asyncio.sleep(latency)
+        if rate_limit_every and received["count"] % rate_limit_every == 0:
+            return web.json_response(
+                {"ok": False, "error_code": 429, "description": "Too Many Requests",
+                 "parameters": {"retry_after": retry_after}},
+                status=429,
+            )
+        print(f"[{time.strftime('%H:%M:%S')}] #{received['count']} chat={data.get('chat_id')} "
+              f"({len(data.get('text', ''))} chars)\n{data.get('text')}\n")
+        return web.json_response({"ok": True, "result": {"message_id": received["count"]}})
+
+    app = web.Application()
+    app.router.add_post("/bot{token}/sendMessage", send_message)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds before answering")
+    parser.add_argument("--rate-limit-every", type=int, default=0, help="answer every Nth call with 429")
+    parser.add_argument("--retry-after", type=int, default=1)
+    args = parser.parse_args()
+    web.run_app(make_app(args.latency, args.rate_limit_every, args.retry_after), port=args.port)
+
+
+if __name__ == "__main__":
+    main()
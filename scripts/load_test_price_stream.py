@@ -0,0 +1,172 @@
+"""
+Load test for /api/stream_watchlist_prices: thousands of concurrent SSE subscribers while
+prices change in script_master.
+
+Run the server (uvicorn main:app) against a local Postgres, raise the open-file limit
+(ulimit -n 10000), then:
+
+    python scripts/load_test_price_stream.py --user-id 1 --subscribers 2000 --duration 60
+
+It creates a throwaway watchlist of --scripts scripts for the user and opens --subscribers
+streams on it. Every --tick-seconds it gives a random half of those scripts a new, unique
+latest_price (bumping updated_at). It reports delivery latency from each UPDATE to each
+subscriber receiving the value. Latency includes up to SCRIPT_SNAPSHOT_REFRESH_SECONDS
+of snapshot polling.
+
+Original prices are restored and the watchlist is deleted at the end.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+
+import aiohttp
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db.connection import init_db_pool, close_db_pool, acquire_connection
+from scripts.bench_endpoint_latency import percentile
+from utils.datetime_utils import utc_now, utc_in
+from utils.jwt_utils import create_jwt_token
+
+
+class Results:
+    def __init__(self):
+        self.connected = 0
+        self.failed = 0
+        self.events = 0
+        self.updates = 0
+        self.latencies: list[float] = []
+
+
+async def subscriber(session, url: str, sent_at: dict, results: Results, stop: asyncio.Event):
+    try:
+        async with session.get(url) as resp:
+            if resp.status != 200:
+                results.failed += 1
+                return
+            results.connected += 1
+            async for line in resp.content:
+                if stop.is_set():
+                    return
+                if not line.startswith(b"data: "):
+                    continue
+                received = time.perf_counter()
+                results.events += 1
+                for update in json.loads(line[6:]):
+                    results.updates += 1
+                    started = sent_at.get((update["script_id"], update["latest_price"]))
+                    if started is not None:
+                        results.latencies.append((received - started) * 1000)
+    except (aiohttp.ClientError, asyncio.TimeoutError):
+        results.failed += 1
+
+
+async def drive_prices(script_ids: list[int], base_prices: dict, sent_at: dict, tick_seconds: float,
+                       duration: float):
+    tick = 0
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        tick += 1
+        changed = random.sample(script_ids, max(1, len(script_ids) // 2))
+        prices = [round(base_prices[sid] + tick * 0.01, 2) for sid in changed]
+        async with acquire_connection() as conn:
+            await conn.execute(
+                """
+                UPDATE script_master AS sm SET latest_price = p.price, updated_at = now()
+                FROM unnest($1::int[], $2::float8[]) AS p(script_id, price)
+                WHERE sm.script_id = p.script_id
+                """,
+                changed, prices
+            )
+        now = time.perf_counter()
+        for sid, price in zip(changed, prices):
+            sent_at[(sid, price)] = now
+        await asyncio.sleep(tick_seconds)
+
+
+async def run(args):
+    await init_db_pool()
+    watchlist_id = None
+    base_prices = {}
+    try:
+        async with acquire_connection() as conn:
+            rows = await conn.fetch(
+                "SELECT script_id, latest_price FROM script_master WHERE latest_price IS NOT NULL ORDER BY script_id LIMIT $1",
+                args.scripts
+            )
+            base_prices = {r["script_id"]: float(r["latest_price"]) for r in rows}
+            watchlist_id = await conn.fetchval(
+                "INSERT INTO mt_watchlists (user_id, watchlist_name, created_at) VALUES ($1, $2, $3) RETURNING id",
+                args.user_id, f"bench-stream-{time.time_ns()}", utc_now()
+            )
+            now = utc_now()
+            await conn.executemany(
+                "INSERT INTO mt_watchlist_stocks (watchlist_id, script_id, added_price, added_date) VALUES ($1, $2, $3, $4)",
+                [(watchlist_id, sid, price, now) for sid, price in base_prices.items()]
+            )
+
+        token = create_jwt_token(user_id=args.user_id, iat=utc_now(), exp=utc_in(days=1))
+        url = f"{args.base_url}/api/stream_watchlist_prices?watchlist_ids={watchlist_id}"
+        results = Results()
+        sent_at: dict = {}
+        stop = asyncio.Event()
+
+        connector = aiohttp.TCPConnector(limit=0)
+        timeout = aiohttp.ClientTimeout(total=None, sock_read=None)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout,
+                                         headers={"Authorization": f"Bearer {token}"}) as session:
+            tasks = [asyncio.create_task(subscriber(session, url, sent_at, results, stop)) for _ in range(args.subscribers)]
+            while results.connected + results.failed < args.subscribers:
+                await asyncio.sleep(0.2)
+            print(f"{results.connected} subscribers connected ({results.failed} failed), "
+                  f"{len(base_prices)} scripts, driving prices for {args.duration:.0f}s")
+
+            await drive_prices(list(base_prices), base_prices, sent_at, args.tick_seconds, args.duration)
+            await asyncio.sleep(args.drain_seconds)  # let the last ticks reach every subscriber
+            stop.set()
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        latencies = sorted(results.latencies)
+        print(f"events {results.events} | updates {results.updates} | "
+              f"updates per subscriber {results.updates / max(1, results.connected):.0f}")
+        if latencies:
+            print(f"delivery latency p50 {percentile(latencies, 50):.0f} ms | p99 {percentile(latencies, 99):.0f} ms | "
+                  f"max {latencies[-1]:.0f} ms")
+    finally:
+        async with acquire_connection() as conn:
+            if base_prices:
+                await conn.execute(
+                    """
+                    UPDATE script_master AS sm SET latest_price = p.price, updated_at = now()
+                    FROM unnest($1::int[], $2::float8[]) AS p(script_id, price)
+                    WHERE sm.script_id = p.script_id
+                    """,
+                    list(base_prices), list(base_prices.values())
+                )
+            if watchlist_id is not None:
+                await conn.execute("DELETE FROM mt_watchlist_stocks WHERE watchlist_id = $1", watchlist_id)
+                await conn.execute("DELETE FROM mt_watchlists WHERE id = $1", watchlist_id)
+        await close_db_pool()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--user-id", type=int, required=True)
+    parser.add_argument("--subscribers", type=int, default=2000)
+    parser.add_argument("--scripts", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=60)
+    parser.add_argument("--tick-seconds", type=float, default=1)
+    parser.add_argument("--drain-seconds", type=float, default=10)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
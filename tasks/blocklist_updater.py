@@ -1,18 +1,79 @@
 import asyncio
-from db.connection import get_single_connection
+import json
+import os
+import time
+from datetime import timedelta
+from db.connection import acquire_connection
+from db.listener import register_listener
+from utils.user_blocklist import set_blocked_users, apply_blocklist_changes, record_propagation
+
+BLOCKLIST_CHANNEL = "mt_user_blocked_changed"  # db/migrations/004_mt_users_blocked_notify.sql
+BLOCKLIST_SYNC_SECONDS = float(os.getenv("BLOCKLIST_SYNC_SECONDS", "60"))  # delta sync, in case a NOTIFY is missed
+BLOCKLIST_FULL_RELOAD_SECONDS = float(os.getenv("BLOCKLIST_FULL_RELOAD_SECONDS", "14400"))
+# Re-read rows updated slightly before the watermark so late-committing transactions are not missed
+BLOCKLIST_SYNC_OVERLAP = timedelta(seconds=float(os.getenv("BLOCKLIST_SYNC_OVERLAP_SECONDS", "60")))
+
+FULL_QUERY = "SELECT id FROM mt_users WHERE is_blocked = true"
+WATERMARK_QUERY = "SELECT max(updated_at) AS updated_at FROM mt_users"
+DELTA_QUERY = "SELECT id, is_blocked, updated_at FROM mt_users WHERE updated_at > $1"
+
+_resync = asyncio.Event()
+# NOTIFYs that arrive while a sync is reading; re-applied on top of its (possibly older) result
+_notified_during_sync: dict[int, bool] | None = None
+
+def _on_blocked_changed(payload: str | None):
+    if payload is None:
+        # (Re)connected: NOTIFYs may have been missed, reload everything
+        _resync.set()
+        return
+    change = json.loads(payload)
+    user_id, blocked = int(change["id"]), bool(change["blocked"])
+    if _notified_during_sync is not None:
+        _notified_during_sync[user_id] = blocked
+    apply_blocklist_changes({user_id: blocked}, source="notify")
+    record_propagation(float(change["at"]))
+
+register_listener(BLOCKLIST_CHANNEL, _on_blocked_changed)
+
+async def _sync(conn, watermark):
+    """Full reload when watermark is None, otherwise a delta since it. Returns the new watermark candidate."""
+    global _notified_during_sync
+    _notified_during_sync = {}
+    try:
+        if watermark is None:
+            async with conn.transaction(isolation="repeatable_read", readonly=True):
+                rows = await conn.fetch(FULL_QUERY)
+                latest = await conn.fetchval(WATERMARK_QUERY)
+            set_blocked_users([row["id"] for row in rows])
+        else:
+            rows = await conn.fetch(DELTA_QUERY, watermark - BLOCKLIST_SYNC_OVERLAP)
+            latest = max((row["updated_at"] for row in rows if row["updated_at"] is not None), default=None)
+            apply_blocklist_changes({row["id"]: bool(row["is_blocked"]) for row in rows})
+        if _notified_during_sync:
+            apply_blocklist_changes(_notified_during_sync, source="replay")
+    finally:
+        _notified_during_sync = None
+    return latest
 
 async def refresh_blocked_users_forever():
+    watermark = None
+    last_full_reload = 0.0
     while True:
         try:
-            conn = await get_single_connection()
-            rows = await conn.fetch("SELECT id FROM mt_users WHERE is_blocked = true")
-            user_ids = [row["id"] for row in rows]
-
-            from utils.user_blocklist import set_blocked_users
-            set_blocked_users(user_ids)
-
-            await conn.close()
+            full_reload = _resync.is_set() or watermark is None or \
+                time.monotonic() - last_full_reload >= BLOCKLIST_FULL_RELOAD_SECONDS
+            _resync.clear()
+            async with acquire_connection() as conn:
+                latest = await _sync(conn, None if full_reload else watermark)
+            if full_reload:
+                last_full_reload = time.monotonic()
+                watermark = latest
+            elif latest is not None:
+                watermark = max(watermark, latest)
         except Exception as e:
             print(f"[Blocklist Refresh Error] {e}")
 
-        await asyncio.sleep(14400)  # 4 hours
+        try:
+            await asyncio.wait_for(_resync.wait(), timeout=BLOCKLIST_SYNC_SECONDS)
+        except asyncio.TimeoutError:
+            pass
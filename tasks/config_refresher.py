@@ -0,0 +1,29 @@
+import asyncio
+import os
+from db.connection import acquire_connection
+from db.listener import register_listener
+from utils.app_config import load_config
+
+CONFIG_CHANNEL = "mt_config_changed"
+CONFIG_POLL_SECONDS = float(os.getenv("CONFIG_POLL_SECONDS", "300"))  # fallback if a NOTIFY is missed
+
+_changed = asyncio.Event()
+
+def _on_config_changed(payload: str | None):
+    _changed.set()
+
+register_listener(CONFIG_CHANNEL, _on_config_changed)
+
+async def refresh_config_forever():
+    while True:
+        _changed.clear()
+        try:
+            async with acquire_connection() as conn:
+                await load_config(conn)
+        except Exception as e:
+            print(f"[Config Refresh Error] {e}")
+
+        try:
+            await asyncio.wait_for(_changed.wait(), timeout=CONFIG_POLL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
@@ -0,0 +1,17 @@
+import asyncio
+from utils.error_aggregator import ERROR_SUMMARY_WINDOW_SECONDS, take_summary
+from utils.telegram_notifier import notify_internal
+
+async def send_error_summary():
+    summary = take_summary()
+    if summary:
+        await notify_internal(summary)
+
+async def send_error_summaries_forever():
+    """One Telegram summary per window for everything passed to report_error()."""
+    while True:
+        await asyncio.sleep(ERROR_SUMMARY_WINDOW_SECONDS)
+        try:
+            await send_error_summary()
+        except Exception as e:
+            print(f"[Error Summary Error] {e}")
@@ -0,0 +1,15 @@
+import asyncio
+import os
+import time
+from utils.metrics import EVENT_LOOP_LAG, EVENT_LOOP_LAG_LAST
+
+EVENT_LOOP_PROBE_SECONDS = float(os.getenv("EVENT_LOOP_PROBE_SECONDS", "0.5"))
+
+async def monitor_event_loop_lag_forever():
+    """Sleeps a fixed interval and records how late it wakes up: time other coroutines hogged the loop."""
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(EVENT_LOOP_PROBE_SECONDS)
+        lag = max(0.0, time.perf_counter() - started - EVENT_LOOP_PROBE_SECONDS)
+        EVENT_LOOP_LAG.observe(lag)
+        EVENT_LOOP_LAG_LAST.set(lag)
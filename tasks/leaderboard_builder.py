@@ -0,0 +1,37 @@
+import asyncio
+import time
+from utils.app_config import get_config, add_config_listener
+from utils.script_snapshot import get_snapshot, add_snapshot_listener
+from utils.market_leaderboards import build_leaderboards, get_leaderboards, set_leaderboards
+
+_pending = asyncio.Event()
+
+def _on_snapshot_swapped(previous, current, changed_positions):
+    _pending.set()
+
+def _on_config_changed(previous, current):
+    if previous.unusual_volume_threshold != current.unusual_volume_threshold:
+        _pending.set()
+
+add_snapshot_listener(_on_snapshot_swapped)
+add_config_listener(_on_config_changed)
+
+async def build_leaderboards_forever():
+    while True:
+        await _pending.wait()
+        _pending.clear()
+        try:
+            snapshot = get_snapshot()
+            if snapshot is None:
+                continue
+            volume_threshold = (await get_config()).unusual_volume_threshold
+            current = get_leaderboards()
+            if current is not None and current.snapshot is snapshot and current.volume_threshold == volume_threshold:
+                continue
+
+            # Sorting runs off the event loop; requests keep slicing the previous build meanwhile
+            started = time.perf_counter()
+            leaderboards = await asyncio.to_thread(build_leaderboards, snapshot, volume_threshold)
+            set_leaderboards(leaderboards, time.perf_counter() - started)
+        except Exception as e:
+            print(f"[Leaderboard Build Error] {e}")
@@ -0,0 +1,81 @@
+import asyncio
+import json
+import os
+import time
+from datetime import timedelta
+from db.connection import acquire_connection
+from db.listener import register_listener
+from utils.price_alerts import set_price_alerts, apply_price_alert_changes
+
+PRICE_ALERT_CHANNEL = "mt_price_alert_changed"  # db/migrations/007_mt_price_alerts.sql
+PRICE_ALERT_SYNC_SECONDS = float(os.getenv("PRICE_ALERT_SYNC_SECONDS", "60"))  # delta sync, in case a NOTIFY is missed
+# Deletes are only seen via NOTIFY or a full reload
+PRICE_ALERT_FULL_RELOAD_SECONDS = float(os.getenv("PRICE_ALERT_FULL_RELOAD_SECONDS", "14400"))
+# Re-read rows updated slightly before the watermark so late-committing transactions are not missed
+PRICE_ALERT_SYNC_OVERLAP = timedelta(seconds=float(os.getenv("PRICE_ALERT_SYNC_OVERLAP_SECONDS", "60")))
+
+FULL_QUERY = "SELECT id, script_id, alert_type, threshold FROM mt_price_alerts WHERE is_active"
+WATERMARK_QUERY = "SELECT max(updated_at) AS updated_at FROM mt_price_alerts"
+DELTA_QUERY = "SELECT id, script_id, alert_type, threshold, is_active, updated_at FROM mt_price_alerts WHERE updated_at > $1"
+
+_resync = asyncio.Event()
+# NOTIFYs that arrive while a sync is reading; re-applied on top of its (possibly older) result
+_notified_during_sync: list | None = None
+
+def _on_price_alert_changed(payload: str | None):
+    if payload is None:
+        # (Re)connected: NOTIFYs may have been missed, reload everything
+        _resync.set()
+        return
+    change = json.loads(payload)
+    row = (int(change["id"]), int(change["script_id"]), change["alert_type"], change["threshold"], bool(change["active"]))
+    if _notified_during_sync is not None:
+        _notified_during_sync.append(row)
+    apply_price_alert_changes([row], source="notify")
+
+register_listener(PRICE_ALERT_CHANNEL, _on_price_alert_changed)
+
+async def _sync(conn, watermark):
+    """Full reload when watermark is None, otherwise a delta since it. Returns the new watermark candidate."""
+    global _notified_during_sync
+    _notified_during_sync = []
+    try:
+        if watermark is None:
+            async with conn.transaction(isolation="repeatable_read", readonly=True):
+                rows = await conn.fetch(FULL_QUERY)
+                latest = await conn.fetchval(WATERMARK_QUERY)
+            set_price_alerts(rows)
+        else:
+            rows = await conn.fetch(DELTA_QUERY, watermark - PRICE_ALERT_SYNC_OVERLAP)
+            latest = max((row["updated_at"] for row in rows), default=None)
+            apply_price_alert_changes([
+                (row["id"], row["script_id"], row["alert_type"], row["threshold"], row["is_active"]) for row in rows
+            ])
+        if _notified_during_sync:
+            apply_price_alert_changes(_notified_during_sync, source="replay")
+    finally:
+        _notified_during_sync = None
+    return latest
+
+async def refresh_price_alerts_forever():
+    watermark = None
+    last_full_reload = 0.0
+    while True:
+        try:
+            full_reload = _resync.is_set() or watermark is None or \
+                time.monotonic() - last_full_reload >= PRICE_ALERT_FULL_RELOAD_SECONDS
+            _resync.clear()
+            async with acquire_connection() as conn:
+                latest = await _sync(conn, None if full_reload else watermark)
+            if full_reload:
+                last_full_reload = time.monotonic()
+                watermark = latest
+            elif latest is not None:
+                watermark = max(watermark, latest)
+        except Exception as e:
+            print(f"[Price Alert Refresh Error] {e}")
+
+        try:
+            await asyncio.wait_for(_resync.wait(), timeout=PRICE_ALERT_SYNC_SECONDS)
+        except asyncio.TimeoutError:
+            pass
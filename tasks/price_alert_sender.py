@@ -0,0 +1,57 @@
+import asyncio
+import os
+from db.connection import acquire_connection
+from utils.alert_notifier import deliver_alert_triggers
+from utils.price_alerts import triggers_ready, take_triggers, restore_triggers
+from utils.script_snapshot import get_snapshot
+
+PRICE_ALERT_CLAIM_BATCH = int(os.getenv("PRICE_ALERT_CLAIM_BATCH", "5000"))
+PRICE_ALERT_RETRY_SECONDS = float(os.getenv("PRICE_ALERT_RETRY_SECONDS", "5"))
+
+# Every worker evaluates every alert; only the one whose UPDATE flips is_active gets the row back
+CLAIM_QUERY = """
+    UPDATE mt_price_alerts a
+    SET is_active = false, triggered_at = now(), triggered_price = t.price
+    FROM unnest($1::bigint[], $2::float8[]) AS t(id, price)
+    WHERE a.id = t.id AND a.is_active
+    RETURNING a.id, a.user_id, a.script_id, a.alert_type, a.threshold, a.triggered_price, a.triggered_at
+"""
+
+def _chunks(batch: tuple):
+    for start in range(0, len(batch[0]), PRICE_ALERT_CLAIM_BATCH):
+        yield tuple(column[start:start + PRICE_ALERT_CLAIM_BATCH] for column in batch)
+
+def _with_script_details(rows) -> list[dict]:
+    snapshot = get_snapshot()
+    triggers = []
+    for row in rows:
+        trigger = dict(row)
+        i = snapshot.position.get(row["script_id"]) if snapshot is not None else None
+        trigger["companyname"] = snapshot.value("companyname", i) if i is not None else None
+        trigger["changed_percentage"] = snapshot.value("changed_percentage", i) if i is not None else None
+        triggers.append(trigger)
+    return triggers
+
+async def _claim(chunk: tuple) -> list:
+    ids, _, _, _, prices = chunk
+    async with acquire_connection() as conn:
+        return await conn.fetch(CLAIM_QUERY, ids.tolist(), prices.tolist())
+
+async def send_price_alerts_forever():
+    while True:
+        await triggers_ready.wait()
+        triggers_ready.clear()
+        batch = take_triggers()
+        if batch is None:
+            continue
+        for chunk in _chunks(batch):
+            try:
+                rows = await _claim(chunk)
+            except Exception as e:
+                # Unclaimed: re-armed for the next tick that still satisfies them
+                restore_triggers(chunk)
+                print(f"[Price Alert Claim Error] {e}")
+                await asyncio.sleep(PRICE_ALERT_RETRY_SECONDS)
+                continue
+            if rows:
+                await deliver_alert_triggers(_with_script_details(rows))
@@ -0,0 +1,66 @@
+import asyncio
+import time
+from db.connection import acquire_connection
+from utils.app_config import get_config
+from utils.recently_viewed_buffer import (
+    RECENTLY_VIEWED_FLUSH_SECONDS, flush_requested, take_batch, finish_batch
+)
+
+UPSERT_QUERY = """
+    INSERT INTO mt_recently_viewed_scripts (user_id, script_id, viewed_at)
+    SELECT user_id, script_id, viewed_at
+    FROM unnest($1::bigint[], $2::bigint[], $3::timestamptz[]) AS v(user_id, script_id, viewed_at)
+    ON CONFLICT (user_id, script_id)
+    DO UPDATE SET viewed_at = GREATEST(mt_recently_viewed_scripts.viewed_at, EXCLUDED.viewed_at)
+"""
+
+TRIM_QUERY = """
+    DELETE FROM mt_recently_viewed_scripts rv
+    USING (
+        SELECT id, ROW_NUMBER() OVER (PARTITION BY user_id ORDER BY viewed_at DESC) AS position
+        FROM mt_recently_viewed_scripts
+        WHERE user_id = ANY($1::bigint[])
+    ) ranked
+    WHERE rv.id = ranked.id AND ranked.position > $2
+"""
+
+_flush_lock = asyncio.Lock()
+
+async def flush_recently_viewed():
+    """Writes every buffered view in one transaction: one upsert, then one trim for the touched users."""
+    async with _flush_lock:
+        await _flush()
+
+async def _flush():
+    batch = take_batch()
+    if not batch:
+        return
+
+    user_ids, script_ids, viewed_at = [], [], []
+    for user_id, views in batch.items():
+        for script_id, at in views.items():
+            user_ids.append(user_id)
+            script_ids.append(script_id)
+            viewed_at.append(at)
+
+    started = time.perf_counter()
+    try:
+        max_count = (await get_config()).recently_viewed_count
+        async with acquire_connection() as conn:
+            async with conn.transaction():
+                await conn.execute(UPSERT_QUERY, user_ids, script_ids, viewed_at)
+                await conn.execute(TRIM_QUERY, list(batch.keys()), max_count)
+    except Exception as e:
+        finish_batch(False)
+        print(f"[Recently Viewed Flush Error] {e}")
+        return
+    finish_batch(True, len(user_ids), round((time.perf_counter() - started) * 1000, 3))
+
+async def flush_recently_viewed_forever():
+    while True:
+        try:
+            await asyncio.wait_for(flush_requested.wait(), timeout=RECENTLY_VIEWED_FLUSH_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+        flush_requested.clear()
+        await flush_recently_viewed()
@@ -0,0 +1,49 @@
+import asyncio
+import os
+import time
+from datetime import timedelta
+from db.connection import acquire_connection
+from utils.script_snapshot import ScriptSnapshot, SNAPSHOT_SELECT, get_snapshot, set_snapshot
+
+SCRIPT_SNAPSHOT_REFRESH_SECONDS = float(os.getenv("SCRIPT_SNAPSHOT_REFRESH_SECONDS", "5"))
+SCRIPT_SNAPSHOT_FULL_RELOAD_SECONDS = float(os.getenv("SCRIPT_SNAPSHOT_FULL_RELOAD_SECONDS", "1800"))
+# Re-read rows updated slightly before the watermark so late-committing transactions are not missed
+SCRIPT_SNAPSHOT_OVERLAP = timedelta(seconds=float(os.getenv("SCRIPT_SNAPSHOT_OVERLAP_SECONDS", "60")))
+
+# Ordered so positions stay stable across full reloads (lets name-keyed indexes be reused)
+FULL_QUERY = f"SELECT {SNAPSHOT_SELECT} FROM script_master ORDER BY script_id"
+DELTA_QUERY = f"SELECT {SNAPSHOT_SELECT} FROM script_master WHERE updated_at > $1"
+
+async def refresh_script_snapshot_forever():
+    watermark = None
+    last_full_reload = 0.0
+
+    while True:
+        try:
+            current = get_snapshot()
+            full_reload = current is None or watermark is None or \
+                time.monotonic() - last_full_reload >= SCRIPT_SNAPSHOT_FULL_RELOAD_SECONDS
+
+            async with acquire_connection() as conn:
+                if full_reload:
+                    rows = await conn.fetch(FULL_QUERY)
+                else:
+                    rows = await conn.fetch(DELTA_QUERY, watermark - SCRIPT_SNAPSHOT_OVERLAP)
+
+            updated = [row["updated_at"] for row in rows if row["updated_at"] is not None]
+            if updated:
+                watermark = max(updated) if watermark is None else max(watermark, *updated)
+
+            if full_reload:
+                # A full reload also drops scripts deleted from script_master
+                snapshot = ScriptSnapshot.from_records(rows, version=current.version + 1 if current else 1)
+                set_snapshot(snapshot, None)
+                last_full_reload = time.monotonic()
+            else:
+                snapshot, changed = current.apply_changes(rows)
+                if snapshot is not current:
+                    set_snapshot(snapshot, changed)
+        except Exception as e:
+            print(f"[Script Snapshot Refresh Error] {e}")
+
+        await asyncio.sleep(SCRIPT_SNAPSHOT_REFRESH_SECONDS)
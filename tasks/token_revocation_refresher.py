@@ -0,0 +1,46 @@
+import asyncio
+import json
+import os
+import time
+from db.connection import acquire_connection
+from db.listener import register_listener
+from utils.jwt_utils import ACCESS_TOKEN_EXPIRE_MINUTES
+from utils.token_revocations import set_token_revocations, revoke_tokens_before
+
+REVOCATION_CHANNEL = "mt_user_token_revoked"  # db/migrations/005_mt_users_jwt_min_iat.sql
+TOKEN_REVOCATION_RELOAD_SECONDS = float(os.getenv("TOKEN_REVOCATION_RELOAD_SECONDS", "900"))  # fallback if a NOTIFY is missed
+
+# Revocations older than the longest token lifetime cannot match a live token
+LOAD_QUERY = f"""
+    SELECT id, floor(extract(epoch FROM jwt_min_iat))::bigint AS min_iat
+    FROM mt_users
+    WHERE jwt_min_iat > now() - interval '{ACCESS_TOKEN_EXPIRE_MINUTES} minutes'
+"""
+
+_resync = asyncio.Event()
+
+def _on_token_revoked(payload: str | None):
+    if payload is None:
+        # (Re)connected: NOTIFYs may have been missed, reload everything
+        _resync.set()
+        return
+    change = json.loads(payload)
+    revoke_tokens_before(int(change["id"]), int(change["min_iat"]), from_notify=True)
+
+register_listener(REVOCATION_CHANNEL, _on_token_revoked)
+
+async def refresh_token_revocations_forever():
+    while True:
+        _resync.clear()
+        try:
+            async with acquire_connection() as conn:
+                rows = await conn.fetch(LOAD_QUERY)
+            loaded = {row["id"]: row["min_iat"] for row in rows}
+            set_token_revocations(loaded, prune_before=int(time.time()) - ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+        except Exception as e:
+            print(f"[Token Revocation Refresh Error] {e}")
+
+        try:
+            await asyncio.wait_for(_resync.wait(), timeout=TOKEN_REVOCATION_RELOAD_SECONDS)
+        except asyncio.TimeoutError:
+            pass
@@ -0,0 +1,116 @@
+"""
+Delivery of triggered price alerts (tasks/price_alert_sender.py).
+
+The notifier is pluggable: PRICE_ALERT_NOTIFIER picks one of ALERT_NOTIFIERS at startup,
+and set_alert_notifier() swaps in any AlertNotifier (e.g. a push provider). Before a
+batch reaches it, repeats of the same alert (user, script, alert type and threshold) within
+PRICE_ALERT_DEDUPE_SECONDS are dropped, e.g. one re-created right after it fired. Different
+thresholds crossed in one move are separate alerts and each gets its message.
+"""
+import os
+import time
+from abc import ABC, abstractmethod
+from utils.telegram_notifier import _send_to_telegram, escape_markdown
+
+PRICE_ALERT_NOTIFIER = os.getenv("PRICE_ALERT_NOTIFIER", "log")
+PRICE_ALERT_TELEGRAM_CHAT_ID = os.getenv("PRICE_ALERT_TELEGRAM_CHAT_ID")
+PRICE_ALERT_DEDUPE_SECONDS = float(os.getenv("PRICE_ALERT_DEDUPE_SECONDS", "300"))
+
+ALERT_DESCRIPTIONS = {
+    "price_above": "price rose to {price} (alert at {threshold})",
+    "price_below": "price fell to {price} (alert at {threshold})",
+    "change_above": "is up {change}% today (alert at {threshold}%)",
+    "change_below": "is down {change}% today (alert at {threshold}%)",
+    "high_52": "hit a 52-week high at {price}",
+    "low_52": "hit a 52-week low at {price}",
+}
+
+_last_sent: dict[tuple, float] = {}  # (user_id, script_id, alert_type, threshold) -> monotonic time
+_last_pruned = 0.0
+_stats = {"batches": 0, "delivered": 0, "deduplicated": 0, "failed": 0}
+
+
+def describe_trigger(trigger: dict) -> str:
+    """One line, e.g. "RELIANCE price rose to 2950.5 (alert at 2950)"."""
+    return f"{trigger['companyname'] or trigger['script_id']} " + ALERT_DESCRIPTIONS[trigger["alert_type"]].format(
+        price=trigger["triggered_price"], threshold=trigger["threshold"], change=trigger["changed_percentage"]
+    )
+
+
+class AlertNotifier(ABC):
+    """Sends a batch of triggers: dicts with id, user_id, script_id, companyname, alert_type, threshold,
+    triggered_price, changed_percentage, triggered_at. Raising marks the whole batch failed."""
+    name = "base"
+
+    @abstractmethod
+    async def send(self, triggers: list[dict]):
+        ...
+
+
+class LogAlertNotifier(AlertNotifier):
+    name = "log"
+
+    async def send(self, triggers: list[dict]):
+        for trigger in triggers:
+            print(f"[Price Alert] user {trigger['user_id']}: {describe_trigger(trigger)}")
+
+
+class TelegramAlertNotifier(AlertNotifier):
+    """Posts to PRICE_ALERT_TELEGRAM_CHAT_ID through the shared Telegram queue (rate limits apply)."""
+    name = "telegram"
+
+    async def send(self, triggers: list[dict]):
+        if not PRICE_ALERT_TELEGRAM_CHAT_ID:
+            raise RuntimeError("PRICE_ALERT_TELEGRAM_CHAT_ID is not set")
+        for trigger in triggers:
+            await _send_to_telegram(
+                PRICE_ALERT_TELEGRAM_CHAT_ID,
+                escape_markdown(f"🔔 user {trigger['user_id']}: {describe_trigger(trigger)}")
+            )
+
+
+ALERT_NOTIFIERS = {notifier.name: notifier for notifier in (LogAlertNotifier, TelegramAlertNotifier)}
+
+_notifier: AlertNotifier = ALERT_NOTIFIERS.get(PRICE_ALERT_NOTIFIER, LogAlertNotifier)()
+
+
+def set_alert_notifier(notifier: AlertNotifier):
+    global _notifier
+    _notifier = notifier
+
+
+def _dedupe(triggers: list[dict]) -> list[dict]:
+    global _last_pruned
+    now = time.monotonic()
+    if now - _last_pruned >= PRICE_ALERT_DEDUPE_SECONDS:
+        _last_pruned = now
+        for key in [key for key, sent_at in _last_sent.items() if now - sent_at >= PRICE_ALERT_DEDUPE_SECONDS]:
+            del _last_sent[key]
+    kept = []
+    for trigger in triggers:
+        key = (trigger["user_id"], trigger["script_id"], trigger["alert_type"], trigger["threshold"])
+        sent_at = _last_sent.get(key)
+        if sent_at is not None and now - sent_at < PRICE_ALERT_DEDUPE_SECONDS:
+            _stats["deduplicated"] += 1
+            continue
+        _last_sent[key] = now
+        kept.append(trigger)
+    return kept
+
+
+async def deliver_alert_triggers(triggers: list[dict]):
+    """Dedupes and hands triggers to the notifier. Claimed alerts are not retried: a failure is logged and counted."""
+    triggers = _dedupe(triggers)
+    if not triggers:
+        return
+    _stats["batches"] += 1
+    try:
+        await _notifier.send(triggers)
+        _stats["delivered"] += len(triggers)
+    except Exception as e:
+        _stats["failed"] += len(triggers)
+        print(f"[Price Alert Notifier Error] {_notifier.name}: {e}")
+
+
+def alert_notifier_stats() -> dict:
+    return {**_stats, "notifier": _notifier.name, "dedupe_keys": len(_last_sent)}
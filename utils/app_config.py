@@ -0,0 +1,83 @@
+from dataclasses import dataclass, field
+import time
+from utils.metrics import Gauge
+
+CONFIG_QUERY = "SELECT * FROM mt_config LIMIT 1"
+
+@dataclass(frozen=True)
+class MtConfig:
+    unusual_volume_threshold: int
+    recently_viewed_count: int
+    number_of_stocks_in_watchlist_for_free_users: int
+    watchlist_count_for_free_users: int
+    gst: float
+    min_supported_version_android: str
+    latest_version_android: str
+    min_supported_version_ios: str
+    latest_version_ios: str
+    raw: dict = field(default_factory=dict, repr=False)
+
+    @classmethod
+    def from_row(cls, row) -> "MtConfig":
+        raw = dict(row)
+        return cls(
+            unusual_volume_threshold=int(raw.get("unusual_volume_threshold") or 0),
+            recently_viewed_count=int(raw.get("recently_viewed_count") or 20),
+            number_of_stocks_in_watchlist_for_free_users=int(raw.get("number_of_stocks_in_watchlist_for_free_users") or 0),
+            watchlist_count_for_free_users=int(raw.get("watchlist_count_for_free_users") or 0),
+            gst=float(raw.get("gst") or 0),
+            min_supported_version_android=raw.get("min_supported_version_android"),
+            latest_version_android=raw.get("latest_version_android"),
+            min_supported_version_ios=raw.get("min_supported_version_ios"),
+            latest_version_ios=raw.get("latest_version_ios"),
+            raw=raw,
+        )
+
+_config: MtConfig | None = None
+_loaded_at: float = 0.0
+_refresh_count: int = 0
+_listeners: list = []
+
+def add_config_listener(callback):
+    """callback(previous, current) runs after a reload that actually changed mt_config."""
+    _listeners.append(callback)
+
+async def load_config(conn) -> MtConfig:
+    """Reads mt_config and swaps in the new snapshot."""
+    global _config, _loaded_at, _refresh_count
+    row = await conn.fetchrow(CONFIG_QUERY)
+    if not row:
+        raise Exception("Config not found in mt_config")
+    previous, _config = _config, MtConfig.from_row(row)
+    _loaded_at = time.monotonic()
+    _refresh_count += 1
+    if previous is not None and previous != _config:
+        for callback in _listeners:
+            try:
+                callback(previous, _config)
+            except Exception as e:
+                print(f"[Config Listener Error] {e}")
+    return _config
+
+async def get_config(conn=None) -> MtConfig:
+    """Returns the in-memory mt_config snapshot, loading it through conn only if it was never loaded."""
+    if _config is not None:
+        return _config
+    if conn is None:
+        from db.connection import acquire_connection
+        async with acquire_connection() as conn:
+            return await load_config(conn)
+    return await load_config(conn)
+
+def config_age_seconds() -> float | None:
+    return round(time.monotonic() - _loaded_at, 3) if _config is not None else None
+
+Gauge("config_age_seconds", "Seconds since the mt_config snapshot was loaded", callback=config_age_seconds)
+Gauge("config_refresh_count", "mt_config snapshot loads since startup", callback=lambda: _refresh_count)
+
+def config_stats() -> dict:
+    return {
+        "loaded": _config is not None,
+        "age_seconds": config_age_seconds(),
+        "refresh_count": _refresh_count,
+    }
@@ -1,33 +1,104 @@
 from fastapi import Request, HTTPException, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import jwt
+from collections import OrderedDict
 from utils.user_blocklist import is_user_blocked
+from utils.token_revocations import is_token_revoked
+import hashlib
 import os
+import time
 from dotenv import load_dotenv
 
+try:
+    import jwt as pyjwt  # optional: PyJWT verifies HS256 several times faster than python-jose
+except ImportError:
+    pyjwt = None
+
 load_dotenv()
 
 JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "fallback_monktrader_dev_key")
 ALGORITHM = "HS256"
+INTERNAL_API_KEY = os.getenv("INTERNAL_API_KEY")
+AUTH_TOKEN_CACHE_MAX_ENTRIES = int(os.getenv("AUTH_TOKEN_CACHE_MAX_ENTRIES", "50000"))  # 0 disables the cache
 
 security = HTTPBearer()
 
+# sha256(token) -> (payload, exp); least recently used first. Only signature-verified payloads go in.
+_verified_tokens: OrderedDict = OrderedDict()
+_token_cache_stats = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0}
+
+def _decode_token(token: str) -> dict:
+    if pyjwt is not None:
+        try:
+            return pyjwt.decode(token, JWT_SECRET_KEY, algorithms=[ALGORITHM])
+        except pyjwt.ExpiredSignatureError as e:
+            raise jwt.ExpiredSignatureError(str(e))
+    return jwt.decode(token, JWT_SECRET_KEY, algorithms=[ALGORITHM])
+
+def verify_access_token(token: str) -> dict:
+    """Decodes and verifies token, reusing an earlier verification of the same token until its exp."""
+    if AUTH_TOKEN_CACHE_MAX_ENTRIES <= 0:
+        return _decode_token(token)
+
+    digest = hashlib.sha256(token.encode()).digest()
+    entry = _verified_tokens.get(digest)
+    if entry is not None:
+        payload, exp = entry
+        if time.time() < exp:
+            _token_cache_stats["hits"] += 1
+            _verified_tokens.move_to_end(digest)
+            return payload
+        # Expired since it was cached: drop it and let the decode below raise ExpiredSignatureError
+        _token_cache_stats["expired"] += 1
+        del _verified_tokens[digest]
+
+    _token_cache_stats["misses"] += 1
+    payload = _decode_token(token)
+    exp = payload.get("exp")
+    if isinstance(exp, (int, float)):
+        _verified_tokens[digest] = (payload, exp)
+        if len(_verified_tokens) > AUTH_TOKEN_CACHE_MAX_ENTRIES:
+            _verified_tokens.popitem(last=False)
+            _token_cache_stats["evictions"] += 1
+    return payload
+
+def token_cache_stats() -> dict:
+    return {
+        **_token_cache_stats,
+        "entries": len(_verified_tokens),
+        "max_entries": AUTH_TOKEN_CACHE_MAX_ENTRIES,
+        "backend": "pyjwt" if pyjwt is not None else "python-jose",
+    }
+
 async def authorize_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     token = credentials.credentials
 
     try:
-        payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=[ALGORITHM])
+        payload = verify_access_token(token)
         user_id = payload.get("user_id")
 
         if not user_id:
             raise HTTPException(status_code=401, detail="Invalid token payload")
 
+        # Checked on every request, cached or not
         if is_user_blocked(user_id):
             raise HTTPException(status_code=403, detail="User is blocked")
 
-        return payload
+        # Issued up to the user's last logout
+        if is_token_revoked(user_id, payload.get("iat")):
+            raise HTTPException(status_code=401, detail="Token has been revoked")
 
+        # Callers get their own copy; the cached payload is shared
+        return dict(payload)
+
+    except HTTPException:
+        raise
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token has expired")
     except Exception:
         raise HTTPException(status_code=401, detail="Invalid or expired token")
+
+async def authorize_internal(request: Request):
+    """Guards internal/ops endpoints with the X-Internal-Key header. Disabled when INTERNAL_API_KEY is unset."""
+    if not INTERNAL_API_KEY or request.headers.get("X-Internal-Key") != INTERNAL_API_KEY:
+        raise HTTPException(status_code=404, detail="Not Found")
@@ -1,53 +1,64 @@
-import requests
 import os
 from jose import jwt
 from dotenv import load_dotenv
+from utils.jwks_cache import JwksCache
 
 # Load environment variables from .env file
 load_dotenv()
 
 # --- CONFIG ---
 GOOGLE_CLIENT_ID = os.getenv("GOOGLE_CLIENT_ID")
+GOOGLE_KEYS_URL = os.getenv("GOOGLE_KEYS_URL", "https://www.googleapis.com/oauth2/v3/certs")
+GOOGLE_ISSUERS = ("accounts.google.com", "https://accounts.google.com")
 APPLE_CLIENT_ID = os.getenv("APPLE_CLIENT_ID")
-APPLE_KEYS_URL = os.getenv("APPLE_KEYS_URL")
+APPLE_KEYS_URL = os.getenv("APPLE_KEYS_URL", "https://appleid.apple.com/auth/keys")
+APPLE_ISSUER = "https://appleid.apple.com"
+
+google_keys = JwksCache("Google", GOOGLE_KEYS_URL)
+apple_keys = JwksCache("Apple", APPLE_KEYS_URL)
 
 # --- VERIFICATION FUNCTIONS ---
 
-def verify_google_token(id_token: str) -> dict:
+async def _verify_id_token(id_token: str, keys: JwksCache, audience: str, issuer) -> dict:
+    header = jwt.get_unverified_header(id_token)
+    if header.get("alg") != "RS256":
+        raise ValueError(f"Unexpected signing algorithm {header.get('alg')}")
+    key = await keys.get_key(header.get("kid"))
+    return jwt.decode(
+        id_token,
+        key,
+        algorithms=["RS256"],
+        audience=audience,
+        issuer=issuer,
+        # at_hash binds the ID token to an access token we never receive
+        options={"verify_at_hash": False}
+    )
+
+async def verify_google_token(id_token: str) -> dict:
     """
-    Verifies a Google ID token and returns the payload if valid.
+    Verifies a Google ID token locally against Google's cached public keys and returns the payload.
     """
     try:
-        response = requests.get(
-            f"https://oauth2.googleapis.com/tokeninfo?id_token={id_token}",
-            timeout=5
-        )
-        if response.status_code == 200:
-            payload = response.json()
-            if payload.get("aud") != GOOGLE_CLIENT_ID:
-                raise ValueError("Invalid audience in Google token")
-            return payload
-        raise ValueError("Invalid token response from Google")
+        return await _verify_id_token(id_token, google_keys, GOOGLE_CLIENT_ID, GOOGLE_ISSUERS)
     except Exception as e:
         raise Exception(f"Google token verification failed: {e}")
 
-def verify_apple_token(id_token: str) -> dict:
+async def verify_apple_token(id_token: str) -> dict:
     """
-    Verifies an Apple ID token by decoding its JWT and validating against Apple's public keys.
+    Verifies an Apple ID token locally against Apple's cached public keys and returns the payload.
     """
     try:
-        jwks_client = PyJWKClient(APPLE_KEYS_URL)
-        signing_key = jwks_client.get_signing_key_from_jwt(id_token)
-
-        decoded_token = jwt.decode(
-            id_token,
-            signing_key.key,
-            algorithms=["RS256"],
-            audience=APPLE_CLIENT_ID,
-            issuer="https://appleid.apple.com"
-        )
-
-        return decoded_token
-
+        return await _verify_id_token(id_token, apple_keys, APPLE_CLIENT_ID, APPLE_ISSUER)
     except Exception as e:
         raise Exception(f"Apple token verification failed: {e}")
+
+async def warm_provider_keys():
+    """Startup: fetch both key sets so the first login does not pay for it."""
+    for keys in (google_keys, apple_keys):
+        try:
+            await keys.refresh()
+        except Exception as e:
+            print(f"[{keys.name} JWKS Warm-up Error] {e}")
+
+def provider_keys_stats() -> dict:
+    return {"google": google_keys.stats(), "apple": apple_keys.stats()}
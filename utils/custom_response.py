@@ -1,7 +1,44 @@
 from fastapi.responses import ORJSONResponse
+from decimal import Decimal
 from typing import Any
+import orjson
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+def encode_default(value):
+    """orjson fallback for types it does not know; Decimals are encoded like FastAPI's jsonable_encoder."""
+    if isinstance(value, Decimal):
+        return int(value) if value.as_tuple().exponent >= 0 else float(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+def json_fragment(value) -> orjson.Fragment:
+    """Serializes a value once so it can be spliced into later responses as-is (e.g. from a cache)."""
+    return orjson.Fragment(orjson.dumps(value, default=encode_default, option=ORJSON_OPTIONS))
+
+def raw_json(text) -> orjson.Fragment | None:
+    """
+    Wraps JSON text from Postgres (jsonb/json columns arrive as str) so the response splices
+    it in without decoding. Rows that still hold a double-encoded string ("{\\"a\\": 1}")
+    are unwrapped once; db/migrations/003 normalizes those.
+    """
+    if text is None:
+        return None
+    if not isinstance(text, (str, bytes)):
+        return json_fragment(text)
+    if text.lstrip()[:1] in ('"', b'"'):
+        inner = orjson.loads(text)
+        try:
+            orjson.loads(inner)  # validate: the fragment is embedded verbatim
+            return orjson.Fragment(inner)
+        except orjson.JSONDecodeError:
+            pass  # a genuine JSON string value, not an encoded document
+    return orjson.Fragment(text)
 
 class CustomJSONResponse(ORJSONResponse):
+    """
+    Return it directly (instead of a dict) when content holds orjson.Fragment values:
+    FastAPI's jsonable_encoder only runs on plain return values and cannot handle fragments.
+    """
     def render(self, content: Any) -> bytes:
         if isinstance(content, dict) and (
             "statusCode" not in content and
@@ -9,11 +46,10 @@ class CustomJSONResponse(ORJSONResponse):
             "message" not in content and
             "data" not in content
         ):
-            wrapped = {
+            content = {
                 "statusCode": 200,
                 "status": True,
                 "message": "Success",
                 "data": content
             }
-            return super().render(wrapped)
-        return super().render(content)
+        return orjson.dumps(content, default=encode_default, option=ORJSON_OPTIONS)
@@ -0,0 +1,166 @@
+"""
+Groups errors by fingerprint (exception type + route + source + normalized message) so an
+outage produces one Telegram summary per window instead of one alert per failed request.
+
+    except Exception as e:
+        report_error("GetWatchlists Error", e)
+
+report_error() is synchronous and only touches a dict; the summary is sent by
+tasks/error_summary_sender.py. GET /internal/errors shows the same aggregates.
+
+Fingerprints quiet for ERROR_AGGREGATOR_IDLE_WINDOWS windows are dropped by take_summary(),
+and a full table evicts its least recently seen quiet entry, so new errors keep their own
+fingerprint. Only when every entry has errors in the current window do new ones share the
+"(other)" fingerprint, which is counted per window like any other.
+"""
+import os
+import re
+import time
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+ERROR_SUMMARY_WINDOW_SECONDS = float(os.getenv("ERROR_SUMMARY_WINDOW_SECONDS", "60"))
+ERROR_AGGREGATOR_MAX_FINGERPRINTS = int(os.getenv("ERROR_AGGREGATOR_MAX_FINGERPRINTS", "500"))
+ERROR_AGGREGATOR_IDLE_WINDOWS = int(os.getenv("ERROR_AGGREGATOR_IDLE_WINDOWS", "10"))
+SAMPLE_MESSAGE_LENGTH = 300
+OVERFLOW_FINGERPRINT = ("(other)", "(other)", "(other)", "too many distinct errors")
+
+# Request path of the current request, so errors raised deep in db helpers still carry their route
+current_route: ContextVar[str] = ContextVar("current_route", default="-")
+
+_NORMALIZERS = [
+    (re.compile(r"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}"), "<uuid>"),
+    (re.compile(r"'[^']*'|\"[^\"]*\""), "'<s>'"),
+    (re.compile(r"\b0x[0-9a-fA-F]+\b"), "<hex>"),
+    (re.compile(r"\d+(\.\d+)?"), "<n>"),
+]
+
+# fingerprint -> {"count", "window_count", "first_seen", "last_seen", "sample"}
+_errors: dict[tuple, dict] = {}
+_stats = {"reported": 0, "summaries_sent": 0, "overflowed": 0, "evicted": 0, "expired": 0}
+
+
+# raw message -> normalized; an error storm usually repeats the exact same text
+_normalized_cache: dict[str, str] = {}
+
+
+def normalize_message(message: str) -> str:
+    normalized = _normalized_cache.get(message)
+    if normalized is None:
+        normalized = message[:SAMPLE_MESSAGE_LENGTH]
+        for pattern, replacement in _NORMALIZERS:
+            normalized = pattern.sub(replacement, normalized)
+        if len(_normalized_cache) >= ERROR_AGGREGATOR_MAX_FINGERPRINTS:
+            _normalized_cache.clear()
+        _normalized_cache[message] = normalized
+    return normalized
+
+
+def report_error(source: str, exc: BaseException | str, route: str | None = None):
+    """Counts one occurrence; never raises and never awaits."""
+    try:
+        message = str(exc)
+        error_type = "message" if isinstance(exc, str) else type(exc).__name__
+        fingerprint = (error_type, route or current_route.get(), source, normalize_message(message))
+
+        entry = _errors.get(fingerprint)
+        if entry is None:
+            if len(_errors) >= ERROR_AGGREGATOR_MAX_FINGERPRINTS and not _evict_quiet_entry():
+                _stats["overflowed"] += 1
+                fingerprint = OVERFLOW_FINGERPRINT
+                entry = _errors.get(fingerprint)
+            if entry is None:
+                entry = _errors[fingerprint] = {
+                    "count": 0, "window_count": 0, "first_seen": time.time(), "sample": message[:SAMPLE_MESSAGE_LENGTH],
+                }
+        entry["count"] += 1
+        entry["window_count"] += 1
+        entry["last_seen"] = time.time()
+        _stats["reported"] += 1
+    except Exception as e:
+        print(f"[Error Aggregator Error] {e}")
+
+
+def _evict_quiet_entry() -> bool:
+    """Drops the least recently seen entry already summarised (window_count 0); False if there is none."""
+    quiet = [(entry["last_seen"], fingerprint) for fingerprint, entry in _errors.items() if not entry["window_count"]]
+    if not quiet:
+        return False
+    del _errors[min(quiet)[1]]
+    _stats["evicted"] += 1
+    return True
+
+
+def _expire_idle_entries():
+    cutoff = time.time() - ERROR_AGGREGATOR_IDLE_WINDOWS * ERROR_SUMMARY_WINDOW_SECONDS
+    for fingerprint in [fp for fp, entry in _errors.items() if not entry["window_count"] and entry["last_seen"] < cutoff]:
+        del _errors[fingerprint]
+        _stats["expired"] += 1
+
+
+def _format_time(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def take_summary() -> str | None:
+    """Builds the message for errors seen since the last call and resets the window counters."""
+    _expire_idle_entries()
+    seen = [(fingerprint, entry) for fingerprint, entry in _errors.items() if entry["window_count"]]
+    if not seen:
+        return None
+
+    seen.sort(key=lambda item: item[1]["window_count"], reverse=True)
+    total = sum(entry["window_count"] for _, entry in seen)
+    lines = [f"[Error Summary] {total} errors, {len(seen)} distinct, last {int(ERROR_SUMMARY_WINDOW_SECONDS)}s"]
+    for (error_type, route, source, _), entry in seen:
+        lines.append(
+            f"{entry['window_count']}x [{source}] {error_type} on {route}: {entry['sample']}\n"
+            f"  first {_format_time(entry['first_seen'])}, last {_format_time(entry['last_seen'])} UTC, "
+            f"{entry['count']} total"
+        )
+        entry["window_count"] = 0
+    _stats["summaries_sent"] += 1
+    return "\n".join(lines)
+
+
+def error_aggregates(limit: int = 100) -> list[dict]:
+    entries = sorted(_errors.items(), key=lambda item: item[1]["last_seen"], reverse=True)[:limit]
+    return [
+        {
+            "type": error_type,
+            "route": route,
+            "source": source,
+            "message": normalized,
+            "sample": entry["sample"],
+            "count": entry["count"],
+            "window_count": entry["window_count"],
+            "first_seen": _format_time(entry["first_seen"]),
+            "last_seen": _format_time(entry["last_seen"]),
+        }
+        for (error_type, route, source, normalized), entry in entries
+    ]
+
+
+def error_aggregator_stats() -> dict:
+    return {
+        **_stats,
+        "fingerprints": len(_errors),
+        "max_fingerprints": ERROR_AGGREGATOR_MAX_FINGERPRINTS,
+        "window_seconds": ERROR_SUMMARY_WINDOW_SECONDS,
+    }
+
+
+class ErrorRouteMiddleware:
+    """Pure ASGI middleware that records the request path in current_route."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        token = current_route.set(scope["path"])
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_route.reset(token)
@@ -0,0 +1,104 @@
+"""
+In-process cache of an identity provider's signing keys (JWKS), so ID tokens are verified
+locally instead of with a network call per login.
+
+- Keys are kept for the Cache-Control max-age the provider sends (default_ttl otherwise).
+- A token signed with an unknown kid triggers one refetch (providers rotate keys), at most
+  once per min_refresh_seconds so garbage tokens cannot hammer the provider.
+- If a refetch fails the previous keys keep serving.
+"""
+import asyncio
+import re
+import time
+
+import aiohttp
+from jose import jwk
+
+MAX_AGE_PATTERN = re.compile(r"max-age=(\d+)")
+FETCH_TIMEOUT_SECONDS = 5
+
+
+def parse_max_age(cache_control: str | None) -> int | None:
+    if not cache_control or "no-store" in cache_control or "no-cache" in cache_control:
+        return None
+    match = MAX_AGE_PATTERN.search(cache_control)
+    return int(match.group(1)) if match else None
+
+
+class JwksCache:
+    def __init__(self, name: str, url: str, default_ttl: float = 3600, min_refresh_seconds: float = 30):
+        self.name = name
+        self.url = url
+        self.default_ttl = default_ttl
+        self.min_refresh_seconds = min_refresh_seconds
+        self._keys: dict = {}  # kid -> jose Key, constructed once per fetch
+        self._expires_at = 0.0
+        self._fetched_at = 0.0
+        self._refresh: asyncio.Task | None = None
+        self._stats = {"fetches": 0, "fetch_errors": 0, "unknown_kid_refreshes": 0, "unknown_kid_rejections": 0}
+
+    async def get_key(self, kid: str):
+        """Returns the verification key for kid, refreshing the key set if needed. Raises KeyError if unknown."""
+        now = time.monotonic()
+        if now >= self._expires_at:
+            await self.refresh()
+        elif kid not in self._keys:
+            if now - self._fetched_at < self.min_refresh_seconds:
+                self._stats["unknown_kid_rejections"] += 1
+                raise KeyError(f"Unknown {self.name} signing key: {kid}")
+            self._stats["unknown_kid_refreshes"] += 1
+            await self.refresh()
+
+        key = self._keys.get(kid)
+        if key is None:
+            raise KeyError(f"Unknown {self.name} signing key: {kid}")
+        return key
+
+    async def refresh(self):
+        """Refetches the key set; concurrent callers share one fetch."""
+        if self._refresh is None:
+            self._refresh = asyncio.get_running_loop().create_task(self._fetch())
+            self._refresh.add_done_callback(self._refresh_done)
+        await asyncio.shield(self._refresh)
+
+    def _refresh_done(self, task: asyncio.Task):
+        self._refresh = None
+        if not task.cancelled():
+            task.exception()
+
+    async def _fetch(self):
+        self._stats["fetches"] += 1
+        try:
+            async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=FETCH_TIMEOUT_SECONDS)) as session:
+                async with session.get(self.url) as resp:
+                    resp.raise_for_status()
+                    body = await resp.json(content_type=None)
+                    max_age = parse_max_age(resp.headers.get("Cache-Control"))
+
+            keys = {}
+            for key_data in body.get("keys", []):
+                if key_data.get("kty") == "RSA" and "kid" in key_data:
+                    keys[key_data["kid"]] = jwk.construct(key_data, key_data.get("alg", "RS256"))
+            if not keys:
+                raise ValueError("JWKS response has no RSA keys")
+        except Exception as e:
+            self._stats["fetch_errors"] += 1
+            self._fetched_at = time.monotonic()
+            if self._keys:
+                # Keep the previous keys and retry after min_refresh_seconds
+                self._expires_at = self._fetched_at + self.min_refresh_seconds
+                print(f"[{self.name} JWKS Refresh Error] {e}")
+                return
+            raise
+
+        self._keys = keys
+        self._fetched_at = time.monotonic()
+        self._expires_at = self._fetched_at + (max_age if max_age is not None else self.default_ttl)
+
+    def stats(self) -> dict:
+        return {
+            **self._stats,
+            "url": self.url,
+            "kids": list(self._keys),
+            "expires_in_seconds": round(max(0.0, self._expires_at - time.monotonic()), 1),
+        }
@@ -0,0 +1,136 @@
+"""
+Precomputed get_market_trends leaderboards.
+
+After every script_master snapshot swap, tasks/leaderboard_builder.py sorts each trend
+once over the whole snapshot and splits the ordered positions per exchange and
+company size, so a request only slices [offset:offset + limit].
+"""
+import time
+import numpy as np
+from utils.metrics import Histogram
+
+TRENDS = ("gainers", "losers", "active", "unusual_volume", "high_52", "low_52", "ath", "atl")
+COMPANY_SIZES = ("Small Cap", "Mid Cap", "Large Cap")
+
+ONE_YEAR_SECONDS = 365 * 24 * 3600
+
+
+def trend_order(snapshot, trend: str, volume_threshold) -> np.ndarray:
+    """Positions matching a trend across all exchanges/sizes, in the order the SQL path returns them."""
+    price = snapshot["latest_price"]
+    mask = snapshot.not_null("latest_price")
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        if trend == "gainers":
+            mask &= snapshot["changed_percentage"] > 0
+            key, descending = snapshot["changed_percentage"], True
+        elif trend == "losers":
+            mask &= snapshot["changed_percentage"] < 0
+            key, descending = snapshot["changed_percentage"], False
+        elif trend == "active":
+            mask &= snapshot["volume"] >= volume_threshold
+            key, descending = snapshot["volume"], True
+        elif trend == "unusual_volume":
+            volume, average = snapshot["volume"], snapshot["volume_moving_average"]
+            mask &= (volume >= average * 2) & (volume >= volume_threshold)
+            # NULLIF(volume_moving_average, 0) sorts first under DESC in Postgres
+            key, descending = np.where(average > 0, volume / average, np.inf), True
+        else:
+            year_ago = time.time() - ONE_YEAR_SECONDS
+            if trend in ("high_52", "ath"):
+                mask &= price >= snapshot["alltime_high"]
+                if trend == "high_52":
+                    mask &= snapshot["alltime_high_date"] >= year_ago
+            else:
+                mask &= price <= snapshot["alltime_low"]
+                if trend == "low_52":
+                    mask &= snapshot["alltime_low_date"] >= year_ago
+            key, descending = snapshot["companyname_lower"], False
+
+    return snapshot.order(np.flatnonzero(mask), key, descending)
+
+
+def _code_mask(snapshot, codes: np.ndarray, column: str, label) -> np.ndarray:
+    if label is None:
+        return np.ones(len(codes), dtype=bool)
+    code = snapshot.category_code(column, label)
+    if code is None:
+        return np.zeros(len(codes), dtype=bool)
+    return codes == code
+
+
+def trend_indices(snapshot, trend: str, exchange: str | None, company_size: str | None, volume_threshold) -> np.ndarray:
+    """On-the-fly equivalent of one leaderboard, used until the first build finishes."""
+    ordered = trend_order(snapshot, trend, volume_threshold)
+    keep = _code_mask(snapshot, snapshot["exchange"][ordered], "exchange", exchange)
+    keep &= _code_mask(snapshot, snapshot["company_size"][ordered], "company_size", company_size)
+    return ordered[keep]
+
+
+class Leaderboards:
+    def __init__(self, snapshot, volume_threshold, boards: dict):
+        self.snapshot = snapshot
+        self.volume_threshold = volume_threshold
+        self.boards = boards
+
+    def page(self, trend: str, exchange: str | None, company_size: str | None, offset: int, limit: int) -> np.ndarray:
+        ordered = self.boards.get((trend, exchange, company_size))
+        if ordered is None:
+            return np.empty(0, dtype=np.int64)
+        return ordered[offset:offset + limit]
+
+
+def build_leaderboards(snapshot, volume_threshold) -> Leaderboards:
+    """All trends x (any + each exchange) x (any + each company size). Pure NumPy; safe to run in a thread."""
+    exchanges = (None,) + tuple(label for label in snapshot.labels["exchange"] if label)
+    sizes = (None,) + COMPANY_SIZES
+    boards = {}
+    for trend in TRENDS:
+        ordered = trend_order(snapshot, trend, volume_threshold)
+        exchange_codes = snapshot["exchange"][ordered]
+        size_codes = snapshot["company_size"][ordered]
+        size_masks = {size: _code_mask(snapshot, size_codes, "company_size", size) for size in sizes}
+        for exchange in exchanges:
+            exchange_mask = _code_mask(snapshot, exchange_codes, "exchange", exchange)
+            for size in sizes:
+                boards[(trend, exchange, size)] = ordered[exchange_mask & size_masks[size]]
+    return Leaderboards(snapshot, volume_threshold, boards)
+
+
+BUILD_SECONDS = Histogram("leaderboard_build_seconds", "get_market_trends leaderboard build time per snapshot swap",
+                          buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0))
+REFRESH_LATENCY = Histogram("leaderboard_refresh_latency_seconds",
+                            "Snapshot as_of -> leaderboards ready on this worker")
+
+_leaderboards: Leaderboards | None = None
+_stats = {
+    "builds": 0,
+    "last_build_ms": None,
+    "last_refresh_latency_ms": None,
+    "max_refresh_latency_ms": None,
+}
+
+
+def get_leaderboards() -> Leaderboards | None:
+    return _leaderboards
+
+
+def set_leaderboards(leaderboards: Leaderboards, build_seconds: float):
+    """Swaps in a finished build and records build time and snapshot-to-ready latency."""
+    global _leaderboards
+    _leaderboards = leaderboards
+    latency_ms = (time.time() - leaderboards.snapshot.as_of.timestamp()) * 1000
+    BUILD_SECONDS.observe(build_seconds)
+    REFRESH_LATENCY.observe(latency_ms / 1000)
+    _stats["builds"] += 1
+    _stats["last_build_ms"] = round(build_seconds * 1000, 3)
+    _stats["last_refresh_latency_ms"] = round(latency_ms, 3)
+    _stats["max_refresh_latency_ms"] = round(max(latency_ms, _stats["max_refresh_latency_ms"] or 0), 3)
+
+
+def leaderboard_stats() -> dict:
+    return {
+        **_stats,
+        "snapshot_version": _leaderboards.snapshot.version if _leaderboards else None,
+        "boards": len(_leaderboards.boards) if _leaderboards else 0,
+    }
@@ -0,0 +1,245 @@
+"""
+In-process metrics in the Prometheus text exposition format, served by GET /metrics (internal).
+
+    REQUESTS = Counter("http_requests_total", "Requests", ("method", "route", "status"))
+    REQUESTS.inc(("GET", "/api/get_scanners", "200"))
+
+Histograms also export estimated p50/p95/p99 (linear interpolation inside the bucket) as a
+<name>_quantile gauge, for dashboards that cannot run histogram_quantile().
+
+Overhead budget: MetricsMiddleware must add at most 15 us per request on the event loop
+(measured by scripts/bench_metrics_overhead.py; currently ~5 us).
+"""
+import time
+from bisect import bisect_left
+from collections import deque
+from contextvars import ContextVar
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50)
+QUANTILES = (0.5, 0.95, 0.99)
+
+_registry: list = []
+
+
+def _format_labels(labelnames: tuple, values: tuple, extra: str = "") -> str:
+    parts = [f'{name}="{str(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: tuple = ()):
+        self.name, self.help, self.labelnames = name, help, labelnames
+        self._values: dict[tuple, float] = {}
+        _registry.append(self)
+
+    def inc(self, labels: tuple = (), amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in self._values.items():
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Gauge:
+    """Either set() explicitly or backed by a callback returning the current value (or {labels: value})."""
+
+    def __init__(self, name: str, help: str, labelnames: tuple = (), callback=None):
+        self.name, self.help, self.labelnames = name, help, labelnames
+        self.callback = callback
+        self._values: dict[tuple, float] = {}
+        _registry.append(self)
+
+    def set(self, value: float, labels: tuple = ()):
+        self._values[labels] = value
+
+    def render(self) -> list[str]:
+        values = self._values
+        if self.callback is not None:
+            try:
+                current = self.callback()
+            except Exception as e:
+                print(f"[Metrics Error] {self.name}: {e}")
+                return []
+            values = current if isinstance(current, dict) else {(): current}
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        for labels, value in values.items():
+            if value is not None:
+                lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames: tuple = (), buckets: tuple = LATENCY_BUCKETS,
+                 quantiles: tuple = QUANTILES):
+        self.name, self.help, self.labelnames = name, help, labelnames
+        self.buckets = tuple(buckets)
+        self.quantiles = quantiles
+        self._series: dict[tuple, list] = {}  # labels -> [per-bucket counts (+Inf last), sum, count]
+        _registry.append(self)
+
+    def observe(self, value: float, labels: tuple = ()):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def quantile(self, q: float, labels: tuple = ()) -> float | None:
+        series = self._series.get(labels)
+        if series is None or not series[2]:
+            return None
+        rank = q * series[2]
+        seen = 0
+        for i, count in enumerate(series[0]):
+            if count and seen + count >= rank:
+                if i == len(self.buckets):
+                    return self.buckets[-1]  # beyond the last bound: report the bound, as histogram_quantile does
+                lower = self.buckets[i - 1] if i else 0.0
+                return lower + (self.buckets[i] - lower) * (rank - seen) / count
+            seen += count
+        return None
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total, count) in self._series.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(float(bound))}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {count}")
+        if self.quantiles and self._series:
+            lines.append(f"# HELP {self.name}_quantile {self.help} (estimated from buckets)")
+            lines.append(f"# TYPE {self.name}_quantile gauge")
+            for labels in self._series:
+                for q in self.quantiles:
+                    value = self.quantile(q, labels)
+                    if value is not None:
+                        extra = f'quantile="{q}"'
+                        lines.append(f"{self.name}_quantile{_format_labels(self.labelnames, labels, extra)} {_format_value(float(value))}")
+        return lines
+
+
+def render_metrics() -> str:
+    _observe_request_db()
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# --- HTTP / DB METRICS ---
+
+HTTP_REQUESTS = Counter("http_requests_total", "HTTP requests by route and status", ("method", "route", "status"))
+HTTP_LATENCY = Histogram("http_request_duration_seconds", "Time to the last response byte", ("method", "route"))
+HTTP_RESPONSE_SIZE = Histogram("http_response_size_bytes", "Response body size on the wire", ("method", "route"),
+                               buckets=SIZE_BUCKETS, quantiles=())
+HTTP_DB_QUERIES = Histogram("http_request_db_queries", "DB queries issued per request", ("method", "route"),
+                            buckets=COUNT_BUCKETS, quantiles=())
+HTTP_DB_TIME = Histogram("http_request_db_seconds", "Time spent in DB queries per request", ("method", "route"))
+DB_QUERIES = Counter("db_queries_total", "DB queries on pooled connections", ("outcome",))
+DB_QUERY_TIME = Histogram("db_query_duration_seconds", "DB query duration on pooled connections", quantiles=())
+DB_POOL_WAIT = Histogram("db_pool_acquire_wait_seconds", "Time waiting for a pooled DB connection")
+DB_POOL_TIMEOUTS = Counter("db_pool_acquire_timeouts_total", "Pool acquires that timed out")
+EVENT_LOOP_LAG = Histogram("event_loop_lag_seconds", "Event-loop scheduling delay of a periodic probe")
+EVENT_LOOP_LAG_LAST = Gauge("event_loop_lag_last_seconds", "Most recent event-loop probe delay")
+
+# [query count, query seconds] for the request being handled; None outside requests
+_request_db: ContextVar[list | None] = ContextVar("request_db", default=None)
+# Finished requests whose DB totals are observed at the next scrape (or once this many pile up)
+_pending_request_db: deque = deque()
+PENDING_REQUEST_DB_LIMIT = 10000
+
+# asyncpg's pool runs this after every release; it is not a query the request made
+_RESET_QUERY_ENDINGS = ("RESET ALL;", "UNLISTEN *;", "CLOSE ALL;", "pg_advisory_unlock_all();")
+
+
+def record_query(record):
+    """asyncpg query logger (Connection.add_query_logger), installed on every pooled connection."""
+    if record.query.endswith(_RESET_QUERY_ENDINGS):
+        return
+    observe_query(record.elapsed, record.exception is not None)
+
+
+def observe_query(elapsed: float, failed: bool = False):
+    """Counts one query against /metrics and the current request's DB totals."""
+    DB_QUERIES.inc(("error" if failed else "ok",))
+    DB_QUERY_TIME.observe(elapsed)
+    holder = _request_db.get()
+    if holder is not None:
+        holder[0] += 1
+        holder[1] += elapsed
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware; add it last so it wraps GZip and sees on-the-wire sizes. Routes are
+    labelled by their path template (unmatched paths share one label to bound cardinality).
+    """
+
+    def __init__(self, app, routes: list):
+        self.app = app
+        self.routes = routes
+        self._route_paths: dict = {}
+
+    def _route_label(self, scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        path = self._route_paths.get(endpoint)
+        if path is None:
+            self._route_paths = {getattr(r, "endpoint", None): getattr(r, "path", "unmatched") for r in self.routes}
+            path = self._route_paths.get(endpoint, "unmatched")
+        return path
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        started = time.perf_counter()
+        status = 500
+        size = 0
+        db = [0, 0.0]
+        token = _request_db.set(db)
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_db.reset(token)
+            labels = (scope["method"], self._route_label(scope))
+            HTTP_REQUESTS.inc(labels + (str(status),))
+            HTTP_LATENCY.observe(time.perf_counter() - started, labels)
+            HTTP_RESPONSE_SIZE.observe(size, labels)
+            # asyncpg reports queries via call_soon, possibly after this point; read the totals later
+            _pending_request_db.append((db, labels))
+            if len(_pending_request_db) >= PENDING_REQUEST_DB_LIMIT:
+                _observe_request_db(keep=100)  # the newest may still have query callbacks queued
+
+
+def _observe_request_db(keep: int = 0):
+    while len(_pending_request_db) > keep:
+        db, labels = _pending_request_db.popleft()
+        HTTP_DB_QUERIES.observe(db[0], labels)
+        HTTP_DB_TIME.observe(db[1], labels)
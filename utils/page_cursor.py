@@ -0,0 +1,47 @@
+"""
+Opaque keyset-pagination cursors: a URL-safe base64 JSON list of the last row's sort key
+(plus whatever the route needs to check the cursor belongs to the same query).
+
+datetime and Decimal values round-trip exactly, so "(sort_key, id) > ($n, $m)" resumes
+precisely after the last row. Cursors are not signed; routes still scope the query to the
+caller's own data.
+"""
+import base64
+import json
+from datetime import datetime
+from decimal import Decimal
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {"t": value.isoformat()}
+    if isinstance(value, Decimal):
+        return {"d": str(value)}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict):
+        if "t" in value:
+            return datetime.fromisoformat(value["t"])
+        if "d" in value:
+            return Decimal(value["d"])
+        raise ValueError("Unknown cursor value")
+    return value
+
+
+def encode_cursor(values: list) -> str:
+    raw = json.dumps([_encode_value(v) for v in values], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> list:
+    """Raises ValueError for anything that is not a cursor produced by encode_cursor."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except Exception:
+        raise ValueError("Malformed cursor")
+    if not isinstance(values, list):
+        raise ValueError("Malformed cursor")
+    return [_decode_value(v) for v in values]
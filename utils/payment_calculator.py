@@ -1,4 +1,5 @@
 from db.db_helpers import fetch_one
+from utils.app_config import get_config
 from math import floor
 
 async def calculate_final_price(plan_id: int, promocode: str = None, conn=None, plan_type: str = None):
@@ -7,12 +8,10 @@ async def calculate_final_price(plan_id: int, promocode: str = None, conn=None,
         FROM mt_subscription_master
         WHERE id = $1
     """
-    gst_query = "SELECT gst FROM mt_config LIMIT 1"
-
     plan = await fetch_one(plan_query, (plan_id,), conn)
-    gst_row = await fetch_one(gst_query, (), conn)
+    config = await get_config(conn)
 
-    if not plan or not gst_row:
+    if not plan:
         raise ValueError("Missing plan or GST configuration")
 
     price = float(plan["price_before_tax"])
@@ -51,7 +50,7 @@ async def calculate_final_price(plan_id: int, promocode: str = None, conn=None,
             }
 
     discounted = max(price - discount, 0.0)
-    gst_percent = float(gst_row["gst"])
+    gst_percent = config.gst
     gst_amount = floor((gst_percent / 100.0) * discounted)
     final_price = floor(discounted + gst_amount)
 
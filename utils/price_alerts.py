@@ -0,0 +1,210 @@
+"""
+In-memory price alerts (mt_price_alerts, db/migrations/007_mt_price_alerts.sql).
+
+Every active alert is a row in four parallel arrays sorted by script_id: id, script_id,
+type code and threshold (25 bytes per alert). tasks/price_alert_refresher.py keeps them in
+sync with the table. On each utils.price_hub tick the alerts on the changed scripts are found
+with searchsorted and evaluated with vectorized comparisons against the snapshot; the ones
+that hold are queued for tasks/price_alert_sender.py, which claims them in the table (so only
+one worker notifies) and hands them to the notifier (utils/alert_notifier.py).
+
+Alerts are one-shot. A triggered row is tombstoned right away, so later ticks do not queue
+it again while its claim is pending; restore_triggers() puts it back if the claim failed.
+Removed rows are tombstoned too and new ones wait in _pending until the next tick inserts
+them, so keeping 1M alerts in sync never re-sorts the arrays.
+"""
+import asyncio
+import time
+import numpy as np
+from utils.market_leaderboards import ONE_YEAR_SECONDS
+from utils.metrics import Histogram, Gauge
+from utils.price_hub import add_tick_listener, expand_ranges
+
+ALERT_TYPES = ("price_above", "price_below", "change_above", "change_below", "high_52", "low_52")
+THRESHOLD_TYPES = ("price_above", "price_below", "change_above", "change_below")
+TYPE_CODES = {alert_type: code for code, alert_type in enumerate(ALERT_TYPES)}
+PRICE_ABOVE, PRICE_BELOW, CHANGE_ABOVE, CHANGE_BELOW, HIGH_52, LOW_52 = range(len(ALERT_TYPES))
+DEAD = -1
+
+EVALUATION_SECONDS = Histogram("price_alert_evaluation_seconds", "Price alert evaluation time per price tick",
+                               buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0))
+
+_alert_id = np.empty(0, dtype=np.int64)
+_script_id = np.empty(0, dtype=np.int64)  # sorted
+_type = np.empty(0, dtype=np.int8)
+_threshold = np.empty(0, dtype=np.float64)
+_dead = 0
+_pending: dict[int, tuple] = {}  # id -> (script_id, type code, threshold), inserted at the next tick
+_queued: list[tuple] = []  # (ids, script_ids, types, thresholds, prices) per tick
+triggers_ready = asyncio.Event()
+
+_stats = {"full_reloads": 0, "delta_syncs": 0, "notifications": 0, "ticks": 0, "evaluated": 0,
+          "triggered": 0, "restored": 0, "compactions": 0, "last_evaluation_ms": 0.0, "max_evaluation_ms": 0.0}
+
+
+def evaluate_alerts(snapshot, positions: np.ndarray, types: np.ndarray, thresholds: np.ndarray,
+                    now: float | None = None) -> np.ndarray:
+    """Which alerts hold; positions (into snapshot), types and thresholds are parallel. NULL values never trigger."""
+    price = snapshot["latest_price"][positions]
+    with np.errstate(invalid="ignore"):
+        value = np.where(types <= PRICE_BELOW, price, snapshot["changed_percentage"][positions])
+        above = (types == PRICE_ABOVE) | (types == CHANGE_ABOVE)
+        below = (types == PRICE_BELOW) | (types == CHANGE_BELOW)
+        hit = (above & (value >= thresholds)) | (below & (value <= thresholds))
+
+        # 52-week alerts follow get_market_trends high_52 / low_52
+        year_ago = (now or time.time()) - ONE_YEAR_SECONDS
+        for code, bound, bound_date, compare in (
+            (HIGH_52, "alltime_high", "alltime_high_date", np.greater_equal),
+            (LOW_52, "alltime_low", "alltime_low_date", np.less_equal),
+        ):
+            rows = np.flatnonzero(types == code)
+            if len(rows):
+                at = positions[rows]
+                hit[rows] = compare(price[rows], snapshot[bound][at]) & (snapshot[bound_date][at] >= year_ago)
+    return hit
+
+
+# --- SYNC ---
+
+def set_price_alerts(rows: list):
+    """Full reload from (id, script_id, alert_type, threshold) rows of every active alert."""
+    global _alert_id, _script_id, _type, _threshold, _dead
+    alert_id = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+    script_id = np.fromiter((row[1] for row in rows), dtype=np.int64, count=len(rows))
+    types = np.fromiter((TYPE_CODES[row[2]] for row in rows), dtype=np.int8, count=len(rows))
+    threshold = np.fromiter((np.nan if row[3] is None else row[3] for row in rows), dtype=np.float64, count=len(rows))
+    order = np.argsort(script_id, kind="stable")
+    _alert_id, _script_id, _type, _threshold = alert_id[order], script_id[order], types[order], threshold[order]
+    _dead = 0
+    _pending.clear()
+    _stats["full_reloads"] += 1
+
+
+def _find(alert_id: int, script_id: int) -> int:
+    """Row of a live alert, or -1."""
+    lo = np.searchsorted(_script_id, script_id, side="left")
+    hi = np.searchsorted(_script_id, script_id, side="right")
+    for offset in np.flatnonzero(_alert_id[lo:hi] == alert_id).tolist():
+        if _type[lo + offset] != DEAD:
+            return int(lo + offset)
+    return -1
+
+
+def apply_price_alert_changes(changes: list, source: str = "delta"):
+    """
+    Applies (id, script_id, alert_type, threshold, is_active) changes; unchanged rows are no-ops.
+    source is "notify", "delta", "replay" (notifications re-applied after a full reload) or "local".
+    """
+    global _dead
+    for alert_id, script_id, alert_type, threshold, active in changes:
+        threshold = np.nan if threshold is None else float(threshold)
+        row = _find(alert_id, script_id)
+        if row >= 0:
+            if active and _type[row] == TYPE_CODES[alert_type] and \
+                    (_threshold[row] == threshold or (np.isnan(_threshold[row]) and np.isnan(threshold))):
+                continue
+            _type[row] = DEAD
+            _dead += 1
+        if active:
+            _pending[alert_id] = (script_id, TYPE_CODES[alert_type], threshold)
+        else:
+            _pending.pop(alert_id, None)
+    if source == "notify":
+        _stats["notifications"] += 1
+    elif source == "delta":
+        _stats["delta_syncs"] += 1
+
+
+def _merge_pending():
+    """Inserts pending alerts in script_id order, dropping tombstones first once they are 10% of the rows."""
+    global _alert_id, _script_id, _type, _threshold, _dead
+    if _dead > max(1000, len(_type) // 10):
+        keep = _type != DEAD
+        _alert_id, _script_id, _type, _threshold = _alert_id[keep], _script_id[keep], _type[keep], _threshold[keep]
+        _dead = 0
+        _stats["compactions"] += 1
+    if not _pending:
+        return
+    alert_id = np.fromiter(_pending.keys(), dtype=np.int64, count=len(_pending))
+    values = list(_pending.values())
+    script_id = np.array([v[0] for v in values], dtype=np.int64)
+    types = np.array([v[1] for v in values], dtype=np.int8)
+    threshold = np.array([v[2] for v in values], dtype=np.float64)
+    _pending.clear()
+    # Sorted first: rows inserted at the same index keep their given order
+    order = np.argsort(script_id, kind="stable")
+    at = np.searchsorted(_script_id, script_id[order], side="right")
+    _alert_id = np.insert(_alert_id, at, alert_id[order])
+    _script_id = np.insert(_script_id, at, script_id[order])
+    _type = np.insert(_type, at, types[order])
+    _threshold = np.insert(_threshold, at, threshold[order])
+
+
+# --- EVALUATION ---
+
+def _on_price_tick(tick):
+    global _dead
+    started = time.perf_counter()
+    _merge_pending()
+    lo = np.searchsorted(_script_id, tick.script_ids, side="left")
+    hi = np.searchsorted(_script_id, tick.script_ids, side="right")
+    rows = expand_ranges(lo, hi)
+    _stats["ticks"] += 1
+    if not len(rows):
+        return
+    positions = np.repeat(tick.positions, hi - lo)
+    hit = evaluate_alerts(tick.snapshot, positions, _type[rows], _threshold[rows])
+    _stats["evaluated"] += len(rows)
+
+    if hit.any():
+        rows = rows[hit]
+        _queued.append((_alert_id[rows], _script_id[rows], _type[rows], _threshold[rows],
+                        tick.snapshot["latest_price"][positions[hit]]))
+        _type[rows] = DEAD
+        _dead += len(rows)
+        _stats["triggered"] += len(rows)
+        triggers_ready.set()
+
+    elapsed = time.perf_counter() - started
+    EVALUATION_SECONDS.observe(elapsed)
+    _stats["last_evaluation_ms"] = round(elapsed * 1000, 3)
+    _stats["max_evaluation_ms"] = max(_stats["max_evaluation_ms"], _stats["last_evaluation_ms"])
+
+
+add_tick_listener(_on_price_tick)
+
+
+def take_triggers() -> tuple | None:
+    """Everything queued since the last call as (ids, script_ids, types, thresholds, prices), or None."""
+    if not _queued:
+        return None
+    batch = tuple(np.concatenate(column) for column in zip(*_queued))
+    _queued.clear()
+    return batch
+
+
+def restore_triggers(batch: tuple):
+    """Re-arms alerts whose claim failed, so a later tick can trigger them again."""
+    ids, script_ids, types, thresholds, _ = batch
+    for alert_id, script_id, code, threshold in zip(ids.tolist(), script_ids.tolist(), types.tolist(), thresholds.tolist()):
+        if _find(alert_id, script_id) < 0:
+            _pending.setdefault(alert_id, (script_id, code, threshold))
+    _stats["restored"] += len(ids)
+
+
+def price_alert_count() -> int:
+    return len(_type) - _dead + len(_pending)
+
+
+Gauge("price_alerts_active", "Active price alerts held in memory", callback=price_alert_count)
+
+
+def price_alert_stats() -> dict:
+    return {
+        **_stats,
+        "alerts": price_alert_count(),
+        "tombstones": _dead,
+        "queued": sum(len(batch[0]) for batch in _queued),
+        "memory_bytes": _alert_id.nbytes + _script_id.nbytes + _type.nbytes + _threshold.nbytes,
+    }
@@ -0,0 +1,252 @@
+"""
+In-process fan-out of script_master price changes, keyed by script_id.
+
+The script_master snapshot refresher swaps in a new snapshot every
+SCRIPT_SNAPSHOT_REFRESH_SECONDS. On each swap (a tick) the hub diffs the price fields of the
+two snapshots once, with NumPy, and hands the changed scripts to:
+
+- tick listeners, which get the whole PriceTick (alert evaluation, caches):
+
+      add_tick_listener(lambda tick: ...)
+
+- subscribers, which get consumer.on_prices(tick, script_ids) with a list of only the changed
+  scripts they subscribed to (watchlist streams):
+
+      slot = subscribe(consumer, script_ids)
+      ...
+      unsubscribe(slot)
+
+Subscriptions are kept as two parallel arrays, script_id (int64) and subscriber slot (int32),
+sorted by script_id: 12 bytes per subscription, and matching a tick is one searchsorted over
+the changed script_ids instead of a Python loop over subscribers. subscribe / unsubscribe
+only append to a pending list or mark the slot dead; the arrays are rebuilt at most once per
+tick, and only when something changed. Without ticks (market closed, refresher stalled) they
+are rebuilt by subscribe / unsubscribe instead, once the pending rows or released slots pass
+their limits, so churn cannot grow them unbounded.
+"""
+import time
+import numpy as np
+from utils.metrics import Histogram, Gauge, COUNT_BUCKETS
+from utils.script_snapshot import add_snapshot_listener
+
+PRICE_FIELDS = ("latest_price", "changed_percentage", "price_difference")
+# Rebuild outside a tick once this many rows / slots wait (or half the subscriptions, if larger)
+REBUILD_PENDING_ROWS = 10000
+REBUILD_RELEASED_SLOTS = 1000
+
+TICK_SECONDS = Histogram("price_hub_tick_seconds", "Price hub diff and fan-out time per snapshot swap",
+                         buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0))
+TICK_CHANGED = Histogram("price_hub_changed_scripts", "Scripts whose price changed per tick",
+                         buckets=(0, 1, 10, 100, 1000, 10000, 100000), quantiles=())
+TICK_FANOUT = Histogram("price_hub_fanout_subscribers", "Subscribers notified per tick",
+                        buckets=COUNT_BUCKETS + (100, 1000, 10000, 100000), quantiles=())
+
+
+class PriceTick:
+    """The scripts whose PRICE_FIELDS changed between two snapshots; script_ids and positions are parallel."""
+    __slots__ = ("previous", "snapshot", "script_ids", "positions", "cache")
+
+    def __init__(self, previous, snapshot, script_ids: np.ndarray, positions: np.ndarray):
+        self.previous = previous  # None on the first load
+        self.snapshot = snapshot
+        self.script_ids = script_ids
+        self.positions = positions  # into snapshot
+        self.cache: dict = {}  # per-tick scratch for consumers, e.g. values serialised once for all subscribers
+
+
+def diff_prices(previous, current, changed_positions, fields: tuple = PRICE_FIELDS) -> np.ndarray:
+    """
+    Positions in current whose fields differ from previous (NaN equals NaN), including scripts
+    previous did not have. After a delta refresh changed_positions narrows the candidates and
+    positions of existing scripts are stable; None (full reload) compares every script by id.
+    """
+    if previous is None:
+        return np.arange(current.size, dtype=np.int64)
+
+    if changed_positions is None:
+        candidates = np.arange(current.size, dtype=np.int64)
+        before = np.full(current.size, -1, dtype=np.int64)
+        if previous.size:
+            prev_ids = previous["script_id"]
+            order = np.argsort(prev_ids, kind="stable")
+            at = np.minimum(np.searchsorted(prev_ids, current["script_id"], sorter=order), previous.size - 1)
+            found = prev_ids[order[at]] == current["script_id"]
+            before[found] = order[at][found]
+    else:
+        candidates = np.asarray(changed_positions, dtype=np.int64)
+        before = np.where(candidates < previous.size, candidates, -1)
+
+    existing = before >= 0
+    changed = ~existing
+    if existing.any():
+        old_at, new_at = before[existing], candidates[existing]
+        differs = np.zeros(len(old_at), dtype=bool)
+        for field in fields:
+            old, new = previous[field][old_at], current[field][new_at]
+            differs |= ~((old == new) | (np.isnan(old) & np.isnan(new)))
+        changed[existing] = differs
+    return candidates[changed]
+
+
+# --- SUBSCRIPTIONS ---
+
+_consumers: list = []  # slot -> consumer, None when free
+_alive = np.zeros(64, dtype=bool)
+_free_slots: list[int] = []  # their rows are gone from the arrays
+_released: list[int] = []  # unsubscribed since the last rebuild; reusable after it
+_sub_script = np.empty(0, dtype=np.int64)  # sorted
+_sub_slot = np.empty(0, dtype=np.int32)
+_pending_script: list[int] = []
+_pending_slot: list[int] = []
+_dirty = False
+_tick_listeners: list = []
+
+_stats = {"ticks": 0, "changed_scripts": 0, "notified": 0, "deliveries": 0, "rebuilds": 0, "idle_rebuilds": 0,
+          "consumer_errors": 0, "last_tick_ms": 0.0, "max_tick_ms": 0.0}
+
+
+def add_tick_listener(callback):
+    """callback(tick) runs synchronously on every tick with at least one changed script, before subscribers."""
+    _tick_listeners.append(callback)
+
+
+def subscribe(consumer, script_ids) -> int:
+    """consumer.on_prices(tick, script_ids) is called with its changed script_ids; returns the slot for unsubscribe()."""
+    global _alive, _dirty
+    if _free_slots:
+        slot = _free_slots.pop()
+        _consumers[slot] = consumer
+    else:
+        slot = len(_consumers)
+        _consumers.append(consumer)
+        if slot >= len(_alive):
+            _alive = np.concatenate([_alive, np.zeros(len(_alive), dtype=bool)])
+    _alive[slot] = True
+    script_ids = [int(sid) for sid in script_ids]
+    _pending_script.extend(script_ids)
+    _pending_slot.extend([slot] * len(script_ids))
+    _dirty = True
+    _rebuild_if_backlogged()
+    return slot
+
+
+def unsubscribe(slot: int):
+    global _dirty
+    if _consumers[slot] is None:
+        return
+    _consumers[slot] = None
+    _alive[slot] = False
+    # Not reusable until the rebuild drops its rows, or the next owner would inherit them
+    _released.append(slot)
+    _dirty = True
+    _rebuild_if_backlogged()
+
+
+def _rebuild_if_backlogged():
+    if len(_pending_script) >= max(REBUILD_PENDING_ROWS, len(_sub_script) // 2) or \
+            len(_released) >= max(REBUILD_RELEASED_SLOTS, len(_consumers) // 4):
+        _rebuild()
+        _stats["idle_rebuilds"] += 1
+
+
+def _rebuild():
+    global _sub_script, _sub_slot, _dirty
+    script = np.concatenate([_sub_script, np.array(_pending_script, dtype=np.int64)])
+    slot = np.concatenate([_sub_slot, np.array(_pending_slot, dtype=np.int32)])
+    _pending_script.clear()
+    _pending_slot.clear()
+    keep = _alive[slot]
+    script, slot = script[keep], slot[keep]
+    order = np.argsort(script, kind="stable")
+    _sub_script, _sub_slot = script[order], slot[order]
+    _free_slots.extend(_released)
+    _released.clear()
+    _dirty = False
+    _stats["rebuilds"] += 1
+
+
+def expand_ranges(lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+    """Concatenation of every [lo[i], hi[i]) range, without a Python loop."""
+    counts = hi - lo
+    return np.repeat(lo - np.cumsum(counts) + counts, counts) + np.arange(int(counts.sum()))
+
+
+def match(script_ids: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """(slots, script_ids) of every subscription to one of script_ids, grouped by slot."""
+    if _dirty:
+        _rebuild()
+    rows = expand_ranges(np.searchsorted(_sub_script, script_ids, side="left"),
+                         np.searchsorted(_sub_script, script_ids, side="right"))
+    if not len(rows):
+        return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int64)
+    slots = _sub_slot[rows]
+    order = np.argsort(slots, kind="stable")
+    return slots[order], _sub_script[rows][order]
+
+
+def _fan_out(tick: PriceTick) -> tuple[int, int]:
+    """Calls on_prices on every subscriber with changed scripts; returns (subscribers, deliveries)."""
+    slots, script_ids = match(tick.script_ids)
+    if not len(slots):
+        return 0, 0
+    bounds = np.flatnonzero(np.diff(slots)) + 1
+    starts = [0] + bounds.tolist()
+    ends = starts[1:] + [len(slots)]
+    script_ids = script_ids.tolist()
+    consumers = _consumers
+    for slot, start, end in zip(slots[starts].tolist(), starts, ends):
+        try:
+            consumers[slot].on_prices(tick, script_ids[start:end])
+        except Exception as e:
+            _stats["consumer_errors"] += 1
+            print(f"[Price Hub Consumer Error] {e}")
+    return len(starts), len(slots)
+
+
+def _on_snapshot_swapped(previous, current, changed_positions):
+    started = time.perf_counter()
+    positions = diff_prices(previous, current, changed_positions)
+    if not len(positions):
+        return
+    tick = PriceTick(previous, current, current["script_id"][positions], positions)
+
+    for callback in _tick_listeners:
+        try:
+            callback(tick)
+        except Exception as e:
+            _stats["consumer_errors"] += 1
+            print(f"[Price Hub Listener Error] {e}")
+    notified, deliveries = _fan_out(tick)
+
+    elapsed = time.perf_counter() - started
+    TICK_SECONDS.observe(elapsed)
+    TICK_CHANGED.observe(len(positions))
+    TICK_FANOUT.observe(notified)
+    _stats["ticks"] += 1
+    _stats["changed_scripts"] += len(positions)
+    _stats["notified"] += notified
+    _stats["deliveries"] += deliveries
+    _stats["last_tick_ms"] = round(elapsed * 1000, 3)
+    _stats["max_tick_ms"] = max(_stats["max_tick_ms"], _stats["last_tick_ms"])
+
+
+add_snapshot_listener(_on_snapshot_swapped)
+
+
+def subscription_count() -> int:
+    pending = np.array(_pending_slot, dtype=np.int32)
+    return int(_alive[_sub_slot].sum()) + int(_alive[pending].sum())
+
+
+Gauge("price_hub_subscriptions", "Script subscriptions held by the price hub", callback=subscription_count)
+Gauge("price_hub_subscribers", "Consumers subscribed to the price hub",
+      callback=lambda: len(_consumers) - len(_free_slots) - len(_released))
+
+
+def price_hub_stats() -> dict:
+    return {
+        **_stats,
+        "subscribers": len(_consumers) - len(_free_slots) - len(_released),
+        "subscriptions": subscription_count(),
+        "tick_p99_ms": round((TICK_SECONDS.quantile(0.99) or 0) * 1000, 3),
+    }
@@ -0,0 +1,104 @@
+"""
+Live price updates for watchlist streams (routes/stream_watchlist_prices.py).
+
+There is no per-connection polling: each stream is a utils.price_hub subscriber, and the hub
+hands it the subscribed scripts whose streamed fields changed on each snapshot swap. Each
+update is serialised once per tick and shared by every subscriber of that script.
+
+Subscribers coalesce: pending updates are keyed by script_id and a newer update replaces
+an unsent one, so a slow client gets the latest values when it catches up and its backlog
+never exceeds one entry per subscribed script.
+"""
+import asyncio
+import os
+import orjson
+from utils import price_hub
+from utils.script_snapshot import get_snapshot
+
+STREAM_FIELDS = price_hub.PRICE_FIELDS
+PRICE_STREAM_MAX_SUBSCRIBERS = int(os.getenv("PRICE_STREAM_MAX_SUBSCRIBERS", "10000"))
+
+_stats = {"updates": 0, "coalesced": 0, "events_sent": 0, "rejected_full": 0}
+
+
+class PriceSubscriber:
+    __slots__ = ("script_ids", "slot", "pending", "wake")
+
+    def __init__(self, script_ids: set):
+        self.script_ids = script_ids
+        self.slot = None
+        self.pending: dict[int, bytes] = {}
+        self.wake = asyncio.Event()
+
+    def on_prices(self, tick, script_ids: list):
+        updates = tick.cache.get("price_stream")
+        if updates is None:
+            updates = tick.cache["price_stream"] = _TickUpdates(tick.snapshot)
+        pending = self.pending
+        if pending:
+            _stats["coalesced"] += sum(1 for script_id in script_ids if script_id in pending)
+        for script_id in script_ids:
+            pending[script_id] = updates[script_id]
+        self.wake.set()
+
+    def take(self) -> bytes | None:
+        """Everything pending as one JSON array (already-serialised updates spliced in), or None."""
+        self.wake.clear()
+        if not self.pending:
+            return None
+        pending, self.pending = self.pending, {}
+        _stats["events_sent"] += 1
+        return b"[" + b",".join(pending.values()) + b"]"
+
+
+_subscribers: set[PriceSubscriber] = set()
+
+
+def has_capacity() -> bool:
+    if len(_subscribers) >= PRICE_STREAM_MAX_SUBSCRIBERS:
+        _stats["rejected_full"] += 1
+        return False
+    return True
+
+
+def subscribe(script_ids) -> PriceSubscriber:
+    subscriber = PriceSubscriber({int(sid) for sid in script_ids})
+    _subscribers.add(subscriber)
+    subscriber.slot = price_hub.subscribe(subscriber, subscriber.script_ids)
+    return subscriber
+
+
+def unsubscribe(subscriber: PriceSubscriber):
+    if subscriber in _subscribers:
+        _subscribers.discard(subscriber)
+        price_hub.unsubscribe(subscriber.slot)
+
+
+def _update(snapshot, script_id: int, i: int) -> bytes:
+    return orjson.dumps({"script_id": script_id, **{field: snapshot.value(field, i) for field in STREAM_FIELDS}})
+
+
+class _TickUpdates(dict):
+    """A tick's updates by script_id, each serialised by the first subscriber that needs it."""
+
+    def __init__(self, snapshot):
+        super().__init__()
+        self.snapshot = snapshot
+
+    def __missing__(self, script_id: int) -> bytes:
+        update = self[script_id] = _update(self.snapshot, script_id, self.snapshot.position[script_id])
+        _stats["updates"] += 1
+        return update
+
+
+def current_prices(script_ids) -> bytes:
+    """Initial event: the current streamed fields of every subscribed script in the snapshot."""
+    snapshot = get_snapshot()
+    if snapshot is None:
+        return b"[]"
+    updates = [_update(snapshot, sid, snapshot.position[sid]) for sid in script_ids if sid in snapshot.position]
+    return b"[" + b",".join(updates) + b"]"
+
+
+def price_stream_stats() -> dict:
+    return {**_stats, "subscribers": len(_subscribers)}
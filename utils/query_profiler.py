@@ -0,0 +1,157 @@
+"""
+Per-statement profiling for the db/db_helpers functions.
+
+Each call is reduced to a fingerprint (literals -> ?, whitespace collapsed) and aggregated
+into a top-N table (calls, total/max time, rows, errors, calling routes). Calls slower than
+slow_ms also go into a ring buffer; with explain on, a read-only SELECT slower than
+explain_ms is re-run once per fingerprint (per cooldown) under EXPLAIN ANALYZE on a separate
+connection, inside a read-only transaction, in the background (never on the caller's connection).
+
+Everything is switchable at runtime through POST /internal/queries/settings.
+"""
+import asyncio
+import os
+import re
+import time
+from collections import deque
+from utils.error_aggregator import current_route
+
+settings = {
+    "enabled": os.getenv("QUERY_PROFILING_ENABLED", "true").lower() in ("1", "true", "yes"),
+    "slow_ms": float(os.getenv("QUERY_SLOW_MS", "200")),
+    "explain": os.getenv("QUERY_EXPLAIN_ENABLED", "false").lower() in ("1", "true", "yes"),
+    "explain_ms": float(os.getenv("QUERY_EXPLAIN_MS", "1000")),
+}
+SLOW_LOG_SIZE = 200
+MAX_FINGERPRINTS = 1000
+EXPLAIN_COOLDOWN_SECONDS = 300
+EXPLAIN_STATEMENT_TIMEOUT_MS = 10000
+QUERY_TEXT_LENGTH = 2000
+
+_LITERALS = [
+    (re.compile(r"'(?:[^']|'')*'"), "?"),
+    (re.compile(r"(?<![$\w])\d+(\.\d+)?\b"), "?"),  # numbers, but not $1 placeholders
+    (re.compile(r"\s+"), " "),
+]
+_READ_ONLY = re.compile(r"^\s*(select|with)\b", re.IGNORECASE)
+
+_fingerprints: dict[str, str] = {}  # query text -> fingerprint; queries are mostly constant strings
+_table: dict[str, dict] = {}
+_slow_log: deque = deque(maxlen=SLOW_LOG_SIZE)
+_explained_at: dict[str, float] = {}
+_explain_running = False
+_stats = {"profiled": 0, "untracked": 0, "explains": 0, "explain_errors": 0}
+
+
+def fingerprint(query: str) -> str:
+    fp = _fingerprints.get(query)
+    if fp is None:
+        fp = query
+        for pattern, replacement in _LITERALS:
+            fp = pattern.sub(replacement, fp)
+        fp = fp.strip()[:QUERY_TEXT_LENGTH]
+        if len(_fingerprints) < MAX_FINGERPRINTS * 4:
+            _fingerprints[query] = fp
+    return fp
+
+
+def profile_query(helper: str, query: str, args: tuple, started: float, rows: int = 0, error: bool = False):
+    """Called by db_helpers after every statement; started is the time.perf_counter() before it ran."""
+    if not settings["enabled"]:
+        return
+    duration_ms = (time.perf_counter() - started) * 1000
+    fp = fingerprint(query)
+    route = current_route.get()
+
+    entry = _table.get(fp)
+    if entry is None:
+        if len(_table) >= MAX_FINGERPRINTS:
+            _stats["untracked"] += 1
+            return
+        entry = _table[fp] = {
+            "helper": helper, "calls": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0, "rows": 0, "routes": {},
+        }
+    entry["calls"] += 1
+    entry["total_ms"] += duration_ms
+    entry["rows"] += rows
+    if duration_ms > entry["max_ms"]:
+        entry["max_ms"] = duration_ms
+    if error:
+        entry["errors"] += 1
+    entry["routes"][route] = entry["routes"].get(route, 0) + 1
+    _stats["profiled"] += 1
+
+    if duration_ms >= settings["slow_ms"]:
+        slow = {
+            "fingerprint": fp, "helper": helper, "route": route, "duration_ms": round(duration_ms, 3),
+            "rows": rows, "error": error, "at": time.time(), "plan": None,
+        }
+        _slow_log.append(slow)
+        if settings["explain"] and not error and duration_ms >= settings["explain_ms"] and _READ_ONLY.match(query):
+            _maybe_explain(fp, query, args, slow)
+
+
+def _maybe_explain(fp: str, query: str, args: tuple, slow: dict):
+    global _explain_running
+    now = time.monotonic()
+    if _explain_running or now - _explained_at.get(fp, -EXPLAIN_COOLDOWN_SECONDS) < EXPLAIN_COOLDOWN_SECONDS:
+        return
+    _explain_running = True
+    _explained_at[fp] = now
+    task = asyncio.get_running_loop().create_task(_explain(query, args, slow))
+    task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+
+async def _explain(query: str, args: tuple, slow: dict):
+    global _explain_running
+    from db.connection import acquire_connection
+    try:
+        async with acquire_connection() as conn:
+            # EXPLAIN ANALYZE really executes the statement; a read-only transaction rejects any write
+            async with conn.transaction(readonly=True):
+                await conn.execute(f"SET LOCAL statement_timeout = {EXPLAIN_STATEMENT_TIMEOUT_MS}")
+                plan = await conn.fetchval(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {query}", *args)
+        slow["plan"] = plan
+        _stats["explains"] += 1
+    except Exception as e:
+        slow["plan"] = f"EXPLAIN failed: {e}"
+        _stats["explain_errors"] += 1
+    finally:
+        _explain_running = False
+
+
+def update_settings(**changes) -> dict:
+    for key, value in changes.items():
+        if value is not None and key in settings:
+            settings[key] = value
+    return dict(settings)
+
+
+def reset_query_profile():
+    _table.clear()
+    _slow_log.clear()
+    _explained_at.clear()
+
+
+def query_profiler_stats() -> dict:
+    return {**settings, **_stats, "fingerprints": len(_table), "slow_logged": len(_slow_log)}
+
+
+def query_profile(top: int = 20, sort: str = "total_ms") -> dict:
+    ranked = sorted(_table.items(), key=lambda item: item[1].get(sort, 0), reverse=True)[:top]
+    return {
+        "settings": dict(settings),
+        "stats": {**_stats, "fingerprints": len(_table)},
+        "top": [
+            {
+                "fingerprint": fp,
+                **entry,
+                "total_ms": round(entry["total_ms"], 3),
+                "max_ms": round(entry["max_ms"], 3),
+                "avg_ms": round(entry["total_ms"] / entry["calls"], 3),
+                "routes": dict(sorted(entry["routes"].items(), key=lambda r: r[1], reverse=True)[:5]),
+            }
+            for fp, entry in ranked
+        ],
+        "slow": list(reversed(_slow_log)),
+    }
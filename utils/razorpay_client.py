@@ -0,0 +1,180 @@
+"""
+Async Razorpay API client: one pooled aiohttp session, per-attempt timeouts, retries and a
+circuit breaker.
+
+Retries are safe for order creation because the receipt is generated once by the caller and
+reused on every attempt: before re-sending after an ambiguous failure (timeout, dropped
+connection, 5xx) the client looks the receipt up, so an order Razorpay did create is returned
+instead of creating a second one.
+"""
+import asyncio
+import os
+import time
+
+import aiohttp
+from dotenv import load_dotenv
+
+load_dotenv()
+
+RAZORPAY_KEY_ID = os.getenv("RAZORPAY_KEY_ID")
+RAZORPAY_KEY_SECRET = os.getenv("RAZORPAY_KEY_SECRET")
+RAZORPAY_API_BASE = os.getenv("RAZORPAY_API_BASE", "https://api.razorpay.com")  # scripts/fake_razorpay_server.py locally
+RAZORPAY_TIMEOUT_SECONDS = float(os.getenv("RAZORPAY_TIMEOUT_SECONDS", "10"))
+RAZORPAY_CONNECT_TIMEOUT_SECONDS = float(os.getenv("RAZORPAY_CONNECT_TIMEOUT_SECONDS", "3"))
+RAZORPAY_MAX_RETRIES = int(os.getenv("RAZORPAY_MAX_RETRIES", "2"))
+RAZORPAY_MAX_CONNECTIONS = int(os.getenv("RAZORPAY_MAX_CONNECTIONS", "20"))
+RAZORPAY_BREAKER_FAILURES = int(os.getenv("RAZORPAY_BREAKER_FAILURES", "5"))
+RAZORPAY_BREAKER_RESET_SECONDS = float(os.getenv("RAZORPAY_BREAKER_RESET_SECONDS", "30"))
+RETRY_BACKOFF_SECONDS = 0.2
+
+
+class RazorpayError(Exception):
+    """Razorpay rejected the request or could not be reached after retries."""
+
+
+class RazorpayUnavailable(RazorpayError):
+    """The circuit breaker is open; no request was sent."""
+
+
+class _RetryableError(Exception):
+    pass
+
+
+class CircuitBreaker:
+    """closed -> open after N consecutive failures -> half-open (one trial call) after reset_seconds."""
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._trial_in_flight = False
+        self.times_opened = 0
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self._trial_in_flight or (self.opened_at is None and self.failures >= self.failure_threshold):
+            self.opened_at = time.monotonic()
+            self.times_opened += 1
+        self._trial_in_flight = False
+
+    def abandon(self):
+        """The call was cancelled without an outcome; let another caller run the trial."""
+        self._trial_in_flight = False
+
+
+_session: aiohttp.ClientSession | None = None
+_breaker = CircuitBreaker(RAZORPAY_BREAKER_FAILURES, RAZORPAY_BREAKER_RESET_SECONDS)
+_stats = {"calls": 0, "attempts": 0, "retries": 0, "failures": 0, "rejected_open": 0, "recovered_by_receipt": 0}
+
+
+def _get_session() -> aiohttp.ClientSession:
+    global _session
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession(
+            base_url=RAZORPAY_API_BASE,
+            auth=aiohttp.BasicAuth(RAZORPAY_KEY_ID or "", RAZORPAY_KEY_SECRET or ""),
+            connector=aiohttp.TCPConnector(limit=RAZORPAY_MAX_CONNECTIONS, keepalive_timeout=60),
+            timeout=aiohttp.ClientTimeout(total=RAZORPAY_TIMEOUT_SECONDS, connect=RAZORPAY_CONNECT_TIMEOUT_SECONDS),
+        )
+    return _session
+
+
+async def _request(method: str, path: str, **kwargs) -> dict:
+    try:
+        async with _get_session().request(method, path, **kwargs) as resp:
+            # Status first: error bodies may be HTML from a proxy, and a 4xx must not be retried
+            if resp.status == 429 or resp.status >= 500:
+                raise _RetryableError(f"HTTP {resp.status}: {await resp.text()}")
+            if resp.status >= 400:
+                raise RazorpayError(f"HTTP {resp.status}: {await resp.text()}")
+            return await resp.json(content_type=None)
+    except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+        raise _RetryableError(f"{type(e).__name__}: {e}") from e
+
+
+async def _call(attempt_fn):
+    """Runs attempt_fn(attempt) with retries and the breaker. attempt_fn raises _RetryableError to retry."""
+    _stats["calls"] += 1
+    if not _breaker.allow():
+        _stats["rejected_open"] += 1
+        raise RazorpayUnavailable("Razorpay circuit breaker is open")
+
+    last_error = None
+    for attempt in range(RAZORPAY_MAX_RETRIES + 1):
+        if attempt:
+            _stats["retries"] += 1
+            await asyncio.sleep(RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1))
+        _stats["attempts"] += 1
+        try:
+            result = await attempt_fn(attempt)
+            _breaker.record_success()
+            return result
+        except _RetryableError as e:
+            last_error = e
+        except RazorpayError:
+            # A 4xx means Razorpay is up and answered; it does not count against the breaker
+            _breaker.record_success()
+            raise
+        except asyncio.CancelledError:
+            _breaker.abandon()
+            raise
+
+    _stats["failures"] += 1
+    _breaker.record_failure()
+    raise RazorpayError(f"Razorpay request failed after {RAZORPAY_MAX_RETRIES + 1} attempts: {last_error}")
+
+
+async def find_order_by_receipt(receipt: str) -> dict | None:
+    body = await _request("GET", "/v1/orders", params={"receipt": receipt})
+    items = body.get("items") or []
+    return items[0] if items else None
+
+
+async def create_order(amount_in_paise: int, receipt: str, currency: str = "INR", payment_capture: int = 1) -> dict:
+    payload = {"amount": amount_in_paise, "currency": currency, "receipt": receipt, "payment_capture": payment_capture}
+
+    async def attempt(number: int) -> dict:
+        if number:
+            # The previous attempt may have created the order before failing
+            existing = await find_order_by_receipt(receipt)
+            if existing is not None:
+                _stats["recovered_by_receipt"] += 1
+                return existing
+        return await _request("POST", "/v1/orders", json=payload)
+
+    return await _call(attempt)
+
+
+async def close_razorpay_client():
+    global _session
+    if _session is not None:
+        await _session.close()
+        _session = None
+
+
+def razorpay_stats() -> dict:
+    return {**_stats, "breaker_state": _breaker.state, "breaker_opened": _breaker.times_opened,
+            "consecutive_failures": _breaker.failures}
@@ -0,0 +1,89 @@
+"""
+Write-behind buffer for mt_recently_viewed_scripts.
+
+get_stock_details records views here instead of writing to Postgres; the flusher
+(tasks/recently_viewed_flusher.py) writes all buffered views with one upsert and one trim
+per flush. Entries stay visible to get_recently_viewed_scripts until their flush commits.
+
+At most RECENTLY_VIEWED_MAX_PENDING views (or RECENTLY_VIEWED_FLUSH_SECONDS worth of views,
+whichever is smaller) can be lost if the process dies without a shutdown flush.
+"""
+import asyncio
+import os
+from collections import OrderedDict
+from utils.datetime_utils import utc_now
+
+RECENTLY_VIEWED_FLUSH_SECONDS = float(os.getenv("RECENTLY_VIEWED_FLUSH_SECONDS", "5"))
+RECENTLY_VIEWED_MAX_PENDING = int(os.getenv("RECENTLY_VIEWED_MAX_PENDING", "5000"))
+
+# user_id -> OrderedDict(script_id -> viewed_at), most recent view last
+_pending: dict[int, OrderedDict] = {}
+_pending_count = 0
+# Batch currently being written; still served to readers until the flush commits
+_inflight: dict[int, OrderedDict] = {}
+
+flush_requested = asyncio.Event()
+
+_stats = {"views": 0, "flushes": 0, "rows_flushed": 0, "failed_flushes": 0, "early_flushes": 0, "last_flush_ms": None}
+
+
+def record_view(user_id: int, script_id: int, keep: int):
+    """Coalesces a view into the user's buffer; only the newest `keep` views per user are kept."""
+    global _pending_count
+    views = _pending.setdefault(user_id, OrderedDict())
+    before = len(views)
+    views.pop(script_id, None)
+    views[script_id] = utc_now()
+    while len(views) > keep:
+        views.popitem(last=False)
+    _pending_count += len(views) - before
+    _stats["views"] += 1
+
+    if _pending_count >= RECENTLY_VIEWED_MAX_PENDING and not flush_requested.is_set():
+        _stats["early_flushes"] += 1
+        flush_requested.set()
+
+
+def buffered_views(user_id: int) -> tuple[list, list]:
+    """(script_ids, viewed_at) not yet committed for a user, for merging into reads."""
+    merged = dict(_inflight.get(user_id, ()))
+    for script_id, viewed_at in _pending.get(user_id, {}).items():
+        merged[script_id] = viewed_at
+    return list(merged.keys()), list(merged.values())
+
+
+def take_batch() -> dict[int, OrderedDict]:
+    """Moves everything pending into the in-flight batch and returns it."""
+    global _pending, _pending_count, _inflight
+    _inflight, _pending, _pending_count = _pending, {}, 0
+    return _inflight
+
+
+def finish_batch(ok: bool, rows: int = 0, duration_ms: float | None = None):
+    """Drops the in-flight batch, or puts it back in front of newer views if the write failed."""
+    global _inflight, _pending_count
+    batch, _inflight = _inflight, {}
+    if ok:
+        _stats["flushes"] += 1
+        _stats["rows_flushed"] += rows
+        _stats["last_flush_ms"] = duration_ms
+        return
+
+    _stats["failed_flushes"] += 1
+    for user_id, views in batch.items():
+        newer = _pending.get(user_id)
+        if newer:
+            for script_id in newer:
+                views.pop(script_id, None)
+            views.update(newer)
+        _pending[user_id] = views
+    _pending_count = sum(len(views) for views in _pending.values())
+
+
+def recently_viewed_buffer_stats() -> dict:
+    return {
+        **_stats,
+        "pending_views": _pending_count,
+        "pending_users": len(_pending),
+        "inflight_views": sum(len(views) for views in _inflight.values()),
+    }
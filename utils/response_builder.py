@@ -33,7 +33,7 @@ def standardized_exceptions(fn):
             return error_response(message=he.detail, status_code=he.status_code)
         except Exception as e:
             # Fallback for unexpected errors
-            from utils.telegram_notifier import notify_internal
-            await notify_internal(f"[Unhandled Error] {str(e)}")
+            from utils.error_aggregator import report_error
+            report_error("Unhandled Error", e)
             return error_response(message="Internal Server Error", status_code=500)
     return wrapper
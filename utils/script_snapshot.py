@@ -0,0 +1,242 @@
+"""
+Columnar, in-memory copy of script_master used by the market-data read routes.
+
+A ScriptSnapshot is immutable: the refresher (tasks/script_snapshot_refresher.py)
+builds a new one from the rows changed since the last refresh and swaps the module
+level reference, so a request always works against one consistent version.
+"""
+from datetime import datetime, timezone
+import numpy as np
+from utils.metrics import Gauge
+
+NUMERIC_COLUMNS = (
+    "latest_price", "changed_percentage", "price_difference", "volume",
+    "volume_moving_average", "market_cap", "alltime_high", "alltime_low",
+)
+DATE_COLUMNS = ("alltime_high_date", "alltime_low_date")  # stored as epoch seconds
+TEXT_COLUMNS = ("co_code", "companyname", "companyshortname", "sectorcode")
+CATEGORY_COLUMNS = ("sector", "company_size", "exchange")  # stored as int32 codes
+
+SNAPSHOT_COLUMNS = ("script_id",) + NUMERIC_COLUMNS + DATE_COLUMNS + TEXT_COLUMNS + CATEGORY_COLUMNS
+SNAPSHOT_SELECT = ", ".join(SNAPSHOT_COLUMNS) + ", updated_at"
+
+# Columns the API has always returned as integers
+INT_OUTPUT_COLUMNS = {"script_id", "volume"}
+
+
+def _to_float(value) -> float:
+    return float(value) if value is not None else np.nan
+
+
+def _to_epoch(value) -> float:
+    if value is None:
+        return np.nan
+    if not isinstance(value, datetime):
+        value = datetime(value.year, value.month, value.day)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def _lower(value) -> str:
+    return value.lower() if value else ""
+
+
+class ScriptSnapshot:
+    def __init__(self, columns: dict, labels: dict, version: int):
+        self.columns = columns
+        self.labels = labels  # category column -> list of labels, index == code
+        self.version = version
+        self.as_of = datetime.now(timezone.utc)
+        self.size = len(columns["script_id"])
+        self.position = {int(sid): i for i, sid in enumerate(columns["script_id"])}
+        self._codes = {col: {label: code for code, label in enumerate(labels[col])} for col in CATEGORY_COLUMNS}
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        return self.columns[column]
+
+    # --- BUILDING ---
+
+    @staticmethod
+    def _encode(records: list, labels: dict) -> dict:
+        columns = {"script_id": np.array([r["script_id"] for r in records], dtype=np.int64)}
+        for col in NUMERIC_COLUMNS:
+            columns[col] = np.array([_to_float(r[col]) for r in records], dtype=np.float64)
+        for col in DATE_COLUMNS:
+            columns[col] = np.array([_to_epoch(r[col]) for r in records], dtype=np.float64)
+        for col in TEXT_COLUMNS:
+            columns[col] = np.array([r[col] for r in records] or [], dtype=object)
+        for col in CATEGORY_COLUMNS:
+            index = {label: code for code, label in enumerate(labels[col])}
+            codes = []
+            for r in records:
+                value = r[col]
+                if value not in index:
+                    index[value] = len(labels[col])
+                    labels[col].append(value)
+                codes.append(index[value])
+            columns[col] = np.array(codes, dtype=np.int32)
+        columns["companyname_lower"] = np.array([_lower(r["companyname"]) for r in records], dtype=object)
+        columns["companyshortname_lower"] = np.array([_lower(r["companyshortname"]) for r in records], dtype=object)
+        return columns
+
+    @classmethod
+    def from_records(cls, records: list, version: int = 1) -> "ScriptSnapshot":
+        labels = {col: [] for col in CATEGORY_COLUMNS}
+        return cls(cls._encode(records, labels), labels, version)
+
+    def apply_changes(self, records: list) -> tuple["ScriptSnapshot", np.ndarray]:
+        """
+        Returns (snapshot, changed_positions). The snapshot is self when nothing actually changed,
+        otherwise a new version with the changed rows updated in place and new scripts appended.
+        """
+        if not records:
+            return self, np.empty(0, dtype=np.int64)
+
+        labels = {col: list(self.labels[col]) for col in CATEGORY_COLUMNS}
+        delta = self._encode(records, labels)
+        positions = np.array([self.position.get(int(sid), -1) for sid in delta["script_id"]], dtype=np.int64)
+        existing = positions >= 0
+
+        # Drop rows that were re-read (overlap window) but did not change
+        changed = ~existing
+        if existing.any():
+            at = positions[existing]
+            differs = np.zeros(int(existing.sum()), dtype=bool)
+            for col, values in delta.items():
+                old, new = self.columns[col][at], values[existing]
+                if values.dtype == np.float64:
+                    differs |= ~((old == new) | (np.isnan(old) & np.isnan(new)))
+                else:
+                    differs |= old != new
+            changed[existing] = differs
+
+        if not changed.any():
+            return self, np.empty(0, dtype=np.int64)
+
+        update = changed & existing
+        append = changed & ~existing
+        columns = {}
+        for col, values in self.columns.items():
+            merged = values.copy()
+            merged[positions[update]] = delta[col][update]
+            columns[col] = np.concatenate([merged, delta[col][append]]) if append.any() else merged
+
+        snapshot = ScriptSnapshot(columns, labels, self.version + 1)
+        new_positions = np.arange(self.size, snapshot.size, dtype=np.int64)
+        return snapshot, np.concatenate([positions[update], new_positions])
+
+    # --- QUERYING ---
+
+    def meta(self) -> dict:
+        return {"version": self.version, "as_of": self.as_of.isoformat()}
+
+    def category_code(self, column: str, value) -> int | None:
+        return self._codes[column].get(value)
+
+    def category_mask(self, column: str, value) -> np.ndarray:
+        code = self.category_code(column, value)
+        if code is None:
+            return np.zeros(self.size, dtype=bool)
+        return self.columns[column] == code
+
+    def category_codes_where(self, column: str, predicate) -> np.ndarray:
+        return np.array([code for code, label in enumerate(self.labels[column]) if predicate(label)], dtype=np.int32)
+
+    def not_null(self, column: str) -> np.ndarray:
+        return ~np.isnan(self.columns[column])
+
+    def order(self, indices: np.ndarray, key: np.ndarray, descending: bool = False) -> np.ndarray:
+        """Stable sort of indices by key[indices]; NaN keys go last in either direction."""
+        values = key[indices]
+        if values.dtype == object:
+            order = np.argsort(values, kind="stable")
+            return indices[order[::-1]] if descending else indices[order]
+        order = np.argsort(-values if descending else values, kind="stable")
+        return indices[order]
+
+    def top_k(self, indices: np.ndarray, key: np.ndarray, k: int, descending: bool = True) -> np.ndarray:
+        """First k of order(indices, key, descending) without sorting everything."""
+        if k <= 0:
+            return indices[:0]
+        if k >= len(indices) or key.dtype == object:
+            return self.order(indices, key, descending)[:k]
+        values = -key[indices] if descending else key[indices]
+        values = np.where(np.isnan(values), np.inf, values)
+        part = np.argpartition(values, k - 1)[:k]
+        return indices[part[np.argsort(values[part], kind="stable")]]
+
+    def distinct_co_code(self, indices: np.ndarray, prefer_exchange: str = "NSE") -> np.ndarray:
+        """One row per co_code (preferring prefer_exchange), like DISTINCT ON (co_code). Keeps input order."""
+        preferred = self.category_code("exchange", prefer_exchange)
+        chosen = {}
+        for i in indices.tolist():
+            co_code = self.columns["co_code"][i]
+            current = chosen.get(co_code)
+            if current is None or (self.columns["exchange"][current] != preferred and self.columns["exchange"][i] == preferred):
+                chosen[co_code] = i
+        keep = set(chosen.values())
+        return np.array([i for i in indices.tolist() if i in keep], dtype=np.int64)
+
+    def value(self, column: str, i: int):
+        raw = self.columns[column][i]
+        if column in self.labels:
+            return self.labels[column][raw]
+        if isinstance(raw, np.floating):
+            if np.isnan(raw):
+                return None
+            return int(raw) if column in INT_OUTPUT_COLUMNS else float(raw)
+        if isinstance(raw, np.integer):
+            return int(raw)
+        return raw
+
+    def records(self, indices, fields: tuple) -> list[dict]:
+        return [{field: self.value(field, i) for field in fields} for i in np.asarray(indices).tolist()]
+
+
+_snapshot: ScriptSnapshot | None = None
+_listeners: list = []
+
+
+def get_snapshot() -> ScriptSnapshot | None:
+    """Current snapshot, or None until the first load finished (callers then fall back to SQL)."""
+    return _snapshot
+
+
+def add_snapshot_listener(callback):
+    """
+    callback(previous, current, changed_positions) runs synchronously after every swap.
+    changed_positions is None after a full reload (treat everything as changed).
+    """
+    _listeners.append(callback)
+
+
+def set_snapshot(snapshot: ScriptSnapshot, changed_positions: np.ndarray | None):
+    global _snapshot
+    previous, _snapshot = _snapshot, snapshot
+    for callback in _listeners:
+        try:
+            callback(previous, snapshot, changed_positions)
+        except Exception as e:
+            print(f"[Script Snapshot Listener Error] {e}")
+
+
+def snapshot_age_seconds() -> float | None:
+    if _snapshot is None:
+        return None
+    return round((datetime.now(timezone.utc) - _snapshot.as_of).total_seconds(), 3)
+
+
+Gauge("script_snapshot_age_seconds", "Seconds since the script_master snapshot's as_of",
+      callback=snapshot_age_seconds)
+
+
+def snapshot_stats() -> dict:
+    if _snapshot is None:
+        return {"loaded": False}
+    return {
+        "loaded": True,
+        "version": _snapshot.version,
+        "rows": _snapshot.size,
+        "age_seconds": snapshot_age_seconds(),
+    }
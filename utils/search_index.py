@@ -0,0 +1,228 @@
+"""
+In-memory type-ahead index for search_stock over companyname / companyshortname.
+
+Substring postings (bigrams for 2-character terms, trigrams otherwise) narrow a search
+to a few candidates that are then verified with a plain substring check, so results
+match the old ILIKE '%term%' query exactly. When nothing matches, padded word trigrams
+(pg_trgm style) give a fuzzy fallback for typos. Results are ranked by market_cap.
+
+Postings only depend on the names, so they are rebuilt (in a worker thread) only when a
+name changes; every other snapshot swap just re-ranks (see _on_snapshot_swapped).
+"""
+import asyncio
+import time
+import numpy as np
+from utils.script_snapshot import get_snapshot, add_snapshot_listener
+
+SEARCH_LIMIT = 20
+FUZZY_MIN_SIMILARITY = 0.5  # share of the term's word trigrams found in the name
+
+
+def searchable_indices(snapshot) -> np.ndarray:
+    """Rows the SQL path's base_condition allows: priced, with market cap and size, NSE only."""
+    price, market_cap = snapshot["latest_price"], snapshot["market_cap"]
+    mask = snapshot.not_null("latest_price") & (price != 0)
+    mask &= snapshot.not_null("market_cap") & (market_cap != 0)
+    valid_sizes = snapshot.category_codes_where(
+        "company_size", lambda label: label is not None and label.strip() not in ("", "0", "0.0")
+    )
+    mask &= np.isin(snapshot["company_size"], valid_sizes)
+    mask &= snapshot.category_mask("exchange", "NSE")
+    return np.flatnonzero(mask)
+
+
+def _ngrams(text: str, n: int) -> set:
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+def _word_trigrams(text: str) -> set:
+    grams = set()
+    for word in text.split():
+        grams |= _ngrams(f"  {word} ", 3)
+    return grams
+
+
+def _postings(rows: list) -> dict:
+    """rows[position] = grams of that row -> {gram: sorted positions}. Equal gram sets may be shared objects."""
+    gram_ids, row_ids = {}, {}
+    id_arrays = []
+    for grams in rows:
+        key = id(grams)
+        if key not in row_ids:
+            row_ids[key] = np.array([gram_ids.setdefault(gram, len(gram_ids)) for gram in grams], dtype=np.int32)
+        id_arrays.append(row_ids[key])
+    if not id_arrays:
+        return {}
+    ids = np.concatenate(id_arrays)
+    positions = np.repeat(np.arange(len(rows), dtype=np.int32), [len(a) for a in id_arrays])
+    order = np.argsort(ids, kind="stable")  # stable keeps positions sorted within a gram
+    bounds = np.searchsorted(ids[order], np.arange(len(gram_ids) + 1))
+    sorted_positions = positions[order]
+    return {gram: sorted_positions[bounds[i]:bounds[i + 1]] for gram, i in gram_ids.items()}
+
+
+class SearchIndex:
+    def __init__(self, snapshot, substring_postings: dict, word_postings: dict):
+        self.snapshot = snapshot
+        self.substring_postings = substring_postings  # 2- and 3-gram -> sorted positions
+        self.word_postings = word_postings  # padded word trigram -> sorted positions
+
+        # Ranking depends on market_cap and the base_condition filters, so it is redone per snapshot
+        market_cap = snapshot["market_cap"]
+        self.ranked = snapshot.order(searchable_indices(snapshot), market_cap, descending=True)
+        self.rank = np.full(snapshot.size, -1, dtype=np.int64)
+        self.rank[self.ranked] = np.arange(len(self.ranked))
+        self.alphabetical = self._first_distinct_names(market_cap)
+
+    @classmethod
+    def build(cls, snapshot) -> "SearchIndex":
+        # NSE/BSE listings share names, so grams are computed once per distinct name pair
+        substring_cache, word_cache = {}, {}
+        substring_rows, word_rows = [], []
+        for pair in zip(snapshot["companyname_lower"].tolist(), snapshot["companyshortname_lower"].tolist()):
+            if pair not in substring_cache:
+                name, short_name = pair
+                substring_cache[pair] = _ngrams(name, 2) | _ngrams(name, 3) | _ngrams(short_name, 2) | _ngrams(short_name, 3)
+                word_cache[pair] = _word_trigrams(name) | _word_trigrams(short_name)
+            substring_rows.append(substring_cache[pair])
+            word_rows.append(word_cache[pair])
+        return cls(snapshot, _postings(substring_rows), _postings(word_rows))
+
+    def with_snapshot(self, snapshot) -> "SearchIndex":
+        """Same postings, re-ranked for a snapshot whose names did not change."""
+        return SearchIndex(snapshot, self.substring_postings, self.word_postings)
+
+    def _first_distinct_names(self, market_cap) -> np.ndarray:
+        # DISTINCT ON (companyname) ... ORDER BY companyname, market_cap DESC
+        snapshot = self.snapshot
+        by_name = snapshot.order(snapshot.order(self.ranked, market_cap, descending=True), snapshot["companyname_lower"])
+        seen, picked = set(), []
+        for i in by_name.tolist():
+            name = snapshot["companyname"][i]
+            if name not in seen:
+                seen.add(name)
+                picked.append(i)
+                if len(picked) == SEARCH_LIMIT:
+                    break
+        return np.array(picked, dtype=np.int64)
+
+    def _by_rank(self, positions: np.ndarray) -> np.ndarray:
+        ranks = self.rank[positions]
+        ranks = np.sort(ranks[ranks >= 0])
+        return self.ranked[ranks]
+
+    def _substring_matches(self, needle: str, limit: int) -> np.ndarray:
+        grams = _ngrams(needle, 2 if len(needle) == 2 else 3)
+        lists = [self.substring_postings.get(gram) for gram in grams]
+        if any(postings is None for postings in lists):
+            return np.empty(0, dtype=np.int64)
+
+        lists.sort(key=len)
+        candidates = lists[0]
+        for postings in lists[1:]:
+            candidates = np.intersect1d(candidates, postings, assume_unique=True)
+            if not len(candidates):
+                return np.empty(0, dtype=np.int64)
+
+        # Grams only narrow the set; verify in market_cap order and stop at limit
+        names, short_names = self.snapshot["companyname_lower"], self.snapshot["companyshortname_lower"]
+        picked = []
+        for i in self._by_rank(candidates).tolist():
+            if needle in names[i] or needle in short_names[i]:
+                picked.append(i)
+                if len(picked) == limit:
+                    break
+        return np.array(picked, dtype=np.int64)
+
+    def _fuzzy_matches(self, needle: str, limit: int) -> np.ndarray:
+        grams = _word_trigrams(needle)
+        lists = [self.word_postings[gram] for gram in grams if gram in self.word_postings]
+        if not lists:
+            return np.empty(0, dtype=np.int64)
+
+        shared = np.bincount(np.concatenate(lists), minlength=self.snapshot.size)
+        candidates = np.flatnonzero(shared >= FUZZY_MIN_SIMILARITY * len(grams))
+        candidates = candidates[self.rank[candidates] >= 0]
+        # Best similarity first, market_cap rank breaks ties
+        order = np.lexsort((self.rank[candidates], -shared[candidates]))
+        return candidates[order[:limit]]
+
+    def search(self, term: str, limit: int = SEARCH_LIMIT) -> np.ndarray:
+        """Snapshot positions for a search_stock term, in response order."""
+        if not term:
+            return self.ranked[:limit]
+        if len(term) == 1:
+            return self.alphabetical[:limit]
+
+        needle = term.lower()
+        matches = self._substring_matches(needle, limit)
+        if not len(matches) and len(needle) >= 3:
+            matches = self._fuzzy_matches(needle, limit)
+        return matches
+
+
+_index: SearchIndex | None = None
+_rebuilding = False
+_stats = {"builds": 0, "reranks": 0, "last_build_ms": None}
+
+
+def get_search_index() -> SearchIndex | None:
+    """Current index, or None until the first build finished (search_stock then falls back to SQL)."""
+    return _index
+
+
+def _names_unchanged(old, new, changed_positions) -> bool:
+    if old.size != new.size:
+        return False
+    columns = ("companyname_lower", "companyshortname_lower")
+    if changed_positions is None:
+        return all(np.array_equal(old[col], new[col]) for col in columns)
+    return all(np.array_equal(old[col][changed_positions], new[col][changed_positions]) for col in columns)
+
+
+async def _rebuild():
+    """Builds postings off the event loop; the previous index keeps serving until it is done."""
+    global _index, _rebuilding
+    try:
+        while True:
+            snapshot = get_snapshot()
+            started = time.perf_counter()
+            index = await asyncio.to_thread(SearchIndex.build, snapshot)
+            _stats["builds"] += 1
+            _stats["last_build_ms"] = round((time.perf_counter() - started) * 1000, 3)
+
+            # Swaps that arrived meanwhile were skipped; catch up with the latest one
+            latest = get_snapshot()
+            if latest is snapshot or _names_unchanged(snapshot, latest, None):
+                _index = index if latest is snapshot else index.with_snapshot(latest)
+                return
+    except Exception as e:
+        print(f"[Search Index Build Error] {e}")
+    finally:
+        _rebuilding = False
+
+
+def _on_snapshot_swapped(previous, current, changed_positions):
+    global _index, _rebuilding
+    if _rebuilding:
+        return
+    if previous is not (_index and _index.snapshot):
+        changed_positions = None  # the index lags behind; compare everything
+    if _index is not None and _names_unchanged(_index.snapshot, current, changed_positions):
+        _index = _index.with_snapshot(current)
+        _stats["reranks"] += 1
+        return
+    _rebuilding = True
+    asyncio.get_running_loop().create_task(_rebuild())
+
+
+add_snapshot_listener(_on_snapshot_swapped)
+
+
+def search_index_stats() -> dict:
+    return {
+        **_stats,
+        "snapshot_version": _index.snapshot.version if _index else None,
+        "substring_grams": len(_index.substring_postings) if _index else 0,
+        "word_grams": len(_index.word_postings) if _index else 0,
+    }
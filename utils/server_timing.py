@@ -0,0 +1,48 @@
+"""
+Per-section timing for routes, exposed as a Server-Timing header when the client sends
+X-Debug-Timings: 1 (browsers' devtools and curl -v both show it).
+"""
+import time
+from contextlib import contextmanager
+from fastapi import Request, Response
+
+DEBUG_TIMINGS_HEADER = "X-Debug-Timings"
+
+
+def wants_timings(request: Request) -> bool:
+    return request.headers.get(DEBUG_TIMINGS_HEADER, "").lower() in ("1", "true", "yes")
+
+
+class SectionTimer:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.sections: dict[str, float] = {}
+        self.notes: dict[str, str] = {}
+
+    @contextmanager
+    def measure(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.sections[name] = (time.perf_counter() - start) * 1000
+
+    async def run(self, name: str, awaitable):
+        with self.measure(name):
+            return await awaitable
+
+    def note(self, name: str, description: str):
+        """Adds a duration-less entry, e.g. note("cache", "hit")."""
+        self.notes[name] = description
+
+    def header(self) -> str:
+        total = (time.perf_counter() - self.started) * 1000
+        parts = [f"{name};dur={ms:.2f}" for name, ms in self.sections.items()]
+        parts += [f'{name};desc="{description}"' for name, description in self.notes.items()]
+        parts.append(f"total;dur={total:.2f}")
+        return ", ".join(parts)
+
+    def attach(self, request: Request, response: Response) -> Response:
+        if wants_timings(request):
+            response.headers["Server-Timing"] = self.header()
+        return response
@@ -0,0 +1,86 @@
+"""
+Request coalescing for read-only routes whose result does not depend on the caller.
+
+    @router.get("/get_scanners")
+    @single_flight()
+    async def get_scanners(request: Request, user_data=Depends(authorize_user)): ...
+
+Concurrent calls with the same route + normalized parameters share one execution: the
+first caller (leader) runs the route body, everyone arriving while it is in flight
+(followers) awaits the same result. Nothing is cached after it completes.
+
+Coalesced routes should acquire their DB connection inside the body (acquire_connection)
+rather than through Depends(get_db), otherwise every follower still holds a pooled
+connection while it waits.
+"""
+import asyncio
+import functools
+
+# Per-caller parameters that never belong in the key
+DEFAULT_EXCLUDED_PARAMS = frozenset({"request", "response", "user", "user_data", "conn", "background_tasks"})
+
+_inflight: dict = {}
+_stats: dict[str, dict] = {}
+
+
+def _normalize(value):
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, list):
+        return tuple(_normalize(v) for v in value)
+    return value
+
+
+def _finished(key, task: asyncio.Task):
+    if _inflight.get(key) is task:
+        del _inflight[key]
+    if not task.cancelled():
+        task.exception()  # mark retrieved even if every caller went away
+
+
+def single_flight(normalize: dict | None = None, exclude: frozenset = DEFAULT_EXCLUDED_PARAMS):
+    """normalize maps a parameter name to an extra normalizer, e.g. {"exchange": str.upper}."""
+    normalize = normalize or {}
+
+    def decorator(fn):
+        name = fn.__name__
+        stats = _stats.setdefault(name, {"leaders": 0, "followers": 0})
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            params = []
+            for param, value in sorted(kwargs.items()):
+                if param in exclude:
+                    continue
+                value = _normalize(value)
+                if param in normalize and value is not None:
+                    value = normalize[param](value)
+                params.append((param, value))
+            key = (name, tuple(params))
+
+            task = _inflight.get(key)
+            if task is not None:
+                stats["followers"] += 1
+            else:
+                stats["leaders"] += 1
+                # Runs as its own task so a leader that disconnects does not cancel the followers
+                task = asyncio.get_running_loop().create_task(fn(*args, **kwargs))
+                _inflight[key] = task
+                task.add_done_callback(functools.partial(_finished, key))
+            return await asyncio.shield(task)
+
+        return wrapper
+
+    return decorator
+
+
+def single_flight_stats() -> dict:
+    result = {}
+    for name, stats in _stats.items():
+        total = stats["leaders"] + stats["followers"]
+        result[name] = {
+            **stats,
+            "in_flight": sum(1 for key in _inflight if key[0] == name),
+            "coalescing_ratio": round(stats["followers"] / total, 4) if total else 0.0,
+        }
+    return result
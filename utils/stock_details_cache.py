@@ -0,0 +1,29 @@
+"""
+Cache of the slow-changing get_stock_details sections (financials, shareholding, large
+shareholders, financial data, monk_ai_analysis), keyed by co_code. Live price fields
+are merged in per request and never cached.
+"""
+import os
+from utils.swr_cache import SwrCache
+
+STOCK_DETAILS_CACHE_TTL_SECONDS = float(os.getenv("STOCK_DETAILS_CACHE_TTL_SECONDS", "3600"))
+STOCK_DETAILS_CACHE_STALE_SECONDS = float(os.getenv("STOCK_DETAILS_CACHE_STALE_SECONDS", "86400"))
+STOCK_DETAILS_CACHE_MAX_ENTRIES = int(os.getenv("STOCK_DETAILS_CACHE_MAX_ENTRIES", "2000"))
+
+stock_details_cache = SwrCache(
+    "Stock Details",
+    ttl=STOCK_DETAILS_CACHE_TTL_SECONDS,
+    stale_ttl=STOCK_DETAILS_CACHE_STALE_SECONDS,
+    max_entries=STOCK_DETAILS_CACHE_MAX_ENTRIES,
+)
+
+def invalidate_stock_details(co_code=None) -> int:
+    """Drops one company's cached sections (or all of them when co_code is None). Returns entries dropped."""
+    if co_code is None:
+        dropped = stock_details_cache.stats()["entries"]
+        stock_details_cache.clear()
+        return dropped
+    return int(stock_details_cache.invalidate(co_code))
+
+def stock_details_cache_stats() -> dict:
+    return stock_details_cache.stats()
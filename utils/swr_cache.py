@@ -0,0 +1,85 @@
+"""
+Keyed in-process cache with TTL, stale-while-revalidate and LRU eviction.
+
+    fresh  (age < ttl)                 -> served from memory
+    stale  (ttl <= age < ttl + stale)  -> served from memory, refreshed once in the background
+    absent / expired                   -> loaded; concurrent misses for one key share the load
+"""
+import asyncio
+import time
+from collections import OrderedDict
+
+
+class SwrCache:
+    def __init__(self, name: str, ttl: float, stale_ttl: float, max_entries: int):
+        self.name = name
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()  # key -> (loaded_at, value), least recently used first
+        self._loading: dict = {}  # key -> asyncio.Task
+        self._stats = {"hits": 0, "stale_hits": 0, "misses": 0, "evictions": 0, "invalidations": 0, "refresh_errors": 0}
+
+    async def get(self, key, loader):
+        """Returns (value, state) where state is "hit", "stale" or "miss". loader() is a coroutine function."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            age = time.monotonic() - entry[0]
+            if age < self.ttl + self.stale_ttl:
+                self._entries.move_to_end(key)
+                if age < self.ttl:
+                    self._stats["hits"] += 1
+                    return entry[1], "hit"
+                self._stats["stale_hits"] += 1
+                self._load(key, loader, background=True)
+                return entry[1], "stale"
+
+        self._stats["misses"] += 1
+        return await asyncio.shield(self._load(key, loader)), "miss"
+
+    def _load(self, key, loader, background: bool = False) -> asyncio.Task:
+        task = self._loading.get(key)
+        if task is None:
+            task = asyncio.get_running_loop().create_task(self._fill(key, loader, background))
+            # Background refreshes may have no awaiter; retrieve the exception so it is not reported as lost
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._loading[key] = task
+        return task
+
+    async def _fill(self, key, loader, background: bool):
+        task = asyncio.current_task()
+        try:
+            value = await loader()
+            # invalidate() during the load: the value may predate the change, so do not keep it
+            if self._loading.get(key) is task:
+                self.put(key, value)
+            return value
+        except Exception as e:
+            if background:
+                # Keep serving the stale entry; the next stale hit retries
+                self._stats["refresh_errors"] += 1
+                print(f"[{self.name} Cache Refresh Error] {e}")
+            raise
+        finally:
+            if self._loading.get(key) is task:
+                del self._loading[key]
+
+    def put(self, key, value):
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def invalidate(self, key) -> bool:
+        self._stats["invalidations"] += 1
+        self._loading.pop(key, None)
+        return self._entries.pop(key, None) is not None
+
+    def clear(self):
+        self._stats["invalidations"] += len(self._entries)
+        self._loading.clear()
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {**self._stats, "entries": len(self._entries), "max_entries": self.max_entries}
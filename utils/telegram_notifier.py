@@ -1,5 +1,7 @@
 import aiohttp
+import asyncio
 import os
+import time
 from dotenv import load_dotenv
 import re
 
@@ -11,6 +13,16 @@ load_dotenv()
 
 # --- CONFIGURATION ---
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
+TELEGRAM_API_BASE = os.getenv("TELEGRAM_API_BASE", "https://api.telegram.org")  # point at scripts/fake_telegram_server.py locally
+
+# --- QUEUE CONFIG ---
+TELEGRAM_QUEUE_MAX_SIZE = int(os.getenv("TELEGRAM_QUEUE_MAX_SIZE", "1000"))  # messages beyond this are dropped (counted)
+TELEGRAM_BATCH_WINDOW_SECONDS = float(os.getenv("TELEGRAM_BATCH_WINDOW_SECONDS", "2"))
+TELEGRAM_SEND_TIMEOUT_SECONDS = float(os.getenv("TELEGRAM_SEND_TIMEOUT_SECONDS", "5"))
+# Telegram allows ~30 messages/s per bot and ~20 messages/min per group
+TELEGRAM_GLOBAL_MIN_INTERVAL = 1 / 30
+TELEGRAM_CHAT_MIN_INTERVAL = 60 / 20
+TELEGRAM_MAX_MESSAGE_LENGTH = 4096
 
 # Set environment to either "prod" or "dev"
 ENVIRONMENT = "dev"  # change to "dev" during development
@@ -34,26 +46,135 @@ ALLOWED_PUBLIC_MESSAGES = [
 IS_PROD = os.getenv("ENV", "dev") == "prod"
 DEFAULT_CHANNEL_KEY = "prod_api" if IS_PROD else "dev_api"
 
+# (chat_id, message, parse_mode, batchable)
+_queue: asyncio.Queue = asyncio.Queue(maxsize=TELEGRAM_QUEUE_MAX_SIZE)
+_session: aiohttp.ClientSession | None = None
+_last_sent_at: dict[str, float] = {}
+_last_global_send = 0.0
+_stats = {"enqueued": 0, "dropped": 0, "deduplicated": 0, "sent": 0, "failed": 0, "rate_limited": 0}
+
 async def notify_internal(message: str, parse_mode="Markdown"):
+    """Queues an alert for the internal channel and returns immediately."""
     formatted_message = escape_markdown(message)
     channel_id = TELEGRAM_CHANNELS.get(DEFAULT_CHANNEL_KEY)
-    await _send_to_telegram(channel_id, formatted_message, parse_mode)
+    _enqueue(channel_id, formatted_message, parse_mode, batchable=True)
 
 async def notify_public(message: str, message_type: str, parse_mode="Markdown"):
     if message_type not in ALLOWED_PUBLIC_MESSAGES:
         return
     channel_id = TELEGRAM_CHANNELS.get("public_updates")
     formatted_message = escape_markdown(message)
-    await _send_to_telegram(channel_id, formatted_message, parse_mode)
+    _enqueue(channel_id, formatted_message, parse_mode, batchable=False)
 
 async def _send_to_telegram(chat_id: str, message: str, parse_mode: str = "Markdown"):
+    """Queues a message that must go out on its own (not merged into an alert batch)."""
+    _enqueue(chat_id, message, parse_mode, batchable=False)
+
+def _enqueue(chat_id: str, message: str, parse_mode: str, batchable: bool):
+    try:
+        _queue.put_nowait((chat_id, message, parse_mode, batchable))
+        _stats["enqueued"] += 1
+    except asyncio.QueueFull:
+        _stats["dropped"] += 1
+
+# --- BACKGROUND SENDER ---
+
+def _build_batches(items: list) -> list[tuple[str, str, str]]:
+    """Merges batchable alerts per chat (identical ones collapsed with a count) within the size limit."""
+    grouped: dict[tuple, dict[str, int]] = {}
+    batches = []
+    for chat_id, message, parse_mode, batchable in items:
+        if not batchable:
+            batches.append((chat_id, message[:TELEGRAM_MAX_MESSAGE_LENGTH], parse_mode))
+            continue
+        counts = grouped.setdefault((chat_id, parse_mode), {})
+        if message in counts:
+            _stats["deduplicated"] += 1
+        counts[message] = counts.get(message, 0) + 1
+
+    for (chat_id, parse_mode), counts in grouped.items():
+        current = ""
+        for message, count in counts.items():
+            line = message if count == 1 else f"{message} {escape_markdown(f'(x{count})')}"
+            line = line[:TELEGRAM_MAX_MESSAGE_LENGTH]
+            if current and len(current) + 2 + len(line) > TELEGRAM_MAX_MESSAGE_LENGTH:
+                batches.append((chat_id, current, parse_mode))
+                current = ""
+            current = f"{current}\n\n{line}" if current else line
+        if current:
+            batches.append((chat_id, current, parse_mode))
+    return batches
+
+async def _wait_for_rate_limit(chat_id: str):
+    global _last_global_send
+    now = time.monotonic()
+    wait = max(
+        _last_sent_at.get(chat_id, 0) + TELEGRAM_CHAT_MIN_INTERVAL - now,
+        _last_global_send + TELEGRAM_GLOBAL_MIN_INTERVAL - now,
+    )
+    if wait > 0:
+        await asyncio.sleep(wait)
+    _last_sent_at[chat_id] = _last_global_send = time.monotonic()
+
+async def _post(chat_id: str, message: str, parse_mode: str):
+    global _session
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=TELEGRAM_SEND_TIMEOUT_SECONDS))
+
+    url = f"{TELEGRAM_API_BASE}/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
+    data = {"chat_id": chat_id, "text": message, "parse_mode": parse_mode}
+    for _ in range(2):
+        await _wait_for_rate_limit(chat_id)
+        try:
+            async with _session.post(url, data=data) as resp:
+                if resp.status == 200:
+                    _stats["sent"] += 1
+                    return
+                if resp.status == 429:
+                    # Telegram tells us how long to back off; retry once after that
+                    _stats["rate_limited"] += 1
+                    body = await resp.json(content_type=None)
+                    await asyncio.sleep(float(body.get("parameters", {}).get("retry_after", 1)))
+                    continue
+                error_text = await resp.text()
+                print(f"[Telegram Error] Status {resp.status}: {error_text}")
+                break
+        except Exception as e:
+            print(f"[Telegram Error] Failed to send message: {e}")
+            break
+    _stats["failed"] += 1
+
+def _drain(first=None) -> list:
+    items = [first] if first is not None else []
+    while True:
+        try:
+            items.append(_queue.get_nowait())
+        except asyncio.QueueEmpty:
+            return items
+
+async def telegram_sender_forever():
+    """Sends queued messages: waits a batch window after the first one, then sends merged batches."""
+    while True:
+        first = await _queue.get()
+        await asyncio.sleep(TELEGRAM_BATCH_WINDOW_SECONDS)
+        for chat_id, message, parse_mode in _build_batches(_drain(first)):
+            await _post(chat_id, message, parse_mode)
+
+async def close_telegram_notifier(timeout: float = 5):
+    """Shutdown hook: best-effort send of what is still queued, then close the shared session."""
+    global _session
+
+    async def send_remaining():
+        for chat_id, message, parse_mode in _build_batches(_drain()):
+            await _post(chat_id, message, parse_mode)
+
     try:
-        url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
-        data = {"chat_id": chat_id, "text": message, "parse_mode": parse_mode}
-        async with aiohttp.ClientSession() as session:
-            async with session.post(url, data=data, timeout=5) as resp:
-                if resp.status != 200:
-                    error_text = await resp.text()
-                    print(f"[Telegram Error] Status {resp.status}: {error_text}")
-    except Exception as e:
-        print(f"[Telegram Error] Failed to send message: {e}")
+        await asyncio.wait_for(send_remaining(), timeout=timeout)
+    except asyncio.TimeoutError:
+        print("[Telegram Error] Shutdown flush timed out")
+    if _session is not None:
+        await _session.close()
+        _session = None
+
+def telegram_stats() -> dict:
+    return {**_stats, "queued": _queue.qsize(), "queue_max_size": TELEGRAM_QUEUE_MAX_SIZE}
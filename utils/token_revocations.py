@@ -0,0 +1,57 @@
+"""
+Per-user "minimum valid iat": access tokens issued at or before it (i.e. up to the user's last
+logout) are rejected by authorize_user with one dict lookup, no DB hit.
+Kept current by tasks/token_revocation_refresher.py.
+
+JWT iat has whole seconds only, so a token issued earlier in the logout's second must be
+rejected too (iat <= min_iat). In exchange, login routes take their token's iat from
+token_issue_time(), which is at least one second after any revocation of that user.
+"""
+import time
+from datetime import datetime, timezone
+
+_min_iat: dict[int, int] = {}  # user_id -> epoch seconds
+_stats = {"loads": 0, "notifications": 0, "rejected": 0, "last_load_at": None}
+
+def set_token_revocations(min_iat_by_user: dict[int, int], prune_before: int):
+    """
+    Swaps in a freshly loaded map. Entries already held (e.g. NOTIFYs that arrived while the
+    load was reading) are kept when newer, since a revocation only ever moves forward;
+    entries older than prune_before can no longer match a live token and are dropped.
+    """
+    global _min_iat
+    merged = dict(min_iat_by_user)
+    for user_id, min_iat in _min_iat.items():
+        if min_iat >= prune_before and min_iat > merged.get(user_id, 0):
+            merged[user_id] = min_iat
+    _min_iat = merged
+    _stats["loads"] += 1
+    _stats["last_load_at"] = time.time()
+
+def revoke_tokens_before(user_id: int, min_iat: int, from_notify: bool = False):
+    # Never move backwards: a late NOTIFY must not undo a newer local logout
+    if min_iat > _min_iat.get(user_id, 0):
+        _min_iat[user_id] = min_iat
+    if from_notify:
+        _stats["notifications"] += 1
+
+def token_issue_time(user_id: int, now: datetime, jwt_min_iat: datetime | None = None) -> datetime:
+    """iat for a new token: now, or the second after the user's revocation (mt_users.jwt_min_iat or in memory) if later."""
+    revoked_until = _min_iat.get(user_id, 0)
+    if jwt_min_iat is not None:
+        revoked_until = max(revoked_until, int(jwt_min_iat.timestamp()))
+    if int(now.timestamp()) > revoked_until:
+        return now
+    return datetime.fromtimestamp(revoked_until + 1, timezone.utc)
+
+def is_token_revoked(user_id: int, iat) -> bool:
+    min_iat = _min_iat.get(user_id)
+    if min_iat is None:
+        return False
+    if iat is None or iat <= min_iat:
+        _stats["rejected"] += 1
+        return True
+    return False
+
+def token_revocation_stats() -> dict:
+    return {**_stats, "users": len(_min_iat)}
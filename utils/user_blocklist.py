@@ -1,10 +1,67 @@
+import time
 from typing import Set
+from utils.metrics import Gauge, Histogram
 
 blocked_user_ids: Set[int] = set()
 
+_stats = {
+    "full_reloads": 0,
+    "delta_syncs": 0,
+    "notifications": 0,
+    "last_full_reload_at": None,
+    "last_sync_at": None,
+    "propagation_ms_last": None,
+    "propagation_ms_max": None,
+}
+_propagation_total_ms = 0.0
+
+BLOCKLIST_PROPAGATION = Histogram(
+    "blocklist_propagation_seconds", "is_blocked change in the DB -> applied on this worker (NOTIFY path)",
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 60.0),
+)
+Gauge("blocklist_size", "Blocked user ids held in memory", callback=lambda: len(blocked_user_ids))
+
 def set_blocked_users(user_ids: list[int]):
     global blocked_user_ids
     blocked_user_ids = set(user_ids)
+    _stats["full_reloads"] += 1
+    _stats["last_full_reload_at"] = _stats["last_sync_at"] = time.time()
+
+def apply_blocklist_changes(changes: dict[int, bool], source: str = "delta"):
+    """
+    Applies {user_id: is_blocked} on a copy and swaps it in, so readers never see a half-applied batch.
+    source is "notify", "delta" or "replay" (notifications re-applied after a full reload).
+    """
+    global blocked_user_ids
+    updated = set(blocked_user_ids)
+    for user_id, blocked in changes.items():
+        if blocked:
+            updated.add(user_id)
+        else:
+            updated.discard(user_id)
+    blocked_user_ids = updated
+    if source == "notify":
+        _stats["notifications"] += 1
+    elif source == "delta":
+        _stats["delta_syncs"] += 1
+        _stats["last_sync_at"] = time.time()
+
+def record_propagation(changed_at: float):
+    """changed_at: DB clock epoch of the is_blocked change; assumes worker and DB clocks are NTP-synced."""
+    global _propagation_total_ms
+    latency_ms = max(0.0, (time.time() - changed_at) * 1000)
+    BLOCKLIST_PROPAGATION.observe(latency_ms / 1000)
+    _propagation_total_ms += latency_ms
+    _stats["propagation_ms_last"] = round(latency_ms, 3)
+    _stats["propagation_ms_max"] = round(max(latency_ms, _stats["propagation_ms_max"] or 0.0), 3)
 
 def is_user_blocked(user_id: int) -> bool:
-    return user_id in blocked_user_ids
\ No newline at end of file
+    return user_id in blocked_user_ids
+
+def blocklist_stats() -> dict:
+    notifications = _stats["notifications"]
+    return {
+        **_stats,
+        "size": len(blocked_user_ids),
+        "propagation_ms_avg": round(_propagation_total_ms / notifications, 3) if notifications else None,
+    }
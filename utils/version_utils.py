@@ -1,10 +1,8 @@
 from typing import Literal
+from utils.app_config import get_config
 
 async def determine_update_type(conn, platform: Literal["google", "apple"], appversion: str) -> str:
-    version_query = "SELECT * FROM mt_config LIMIT 1"
-    config = await conn.fetchrow(version_query)
-    if not config:
-        raise Exception("Version config not found in monk_config")
+    config = await get_config(conn)
 
     def version_tuple(v):
         return tuple(map(int, v.split(".")))
@@ -12,11 +10,11 @@ async def determine_update_type(conn, platform: Literal["google", "apple"], appv
     app_v = version_tuple(appversion)
 
     if platform == "google":
-        min_v = version_tuple(config["min_supported_version_android"])
-        latest_v = version_tuple(config["latest_version_android"])
+        min_v = version_tuple(config.min_supported_version_android)
+        latest_v = version_tuple(config.latest_version_android)
     else:
-        min_v = version_tuple(config["min_supported_version_ios"])
-        latest_v = version_tuple(config["latest_version_ios"])
+        min_v = version_tuple(config.min_supported_version_ios)
+        latest_v = version_tuple(config.latest_version_ios)
 
     if app_v < min_v:
         return "ForceUpdate"